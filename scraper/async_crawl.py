@@ -0,0 +1,87 @@
+"""
+Asyncio crawl engine for SiteScraper
+
+Fetches pages with a bounded pool of worker tasks instead of one blocking
+request (plus a fixed sleep) at a time:
+1. A shared queue holds the crawl frontier
+2. N worker tasks pull URLs from it
+3. The scraper's RateController paces requests to each host
+4. Links found on each page go straight back onto the queue
+
+The blocking requests calls run in a thread pool. Parsing and all updates
+to the scraper's sets/lists happen on the event loop, so SiteScraper state
+is only ever touched from one thread.
+
+Usage: python scrape_site.py --async [--workers 8] [--per-host 4]
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from url_utils import url_key
+
+DEFAULT_WORKERS = 8
+
+
+class AsyncCrawler:
+    def __init__(self, scraper, workers: int = DEFAULT_WORKERS):
+        self.scraper = scraper
+        self.workers = max(1, workers)
+        self.scraped = 0
+
+    async def scrape(self, url: str, queue: asyncio.Queue, executor: ThreadPoolExecutor):
+        """Fetch one page in the thread pool, then extract it on the loop"""
+        key = url_key(url)
+        if key in self.scraper.visited_urls:
+            return
+        self.scraper.visited_urls.add(key)
+
+        loop = asyncio.get_running_loop()
+        content = await loop.run_in_executor(executor, self.scraper.fetch_html, url)
+
+        self.scraped += 1
+        if content is None:
+            self.scraper.finish_page(url, False)
+            return
+
+        print(f"\n[{self.scraped}/{len(self.scraper.discovered_pages)}] Scraping: {url}")
+        page = self.scraper.parse_html(content)
+        for new_url in self.scraper.process_page(url, page):
+            queue.put_nowait(new_url)
+        self.scraper.finish_page(url, True)
+
+    async def worker(self, queue: asyncio.Queue, executor: ThreadPoolExecutor):
+        """Pull URLs off the frontier until the crawl is cancelled"""
+        while True:
+            url = await queue.get()
+            try:
+                await self.scrape(url, queue, executor)
+            except Exception as e:
+                print(f"    Error scraping {url}: {e}")
+                self.scraper.failed_urls.append(url)
+            finally:
+                queue.task_done()
+
+    async def crawl(self):
+        """Scrape every discovered page (and everything they link to)"""
+        print(f"\n=== Scraping Pages (async, {self.workers} workers, "
+              f"up to {self.scraper.rate.max_concurrency}/host) ===")
+
+        queue = asyncio.Queue()
+        for key, url in sorted(self.scraper.discovered_pages.items()):
+            if key not in self.scraper.visited_urls:
+                queue.put_nowait(url)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            tasks = [asyncio.create_task(self.worker(queue, executor))
+                     for _ in range(self.workers)]
+            try:
+                await queue.join()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    def run(self):
+        """Run the crawl to completion from synchronous code"""
+        asyncio.run(self.crawl())
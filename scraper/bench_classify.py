@@ -0,0 +1,202 @@
+"""
+Benchmark for the metadata classifier (classify.py)
+
+Runs the scraped image records through the old per-image if/elif chains
+(kept below as the reference) and through classify.py, checks that every
+record gets exactly the same category, observatory, filters and
+designation - scraper and codegen rules both - and times the two.
+
+The 222 records in images_raw.json are scaled up two ways: repeated as
+they are (the same images seen again, as on a re-crawl or a second page
+linking them), and with a distinct filename per copy - the worst case for
+the memoized path, where every filename is new.
+
+Usage:
+    python bench_classify.py                # 100k records
+    python bench_classify.py --records 20000
+"""
+
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import Optional
+import json
+
+import classify
+
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+IMAGES_PATH = Path("../src/data/scraped/images_raw.json")
+
+
+# --- Reference implementation: the chains classify.py replaced ---
+
+def legacy_category(page_url: str, filename: str) -> str:
+    url_lower = page_url.lower()
+    file_lower = filename.lower()
+    if 'galax' in url_lower and 'cluster' in url_lower:
+        return 'galaxy-clusters'
+    elif 'galaxy' in url_lower or 'galaxi' in url_lower:
+        return 'galaxies'
+    elif 'star' in url_lower and 'cluster' in url_lower:
+        return 'star-clusters'
+    elif 'nebula' in url_lower:
+        return 'nebulae'
+    elif 'supernova' in url_lower:
+        return 'supernovae'
+    elif 'asteroid' in url_lower:
+        return 'asteroids'
+    elif 'exoplanet' in url_lower:
+        return 'exoplanets'
+    elif 'equipment' in url_lower or 'scope' in file_lower or 'mount' in file_lower:
+        return 'equipment'
+    elif 'family' in url_lower or 'travel' in url_lower or 'israel' in file_lower:
+        return 'travel'
+    return 'misc'
+
+
+def legacy_observatory(filename: str, text: str) -> Optional[str]:
+    combined = f"{filename} {text}".upper()
+    if 'BBO' in combined or 'BLACKBIRD' in combined:
+        return 'BBO'
+    elif 'SRO' in combined or 'SIERRA' in combined:
+        return 'SRO'
+    elif 'G53' in combined or 'ALDER' in combined:
+        return 'G53'
+    elif 'H85' in combined or 'SILVER SPRING' in combined:
+        return 'H85'
+    if '_bbo' in filename.lower() or 'bbo_' in filename.lower():
+        return 'BBO'
+    elif '_h85' in filename.lower() or 'h85_' in filename.lower():
+        return 'H85'
+    return None
+
+
+def legacy_filters(filename: str, text: str) -> Optional[str]:
+    combined = f"{filename} {text}".upper()
+    filters = []
+    if 'LRGB' in combined:
+        filters.append('LRGB')
+    if 'HA' in combined or 'H-ALPHA' in combined or 'HALPHA' in combined:
+        if 'LRGB' in filters:
+            return 'LRGB+Ha'
+        filters.append('Ha')
+    if 'OIII' in combined or 'O3' in combined:
+        filters.append('OIII')
+    if 'SII' in combined or 'S2' in combined:
+        filters.append('SII')
+    if 'SII' in filters and 'HA' in ' '.join(filters).upper() and 'OIII' in filters:
+        return 'SII/Ha/OIII'
+    return filters[0] if filters else None
+
+
+def legacy_designation(filename: str, title: str, description: str) -> Optional[str]:
+    combined = f"{filename} {title} {description}"
+    for pattern, label in ((r'\bM\s*(\d{1,3})\b', "M{}"), (r'\bNGC\s*(\d{3,5})\b', "NGC {}"),
+                           (r'\bIC\s*(\d{3,5})\b', "IC {}"), (r'\bAbell\s*(\d+)\b', "Abell {}")):
+        match = re.search(pattern, combined, re.IGNORECASE)
+        if match:
+            return label.format(match.group(1))
+    return None
+
+
+def legacy_codegen(filename: str):
+    designation = None
+    for pattern, label in ((r'^M(\d+)', "M{}"), (r'^NGC(\d+)', "NGC{}"), (r'^PK(\d+)', "PK {}"), (r'^SN(\d+)', "SN {}")):
+        match = re.match(pattern, filename, re.IGNORECASE)
+        if match:
+            designation = label.format(match.group(1))
+            break
+
+    if 'LRGBHa' in filename or 'LRGB_Ha' in filename:
+        filters = 'LRGB+Ha'
+    elif 'LRGB' in filename:
+        filters = 'LRGB'
+    elif 'RGB' in filename:
+        filters = 'RGB'
+    elif '_L_' in filename:
+        filters = 'L'
+    else:
+        filters = None
+
+    if '_BBO' in filename or 'BBO_' in filename or filename.endswith('BBO.jpg'):
+        observatory = 'BBO'
+    elif '_H85' in filename or 'H85_' in filename or filename.endswith('H85.jpg'):
+        observatory = 'H85'
+    elif '_SRO' in filename or 'SRO_' in filename:
+        observatory = 'SRO'
+    else:
+        observatory = None
+    return designation, filters, observatory
+
+
+def legacy_classify(record: dict):
+    filename, title, description = record['filename'], record.get('title'), record.get('description')
+    text = description or title or ''
+    return (legacy_category(record['page_source'], filename), legacy_observatory(filename, text),
+            legacy_filters(filename, text), legacy_designation(filename, title or '', description or ''),
+            legacy_codegen(filename))
+
+
+def new_classify(records):
+    return [(meta.category, meta.observatory, meta.filters, meta.designation, classify.codegen_fields(r['filename']))
+            for r, meta in zip(records, classify.classify_batch(records))]
+
+
+def scaled(records, count: int, unique: bool):
+    """`count` records cycling through the originals, optionally each with its own filename"""
+    out = []
+    for i in range(count):
+        record = dict(records[i % len(records)])
+        if unique and i >= len(records):
+            stem, dot, ext = record['filename'].rpartition('.')
+            record['filename'] = f"{stem}_{i}.{ext}" if dot else f"{record['filename']}_{i}"
+        out.append(record)
+    return out
+
+
+def timed(label: str, function, records, baseline: Optional[float] = None):
+    start = time.perf_counter()
+    results = function(records)
+    seconds = time.perf_counter() - start
+    speedup = f"  ({baseline / seconds:.1f}x)" if baseline else ""
+    print(f"  {label:22s}: {seconds * 1000:8.1f} ms  ({len(records) / seconds / 1000:7.1f}k records/s){speedup}")
+    return results, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the metadata classifier")
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--images", type=Path, default=IMAGES_PATH)
+    args = parser.parse_args()
+
+    with open(args.images, encoding='utf-8') as f:
+        originals = json.load(f)
+    failed = False
+    for unique in (False, True):
+        records = scaled(originals, args.records, unique)
+        print("=" * 60)
+        print(f"{len(records)} records from {len(originals)} scraped "
+              f"({'distinct filenames' if unique else 'repeated as-is'})")
+        print("=" * 60)
+
+        expected, baseline = timed("old if/elif chains", lambda rs: [legacy_classify(r) for r in rs], records)
+        classify.clear_caches()
+        results, _ = timed("classify.py", new_classify, records, baseline)
+
+        mismatches = [(r['filename'], old, new) for r, old, new in zip(records, expected, results) if old != new]
+        if mismatches:
+            failed = True
+            print(f"\n[FAIL] {len(mismatches)} records classified differently, e.g.:")
+            for filename, old, new in mismatches[:10]:
+                print(f"  {filename}: {old} -> {new}")
+        else:
+            print(f"\n[OK] All {len(records)} records classified identically\n")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
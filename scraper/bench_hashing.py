@@ -0,0 +1,101 @@
+"""
+Benchmark for the file-hashing backend (hash_index.py)
+
+Hashes every media file under a folder (default ../public/images) with
+each algorithm, in four ways:
+1. the old way - one thread, 8 KB reads
+2. one thread, hashlib.file_digest (large reads)
+3. a thread pool
+4. a process pool
+and prints MB/s for each. The hash index is not involved - every run reads
+every byte - so this measures raw hashing throughput.
+
+The first pass also warms the OS file cache; run it twice (or pass
+--repeat 2) to compare the backends on cached data, or point it at a tree
+larger than RAM to measure the disk.
+
+Usage:
+    python bench_hashing.py
+    python bench_hashing.py --path "C:/Users/Adir/Desktop/old-site" --algos md5,blake2b
+    python bench_hashing.py --workers 8 --repeat 2
+"""
+
+import os
+import sys
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from hash_index import HASH_WORKERS, hash_file
+
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+IMAGES_PATH = Path("../public/images")
+MEDIA_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tif', '.tiff', '.webp',
+                    '.mp4', '.avi', '.mov', '.wmv', '.webm', '.mkv'}
+ALGOS = "md5,sha1,sha256,blake2b"
+
+
+def hash_small_reads(filepath, algo: str) -> str:
+    """The old get_file_hash: 8 KB reads in a loop"""
+    hasher = hashlib.new(algo)
+    with open(filepath, 'rb') as f:
+        while chunk := f.read(8192):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def serial(function, files, algo, workers):
+    return [function(f, algo) for f in files]
+
+
+def pooled(pool):
+    def run(function, files, algo, workers):
+        with pool(max_workers=workers) as executor:
+            return list(executor.map(function, files, [algo] * len(files),
+                                     chunksize=16 if pool is ProcessPoolExecutor else 1))
+    return run
+
+
+BACKENDS = [
+    ("8 KB reads", hash_small_reads, serial),
+    ("file_digest", hash_file, serial),
+    ("thread pool", hash_file, pooled(ThreadPoolExecutor)),
+    ("process pool", hash_file, pooled(ProcessPoolExecutor)),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark file hashing backends")
+    parser.add_argument("--path", type=Path, default=IMAGES_PATH)
+    parser.add_argument("--algos", default=ALGOS, help=f"comma-separated (default {ALGOS})")
+    parser.add_argument("--workers", type=int, default=HASH_WORKERS)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    files = [str(p) for p in args.path.rglob('*') if p.is_file() and p.suffix.lower() in MEDIA_EXTENSIONS]
+    total = sum(os.path.getsize(f) for f in files)
+    if not files:
+        print(f"No media files under {args.path}")
+        sys.exit(1)
+
+    print("=" * 60)
+    print(f"{len(files)} files, {total / (1024 * 1024):.1f} MB under {args.path} ({args.workers} workers)")
+    print("=" * 60)
+    for _ in range(args.repeat):
+        for algo in args.algos.split(','):
+            print(f"\n{algo}:")
+            expected = None
+            for label, function, runner in BACKENDS:
+                start = time.perf_counter()
+                digests = runner(function, files, algo, args.workers)
+                seconds = time.perf_counter() - start
+                ok = "" if expected is None or digests == expected else "  [FAIL] digests differ"
+                expected = expected or digests
+                print(f"  {label:14s}: {seconds * 1000:8.1f} ms  ({total / (1024 * 1024) / seconds:8.1f} MB/s){ok}")
+
+if __name__ == "__main__":
+    main()
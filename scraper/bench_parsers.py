@@ -0,0 +1,94 @@
+"""
+Micro-benchmark for the HTML extraction backends
+
+Times every html_extract backend on saved pages and checks that they all
+produce exactly the same PageExtract (images + captions, links, frames).
+
+Pages come from the HTTP cache (scraper/.http_cache, filled by any crawl)
+or from a folder of saved .htm/.html files.
+
+Usage:
+    python bench_parsers.py                  # pages from the HTTP cache
+    python bench_parsers.py saved_pages/     # pages from a folder
+    python bench_parsers.py --repeat 20
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+from html_extract import BACKENDS, DEFAULT_BACKEND
+from http_cache import CACHE_DIR
+
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+def load_cached_pages(cache_dir: Path):
+    """(name, bytes) for every HTML body in the HTTP cache"""
+    pages = []
+    for meta_path in sorted(cache_dir.rglob('*.json')):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if 'html' not in meta['headers'].get('Content-Type', ''):
+            continue
+        body_path = meta_path.with_suffix('.body')
+        if body_path.exists():
+            pages.append((meta['url'], body_path.read_bytes()))
+    return pages
+
+
+def load_folder_pages(folder: Path):
+    """(name, bytes) for every .htm/.html file under a folder"""
+    return [(str(p.relative_to(folder)), p.read_bytes())
+            for p in sorted(folder.rglob('*'))
+            if p.is_file() and p.suffix.lower() in ('.htm', '.html')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare HTML extraction backends")
+    parser.add_argument("folder", nargs="?", help="folder of saved pages (default: HTTP cache)")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the page set per backend")
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    pages = load_folder_pages(Path(args.folder)) if args.folder else load_cached_pages(CACHE_DIR)
+    if not pages:
+        print("No saved pages found - run a crawl first or pass a folder of .htm files")
+        return
+
+    total_kb = sum(len(content) for _, content in pages) / 1024
+    print("=" * 60)
+    print(f"Benchmarking {len(BACKENDS)} backends on {len(pages)} pages ({total_kb:.1f} KB), {args.repeat} passes")
+    print("=" * 60)
+
+    outputs = {}
+    timings = {}
+    for name, extract in BACKENDS.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            results = [extract(content) for _, content in pages]
+        timings[name] = (time.perf_counter() - start) / args.repeat
+        outputs[name] = results
+
+    baseline = timings['html.parser']
+    for name, seconds in sorted(timings.items(), key=lambda t: t[1]):
+        print(f"  {name:12s}: {seconds * 1000:8.1f} ms/pass  ({baseline / seconds:.1f}x vs html.parser)")
+
+    # Every backend must agree with the original path page by page
+    mismatches = 0
+    for name, results in outputs.items():
+        for (page_name, _), got, expected in zip(pages, results, outputs['html.parser']):
+            if got != expected:
+                mismatches += 1
+                print(f"  [DIFF] {name}: {page_name}")
+
+    print(f"\n  Output identical: {'yes' if not mismatches else f'NO ({mismatches} pages differ)'}")
+    print(f"  Default backend: {DEFAULT_BACKEND}")
+
+
+if __name__ == "__main__":
+    main()
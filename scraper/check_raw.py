@@ -1,8 +1,10 @@
-import requests
+from http_client import get_session
+
+session = get_session()
 
 BASE = "https://silverspringastro.com"
 
-r = requests.get(f"{BASE}/index.html", timeout=30)
+r = session.get(f"{BASE}/index.html", timeout=30)
 print("=== Raw HTML (first 2000 chars) ===")
 print(r.text[:2000])
 
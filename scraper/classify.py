@@ -0,0 +1,242 @@
+"""
+Compiled metadata classifier shared by the scraper and the codegen
+
+The scraper (detect_category, detect_observatory, detect_filters,
+extract_designation) and convert_to_typescript.py (extract_designation,
+extract_filters, extract_observatory) each ran a chain of substring tests
+and uncompiled regexes over freshly built, upper-cased strings for every
+image. Here every rule table is compiled once:
+1. Each keyword gets a bit; KeywordScanner turns a string into the mask of
+   keywords it contains, in one pass, so each string is scanned once
+   however many rules look at it
+2. RuleTable holds ordered (value, keyword groups) rules compiled to masks:
+   the first rule with a hit in every group wins - the same priority as the
+   old if/elif chains - and its decision is memoized per mask
+3. Scans and whole classifications are memoized per string, so a filename,
+   caption or page seen before costs a dict lookup
+4. classify_batch() runs a list of image records through all the scraper
+   rules; codegen_fields() gives the codegen's three fields at once
+
+Results are identical to the old chains; bench_classify.py checks that
+and times both.
+
+Usage:
+    from classify import classify, classify_batch
+    meta = classify(page_url, filename, title, description)
+    meta.category, meta.observatory, meta.filters, meta.designation
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+CACHE_SIZE = 1 << 16
+
+# (value, groups): the rule applies when every group has at least one keyword hit
+Rule = Tuple[str, Tuple[Tuple[str, ...], ...]]
+
+_bits: Dict[str, int] = {}
+
+
+def keyword_mask(keywords: Iterable[str]) -> int:
+    """Mask of some keyword names; every name gets its own bit, shared module-wide"""
+    mask = 0
+    for keyword in keywords:
+        mask |= _bits.setdefault(keyword, 1 << len(_bits))
+    return mask
+
+
+class KeywordScanner:
+    """Mask of the keywords of a fixed table that occur in a string.
+
+    A keyword ending in '$' only matches at the end of the string. `prefix`
+    namespaces the bits, so one rule table can read several scanners.
+    """
+
+    def __init__(self, keywords: Iterable[str], prefix: str = ''):
+        keywords = sorted(set(keywords))
+        # Plain substring tests run in C and beat a regex alternation over the
+        # same table; overlapping keywords need no special care either
+        self.plain = tuple((k, keyword_mask([prefix + k])) for k in keywords if not k.endswith('$'))
+        self.anchored = tuple((k[:-1], keyword_mask([prefix + k])) for k in keywords if k.endswith('$'))
+        self.anchored_mask = keyword_mask(prefix + k for k in keywords if k.endswith('$'))
+        self.spaced = tuple((k, bit) for k, bit in self.plain if ' ' in k)
+        self.scan = lru_cache(maxsize=CACHE_SIZE)(self._scan)
+
+    def _scan(self, text: str) -> int:
+        found = 0
+        for keyword, bit in self.plain:
+            if keyword in text:
+                found |= bit
+        for suffix, bit in self.anchored:
+            if text.endswith(suffix):
+                found |= bit
+        return found
+
+    def scan_joined(self, head: str, tail: str) -> int:
+        """scan(head + ' ' + tail), built from the memoized scans of the two parts"""
+        found = (self.scan(head) & ~self.anchored_mask) | self.scan(tail)
+        # Only a keyword containing a space can straddle the join
+        for keyword, bit in self.spaced:
+            if not found & bit and keyword in f"{head[-len(keyword):]} {tail[:len(keyword)]}":
+                found |= bit
+        return found
+
+
+class RuleTable:
+    """Ordered rules; the first with a keyword hit in every group wins.
+
+    Decisions are memoized per keyword mask - a handful of distinct masks
+    cover every image on the site.
+    """
+
+    def __init__(self, rules: Sequence[Rule], default: Optional[str] = None):
+        self.rules = [(value, tuple(keyword_mask(group) for group in groups)) for value, groups in rules]
+        self.default = default
+        self.keywords = {keyword for _, groups in rules for group in groups for keyword in group}
+        self.decide = lru_cache(maxsize=CACHE_SIZE)(self._decide)
+
+    def _decide(self, found: int) -> Optional[str]:
+        for value, groups in self.rules:
+            if all(found & group for group in groups):
+                return value
+        return self.default
+
+    def __call__(self, found: int) -> Optional[str]:
+        return self.decide(found)
+
+
+# --- Scraper rules (scrape_site.SiteScraper) ---
+
+# Category comes from the lowercased page URL; 'file:' keywords from the filename
+CATEGORY = RuleTable([
+    ('galaxy-clusters', (('galax',), ('cluster',))),
+    ('galaxies', (('galaxy', 'galaxi'),)),
+    ('star-clusters', (('star',), ('cluster',))),
+    ('nebulae', (('nebula',),)),
+    ('supernovae', (('supernova',),)),
+    ('asteroids', (('asteroid',),)),
+    ('exoplanets', (('exoplanet',),)),
+    ('equipment', (('equipment', 'file:scope', 'file:mount'),)),
+    ('travel', (('family', 'travel', 'file:israel'),)),
+], default='misc')
+CATEGORY_URL = KeywordScanner(k for k in CATEGORY.keywords if not k.startswith('file:'))
+CATEGORY_FILE = KeywordScanner((k[5:] for k in CATEGORY.keywords if k.startswith('file:')), prefix='file:')
+
+# Observatory and filters read the same upper-cased "filename text" string,
+# so one scan serves both tables
+OBSERVATORY = RuleTable([
+    ('BBO', (('BBO', 'BLACKBIRD'),)),
+    ('SRO', (('SRO', 'SIERRA'),)),
+    ('G53', (('G53', 'ALDER'),)),
+    ('H85', (('H85', 'SILVER SPRING'),)),
+])
+HA = ('HA', 'H-ALPHA', 'HALPHA')
+FILTERS = RuleTable([
+    ('LRGB+Ha', (('LRGB',), HA)),
+    ('SII/Ha/OIII', (('SII', 'S2'), HA, ('OIII', 'O3'))),
+    ('LRGB', (('LRGB',),)),
+    ('Ha', (HA,)),
+    ('OIII', (('OIII', 'O3'),)),
+    ('SII', (('SII', 'S2'),)),
+])
+TEXT_KEYWORDS = KeywordScanner(OBSERVATORY.keywords | FILTERS.keywords)
+
+# Catalog designations in priority order (a Messier number anywhere beats an
+# earlier NGC), all four in one alternation
+DESIGNATION = re.compile(r"\b(?:M\s*(\d{1,3})|NGC\s*(\d{3,5})|IC\s*(\d{3,5})|Abell\s*(\d+))\b", re.IGNORECASE)
+DESIGNATION_FORMATS = ("M{}", "NGC {}", "IC {}", "Abell {}")
+
+
+@dataclass(frozen=True)
+class Classification:
+    category: str
+    observatory: Optional[str]
+    filters: Optional[str]
+    designation: Optional[str]
+
+
+def text_keywords(filename: str, text: str) -> int:
+    return TEXT_KEYWORDS.scan_joined(filename.upper(), text.upper())
+
+
+def detect_category(page_url: str, filename: str) -> str:
+    return CATEGORY(CATEGORY_URL.scan(page_url.lower()) | CATEGORY_FILE.scan(filename.lower()))
+
+
+def detect_observatory(filename: str, text: str) -> Optional[str]:
+    return OBSERVATORY(text_keywords(filename, text))
+
+
+def detect_filters(filename: str, text: str) -> Optional[str]:
+    return FILTERS(text_keywords(filename, text))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def extract_designation(filename: str, title: str, description: str) -> Optional[str]:
+    first: Dict[int, str] = {}
+    for match in DESIGNATION.finditer(f"{filename} {title} {description}"):
+        kind = match.lastindex - 1
+        first.setdefault(kind, match.group(match.lastindex))
+        if kind == 0:
+            break  # nothing outranks a Messier number
+    if not first:
+        return None
+    kind = min(first)
+    return DESIGNATION_FORMATS[kind].format(first[kind])
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def classify(page_url: str, filename: str, title: Optional[str], description: Optional[str]) -> Classification:
+    """All scraper metadata of one image, with each string scanned once"""
+    found = text_keywords(filename, description or title or '')
+    return Classification(
+        category=detect_category(page_url, filename),
+        observatory=OBSERVATORY(found),
+        filters=FILTERS(found),
+        designation=extract_designation(filename, title or '', description or ''),
+    )
+
+
+def classify_batch(records: Iterable[dict]) -> List[Classification]:
+    """classify() over image records (page_source, filename, title, description)"""
+    return [classify(r['page_source'], r['filename'], r.get('title'), r.get('description'))
+            for r in records]
+
+
+# --- Codegen rules (convert_to_typescript.py): filename only, case-sensitive ---
+
+CODEGEN_DESIGNATION = re.compile(r"(M|NGC|PK|SN)(\d+)", re.IGNORECASE)
+CODEGEN_DESIGNATION_FORMATS = {'M': "M{}", 'NGC': "NGC{}", 'PK': "PK {}", 'SN': "SN {}"}
+CODEGEN_FILTERS = RuleTable([
+    ('LRGB+Ha', (('LRGBHa', 'LRGB_Ha'),)),
+    ('LRGB', (('LRGB',),)),
+    ('RGB', (('RGB',),)),
+    ('L', (('_L_',),)),
+])
+CODEGEN_OBSERVATORY = RuleTable([
+    ('BBO', (('_BBO', 'BBO_', 'BBO.jpg$'),)),
+    ('H85', (('_H85', 'H85_', 'H85.jpg$'),)),
+    ('SRO', (('_SRO', 'SRO_'),)),
+])
+CODEGEN_KEYWORDS = KeywordScanner(CODEGEN_FILTERS.keywords | CODEGEN_OBSERVATORY.keywords)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def codegen_fields(filename: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """(designation, filters, observatory) of a filename, by the codegen's rules"""
+    match = CODEGEN_DESIGNATION.match(filename)
+    designation = CODEGEN_DESIGNATION_FORMATS[match.group(1).upper()].format(match.group(2)) if match else None
+    found = CODEGEN_KEYWORDS._scan(filename)  # already memoized per filename here
+    return designation, CODEGEN_FILTERS(found), CODEGEN_OBSERVATORY(found)
+
+
+def clear_caches():
+    """Forget every memoized scan and decision (for benchmarks)"""
+    for scanner in (CATEGORY_URL, CATEGORY_FILE, TEXT_KEYWORDS, CODEGEN_KEYWORDS):
+        scanner.scan.cache_clear()
+    for table in (CATEGORY, OBSERVATORY, FILTERS, CODEGEN_FILTERS, CODEGEN_OBSERVATORY):
+        table.decide.cache_clear()
+    for function in (extract_designation, classify, codegen_fields):
+        function.cache_clear()
@@ -7,10 +7,12 @@ Removes:
 """
 
 import os
-import hashlib
 from pathlib import Path
 from collections import defaultdict
 
+from hash_index import get_index
+from inventory import scan_trees
+
 # Configuration
 PROJECT_PATH = Path(r"C:\Users\Adir\Desktop\Coding\Dev\silverspringastro-2")
 PUBLIC_IMAGES_PATH = PROJECT_PATH / "public" / "images"
@@ -20,16 +22,9 @@ IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tif', '.tiff', '.
 VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.wmv', '.webm', '.mkv'}
 ALL_MEDIA = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS
 
-def get_file_hash(filepath, chunk_size=8192):
-    """Calculate MD5 hash of a file."""
-    hasher = hashlib.md5()
-    try:
-        with open(filepath, 'rb') as f:
-            while chunk := f.read(chunk_size):
-                hasher.update(chunk)
-        return hasher.hexdigest()
-    except Exception:
-        return None
+def get_file_hash(filepath):
+    """MD5 of a file, from the hash index unless the file changed since the last run."""
+    return get_index().digest(filepath)
 
 def format_size(size_bytes):
     """Format bytes to human readable string."""
@@ -47,12 +42,17 @@ def main():
     total_removed = 0
     total_saved = 0
     
+    # One walk of each tree, shared by the steps below
+    trees = scan_trees([PUBLIC_IMAGES_PATH, OLD_WEBSITE_PATH])
+    public, old = trees[PUBLIC_IMAGES_PATH], trees[OLD_WEBSITE_PATH]
+    
     # Step 1: Remove thumbnails with full versions
     print("\n[1] Removing thumbnails that have full versions...")
     
     thumbs_removed = 0
-    for filepath in PUBLIC_IMAGES_PATH.rglob('*'):
-        if not filepath.is_file() or filepath.suffix.lower() not in IMAGE_EXTENSIONS:
+    for entry in list(public.files()):
+        filepath = entry.path
+        if filepath.suffix.lower() not in IMAGE_EXTENSIONS:
             continue
         
         name_lower = filepath.stem.lower()
@@ -69,12 +69,12 @@ def main():
         parent = filepath.parent
         for ext in IMAGE_EXTENSIONS:
             full_path = parent / f"{base_name}{ext}"
-            if full_path.exists() and full_path != filepath:
-                size = filepath.stat().st_size
+            if full_path in public and full_path != filepath:
                 try:
                     filepath.unlink()
+                    public.forget(filepath)
                     thumbs_removed += 1
-                    total_saved += size
+                    total_saved += entry.size
                     print(f"  Removed: {filepath.name}")
                 except Exception as e:
                     print(f"  Error removing {filepath.name}: {e}")
@@ -84,29 +84,25 @@ def main():
     
     # Step 2: Build hash map of public/images
     print("\n[2] Building hash map of public/images...")
+    public_files = [e.path for e in public.files() if e.path.suffix.lower() in ALL_MEDIA]
     public_hashes = {}
-    for filepath in PUBLIC_IMAGES_PATH.rglob('*'):
-        if filepath.is_file() and filepath.suffix.lower() in ALL_MEDIA:
-            file_hash = get_file_hash(filepath)
-            if file_hash:
-                public_hashes[file_hash] = filepath
+    for filepath, file_hash in get_index().digest_many(public_files).items():
+        if file_hash:
+            public_hashes[file_hash] = filepath
     print(f"  Indexed {len(public_hashes)} files")
     
     # Step 3: Remove duplicates from old-website
     print("\n[3] Removing duplicates from old-website...")
     
     dups_removed = 0
-    for filepath in OLD_WEBSITE_PATH.rglob('*'):
-        if not filepath.is_file() or filepath.suffix.lower() not in ALL_MEDIA:
-            continue
-        
-        file_hash = get_file_hash(filepath)
+    old_files = [e.path for e in old.files() if e.path.suffix.lower() in ALL_MEDIA]
+    for filepath, file_hash in get_index().digest_many(old_files).items():
         if file_hash and file_hash in public_hashes:
-            size = filepath.stat().st_size
             try:
                 filepath.unlink()
                 dups_removed += 1
-                total_saved += size
+                total_saved += old.get(filepath).size
+                old.forget(filepath)
             except Exception as e:
                 pass
     
@@ -120,6 +116,7 @@ def main():
     print(f"  Duplicates removed: {dups_removed}")
     print(f"  Total files removed: {thumbs_removed + dups_removed}")
     print(f"  Space saved: {format_size(total_saved)}")
+    print(f"  Hash index: {get_index().summary()}")
 
 if __name__ == "__main__":
     main()
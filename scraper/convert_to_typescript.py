@@ -9,11 +9,12 @@ This script:
 """
 
 import json
-import re
 from pathlib import Path
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 
+import classify
+
 # Messier object catalog with names
 MESSIER_NAMES = {
     "M1": "Crab Nebula",
@@ -83,52 +84,18 @@ OBJECT_DESCRIPTIONS = {
 
 
 def extract_designation(filename: str) -> Optional[str]:
-    """Extract Messier or NGC designation from filename"""
-    # Try Messier
-    m_match = re.match(r'^M(\d+)', filename, re.IGNORECASE)
-    if m_match:
-        return f"M{m_match.group(1)}"
-    
-    # Try NGC
-    ngc_match = re.match(r'^NGC(\d+)', filename, re.IGNORECASE)
-    if ngc_match:
-        return f"NGC{ngc_match.group(1)}"
-    
-    # Try PK (planetary nebula)
-    pk_match = re.match(r'^PK(\d+)', filename, re.IGNORECASE)
-    if pk_match:
-        return f"PK {pk_match.group(1)}"
-    
-    # Try SN (supernova)
-    sn_match = re.match(r'^SN(\d+)', filename, re.IGNORECASE)
-    if sn_match:
-        return f"SN {sn_match.group(1)}"
-    
-    return None
+    """Extract Messier, NGC, PK or SN designation from filename"""
+    return classify.codegen_fields(filename)[0]
 
 
 def extract_filters(filename: str) -> Optional[str]:
     """Extract filter info from filename"""
-    if 'LRGBHa' in filename or 'LRGB_Ha' in filename:
-        return 'LRGB+Ha'
-    elif 'LRGB' in filename:
-        return 'LRGB'
-    elif 'RGB' in filename:
-        return 'RGB'
-    elif '_L_' in filename:
-        return 'L'
-    return None
+    return classify.codegen_fields(filename)[1]
 
 
 def extract_observatory(filename: str) -> Optional[str]:
     """Extract observatory code from filename"""
-    if '_BBO' in filename or 'BBO_' in filename or filename.endswith('BBO.jpg'):
-        return 'BBO'
-    elif '_H85' in filename or 'H85_' in filename or filename.endswith('H85.jpg'):
-        return 'H85'
-    elif '_SRO' in filename or 'SRO_' in filename:
-        return 'SRO'
-    return None
+    return classify.codegen_fields(filename)[2]
 
 
 def is_thumbnail(filename: str) -> bool:
@@ -166,9 +133,7 @@ def process_images(json_data: List[dict], category: str) -> List[dict]:
             continue
         seen.add(filename)
         
-        designation = extract_designation(filename)
-        filters = extract_filters(filename)
-        observatory = extract_observatory(filename)
+        designation, filters, observatory = classify.codegen_fields(filename)
         
         # Get name from catalogs
         name = None
@@ -0,0 +1,132 @@
+"""
+Append-only crawl journal (checkpoint + resume)
+
+scrape_site.py writes one JSON line per event as the crawl runs, so a crash
+or Ctrl-C only loses the requests that were in flight:
+    {"event": "page", "url": ...}                 page added to the frontier
+    {"event": "visited", "url": ..., "ok": true}  page fetched and processed
+    {"event": "image", "record": {...}}           image found (or updated by a merge)
+    {"event": "download", "url": ..., "status": "ok"}
+    {"event": "done"}                             crawl finished
+
+`python scrape_site.py --resume` replays the journal and carries on with
+the pages that were never visited.
+"""
+
+import os
+import json
+import threading
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List
+
+TAIL_CHUNK = 64 * 1024  # bytes read back at a time looking for the last newline
+
+
+@dataclass
+class JournalState:
+    """Everything a crawl had done when its journal was last written"""
+    pages: List[str] = field(default_factory=list)
+    visited: Dict[str, bool] = field(default_factory=dict)   # url -> fetched OK
+    images: Dict[str, dict] = field(default_factory=dict)    # url -> latest record
+    downloads: Dict[str, str] = field(default_factory=dict)  # url -> last status
+    done: bool = False
+
+
+class CrawlJournal:
+    def __init__(self, path: Path, resume: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        # A fresh crawl starts a fresh journal; a resumed one must not append
+        # onto the half-written line a crash left behind
+        if resume:
+            repair_tail(self.path)
+        self.file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def record(self, event: str, **data):
+        line = json.dumps({'event': event, **data})
+        with self.lock:
+            self.file.write(line + '\n')
+            self.file.flush()
+
+    def page(self, url: str):
+        self.record('page', url=url)
+
+    def visited(self, url: str, ok: bool):
+        self.record('visited', url=url, ok=ok)
+
+    def image(self, image):
+        self.record('image', record=asdict(image))
+
+    def download(self, url: str, status: str):
+        self.record('download', url=url, status=status)
+
+    def done(self):
+        self.record('done')
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def repair_tail(path: Path):
+    """Make a JSON-lines file end on a newline before it is appended to.
+
+    A crash mid-write leaves a last line without its newline. If that line
+    is a whole record (only the newline was lost) the newline is added;
+    otherwise the fragment is cut off - replay skipped it anyway.
+    """
+    path = Path(path)
+    if not path.exists():
+        return
+
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        start = end
+        while start > 0:
+            step = min(TAIL_CHUNK, start)
+            f.seek(start - step)
+            newline = f.read(step).rfind(b'\n')
+            if newline != -1:
+                start = start - step + newline + 1
+                break
+            start -= step
+        if start == end:
+            return
+
+        f.seek(start)
+        try:
+            json.loads(f.read())
+            f.write(b'\n')
+        except ValueError:
+            f.truncate(start)
+
+
+def load_journal(path: Path) -> JournalState:
+    """Replay a journal file into a JournalState"""
+    state = JournalState()
+    path = Path(path)
+    if not path.exists():
+        return state
+
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # half-written last line from a crash
+
+            event = entry['event']
+            if event == 'page':
+                state.pages.append(entry['url'])
+            elif event == 'visited':
+                state.visited[entry['url']] = entry['ok']
+            elif event == 'image':
+                state.images[entry['record']['url']] = entry['record']
+            elif event == 'download':
+                state.downloads[entry['url']] = entry['status']
+            elif event == 'done':
+                state.done = True
+
+    return state
@@ -1,12 +1,14 @@
 """
 Debug - see all images found on pages
 """
-import requests
+from http_client import get_session
 from bs4 import BeautifulSoup
 import urllib.parse
 
+session = get_session()
+
 def get_page(url):
-    r = requests.get(url, timeout=30)
+    r = session.get(url, timeout=30)
     return BeautifulSoup(r.content, 'html.parser')
 
 def find_all_images(soup, base_url):
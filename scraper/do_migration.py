@@ -7,10 +7,12 @@ Run this after reviewing what migrate_old_site.py found.
 import os
 import sys
 import shutil
-import hashlib
 from pathlib import Path
 from collections import defaultdict
 
+from hash_index import get_index
+from inventory import scan_trees
+
 # Import config from main script
 sys.path.insert(0, str(Path(__file__).parent))
 from migrate_old_site import (
@@ -42,8 +44,9 @@ def copy_images(images_by_category, existing_hashes, existing_names):
         print(f"\n[COPY] {category} ({len(image_paths)} images)")
         
         copied_this_cat = 0
+        hashes = get_index().digest_many(image_paths)
         for img_path in image_paths:
-            file_hash = get_file_hash(img_path)
+            file_hash = hashes[img_path]
             file_name = img_path.name.lower()
             
             # Check for duplicate by hash
@@ -78,6 +81,9 @@ def main():
     print("COPYING ASTRONOMY IMAGES TO NEW SITE")
     print("="*60)
     
+    # Walk the new site and every old-site folder once, in parallel
+    scan_trees([NEW_IMAGES_PATH] + [OLD_SITE_BASE / f for f in OLD_WEBSITE_FOLDERS])
+    
     # Scan existing images
     print("\n[1] Scanning existing images...")
     existing_hashes, existing_names = scan_existing_images(NEW_IMAGES_PATH)
@@ -98,6 +104,7 @@ def main():
     print(f"  Skipped (duplicate hash): {stats['duplicates_hash']}")
     print(f"  Skipped (duplicate name): {stats['duplicates_name']}")
     print(f"  Errors: {stats['errors']}")
+    print(f"  Hash index: {get_index().summary()}")
     
     # Summary of what's left for admin panel
     print("\n[INFO] Travel/family photos were NOT copied.")
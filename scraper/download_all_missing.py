@@ -1,19 +1,22 @@
 """
 Download all missing images from silverspringastro.com
 """
-import requests
+from http_client import get_session
+from downloads import download_file
 from bs4 import BeautifulSoup
 from pathlib import Path
 import sys
 import urllib.parse
 
+session = get_session()
+
 if sys.stdout.encoding != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8')
 
 def get_page(url):
     """Fetch a page and return soup."""
     try:
-        r = requests.get(url, timeout=30)
+        r = session.get(url, timeout=30)
         r.raise_for_status()
         return BeautifulSoup(r.content, 'html.parser')
     except Exception as e:
@@ -48,21 +51,16 @@ def download_image(url, output_dir):
     filename = urllib.parse.unquote(filename)
     output_path = output_dir / filename
     
-    if output_path.exists():
+    result = download_file(session, url, output_path, timeout=30)
+    if result.status == 'skipped':
         print(f"    [SKIP] {filename}")
         return filename
-    
-    try:
-        r = requests.get(url, timeout=30)
-        r.raise_for_status()
-        with open(output_path, 'wb') as f:
-            f.write(r.content)
+    if result.ok:
         size_kb = output_path.stat().st_size / 1024
         print(f"    [OK] {filename} ({size_kb:.1f} KB)")
         return filename
-    except Exception as e:
-        print(f"    [FAIL] {filename}: {e}")
-        return None
+    print(f"    [FAIL] {filename}: {result.error}")
+    return None
 
 def process_page(url, output_folder):
     """Process a page and download all images."""
@@ -1,29 +1,36 @@
 """
 Download galaxy clusters and star clusters images
+
+Only the full-size file is fetched; the thumbnail is a fallback for images
+whose full version is missing (cleanup_duplicates.py would delete it anyway).
 """
-import requests
 from pathlib import Path
 import sys
 
+from http_client import get_session
+from downloads import download_file
+
+session = get_session()
+
 if sys.stdout.encoding != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8')
 
 def download(url, output_path):
     """Download a file."""
-    if output_path.exists():
+    result = download_file(session, url, output_path, timeout=30)
+    if result.status == 'skipped':
         print(f"  [SKIP] {output_path.name}")
-        return True
-    try:
-        r = requests.get(url, timeout=30)
-        r.raise_for_status()
-        with open(output_path, 'wb') as f:
-            f.write(r.content)
+    elif result.ok:
         size_kb = output_path.stat().st_size / 1024
         print(f"  [OK] {output_path.name} ({size_kb:.1f} KB)")
-        return True
-    except Exception as e:
-        print(f"  [FAIL] {output_path.name}: {e}")
-        return False
+    else:
+        print(f"  [FAIL] {output_path.name}: {result.error}")
+    return result.ok
+
+def download_variant(base, img, output_dir):
+    """Download the full-size image, or its thumbnail if there is no full version."""
+    if not download(f"{base}/{img}.jpg", output_dir / f"{img}.jpg"):
+        download(f"{base}/{img}_thumb.jpg", output_dir / f"{img}_thumb.jpg")
 
 # Galaxy Clusters
 gc_base = "http://www.silverspringastro.com/galaxyclusters/images"
@@ -57,14 +64,7 @@ gc_dir = Path("public/images/galaxy-clusters")
 gc_dir.mkdir(parents=True, exist_ok=True)
 
 for img in gc_images:
-    # Try full size first
-    full_url = f"{gc_base}/{img}.jpg"
-    thumb_url = f"{gc_base}/{img}_thumb.jpg"
-    
-    # Download full size
-    download(full_url, gc_dir / f"{img}.jpg")
-    # Download thumbnail
-    download(thumb_url, gc_dir / f"{img}_thumb.jpg")
+    download_variant(gc_base, img, gc_dir)
 
 # Star Clusters
 print("\n=== Star Clusters ===")
@@ -72,11 +72,7 @@ sc_dir = Path("public/images/star-clusters")
 sc_dir.mkdir(parents=True, exist_ok=True)
 
 for img in sc_images:
-    full_url = f"{sc_base}/{img}.jpg"
-    thumb_url = f"{sc_base}/{img}_thumb.jpg"
-    
-    download(full_url, sc_dir / f"{img}.jpg")
-    download(thumb_url, sc_dir / f"{img}_thumb.jpg")
+    download_variant(sc_base, img, sc_dir)
 
 print("\n" + "=" * 60)
 print("Done!")
@@ -7,35 +7,26 @@ Also downloads the Ken Levin hero image.
 
 import os
 import re
-import requests
 from pathlib import Path
 from urllib.parse import urljoin
 
+from downloads import download_file
+from http_client import get_session
+
 BASE_URL = "https://silverspringastro.com"
 OUTPUT_DIR = Path("../public/images")
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-}
 
-session = requests.Session()
-session.headers.update(HEADERS)
+session = get_session()
 
 def download_image(url: str, output_path: Path) -> bool:
-    """Download a single image"""
-    try:
-        response = session.get(url, timeout=60)
-        response.raise_for_status()
-        
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
-        
-        size_kb = len(response.content) / 1024
+    """Download a single image, replacing any copy already there"""
+    result = download_file(session, url, output_path, overwrite=True)
+    if result.ok:
+        size_kb = output_path.stat().st_size / 1024
         print(f"  [OK] Downloaded: {output_path.name} ({size_kb:.1f} KB)")
-        return True
-    except Exception as e:
-        print(f"  [FAIL] Failed: {url} - {e}")
-        return False
+    else:
+        print(f"  [FAIL] Failed: {url} - {result.error}")
+    return result.ok
 
 def download_hero_images():
     """Download the Ken Levin hero images from the home page"""
@@ -2,10 +2,14 @@
 Download missing images from silverspringastro.com
 Galaxy Clusters and Star Clusters
 """
-import requests
 from pathlib import Path
 import sys
 
+from http_client import get_session
+from downloads import download_file
+
+session = get_session()
+
 if sys.stdout.encoding != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8')
 
@@ -39,20 +43,14 @@ def download_image(filename: str, category: str):
         print(f"  [SKIP] {filename} already exists")
         return True
     
-    try:
-        print(f"  Downloading {filename}...")
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
-        
+    print(f"  Downloading {filename}...")
+    result = download_file(session, url, output_path, timeout=30)
+    if result.ok:
         size_kb = output_path.stat().st_size / 1024
         print(f"  [OK] {filename} ({size_kb:.1f} KB)")
-        return True
-    except Exception as e:
-        print(f"  [FAIL] {filename}: {e}")
-        return False
+    else:
+        print(f"  [FAIL] {filename}: {result.error}")
+    return result.ok
 
 def main():
     print("=" * 60)
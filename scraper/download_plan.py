@@ -0,0 +1,68 @@
+"""
+Thumbnail-aware download planning
+
+The old site shows most pictures as a thumbnail (*_thumb.jpg) wrapped in a
+link to the full-size file. Fetching both wastes the thumbnail bytes:
+cleanup_duplicates.py deletes every thumbnail that has a full version.
+So only the variant we keep is downloaded:
+1. During extraction, linked_image() resolves <a href="X.jpg"><img
+   src="X_thumb.jpg"></a> - the record becomes the full image, with the
+   thumbnail kept in ScrapedImage.thumbnail_url
+2. plan_downloads() turns records into download jobs and drops any
+   thumbnail whose full version is planned as well - known from a recorded
+   pair, or by name (X_thumb.jpg next to X.jpg in the same folder)
+
+Usage:
+    jobs, skipped = plan_downloads(scraper.images, OUTPUT_DIR)
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from url_utils import canonical_url, url_key
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+# Thumbnail names on the old site: M51_LRGB_H85_thumb.jpg, ..._small.jpg, ..._tn.jpg
+THUMB_SUFFIX = re.compile(r'(?:_thumb|_small|_tn)$', re.IGNORECASE)
+
+
+def linked_image(href: Optional[str], page_url: str) -> Optional[str]:
+    """Canonical URL of the image a link points to, or None if it isn't an image"""
+    if not href:
+        return None
+    url = canonical_url(href, page_url)
+    if not urlparse(url).path.lower().endswith(IMAGE_EXTENSIONS):
+        return None
+    return url
+
+
+def full_variant(local_path: str) -> Optional[Tuple[str, str]]:
+    """(folder, lowercase stem) of the full-size file a thumbnail path stands for"""
+    folder, name = os.path.split(local_path)
+    stem = os.path.splitext(name)[0]
+    full = THUMB_SUFFIX.sub('', stem)
+    if full == stem:
+        return None
+    return folder.lower(), full.lower()
+
+
+def plan_downloads(images: Iterable, output_dir: Path) -> Tuple[List[Tuple[str, Path]], int]:
+    """(url, path) jobs for the variants we keep; returns (jobs, thumbnails skipped)"""
+    images = list(images)
+    # Thumbnails already covered by a full-size record
+    covered = {url_key(image.thumbnail_url) for image in images if image.thumbnail_url}
+    planned = {(os.path.dirname(image.local_path).lower(), os.path.splitext(image.filename)[0].lower())
+               for image in images}
+
+    jobs = []
+    skipped = 0
+    for image in images:
+        full = full_variant(image.local_path)
+        if url_key(image.url) in covered or (full and full in planned):
+            skipped += 1
+            continue
+        jobs.append((image.url, output_dir / image.local_path))
+    return jobs, skipped
@@ -0,0 +1,102 @@
+"""
+Parallel download scheduler
+
+Runs download_file() jobs on a worker pool:
+1. Files that already exist are skipped up front (no request, no sleep)
+2. A thread pool runs the remaining downloads
+3. A per-host RateController caps (and adapts) concurrent connections
+   to one server, and optionally its bytes/second
+4. Live progress shows files/s, MB/s and an ETA
+
+Usage:
+    scheduler = DownloadScheduler(session, workers=8, per_host=4)
+    results = scheduler.run([(url, output_path), ...])
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from downloads import download_file, DownloadResult
+from rate_control import RateController
+
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 4
+
+
+def format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class ThroughputReporter:
+    """Thread-safe progress counter that prints one line per finished file"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def report(self, result: DownloadResult):
+        with self.lock:
+            self.done += 1
+            self.bytes += result.bytes
+            elapsed = max(time.monotonic() - self.started, 1e-6)
+            files_per_sec = self.done / elapsed
+            mb_per_sec = self.bytes / elapsed / (1024 * 1024)
+            eta = (self.total - self.done) / files_per_sec if files_per_sec else 0
+
+            label = result.status.upper()
+            detail = f" ({result.bytes / 1024:.1f} KB)" if result.bytes else ""
+            if result.error:
+                detail = f": {result.error}"
+            print(f"  [{self.done}/{self.total}] {label} {result.path.name}{detail}"
+                  f"  | {files_per_sec:.1f} files/s, {mb_per_sec:.2f} MB/s, ETA {format_eta(eta)}")
+
+
+class DownloadScheduler:
+    def __init__(self, session, workers: int = DEFAULT_WORKERS, per_host: int = DEFAULT_PER_HOST,
+                 timeout: int = 60, rate: Optional[RateController] = None):
+        self.session = session
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.rate = rate or RateController(max_concurrency=max(1, per_host))
+
+    def download(self, url: str, output_path: Path) -> DownloadResult:
+        return download_file(self.session, url, output_path, timeout=self.timeout, rate=self.rate)
+
+    def run(self, jobs: List[Tuple[str, Path]],
+            on_result: Optional[Callable[[DownloadResult], None]] = None) -> List[DownloadResult]:
+        """Download every (url, output_path) job; returns results in job order.
+        
+        on_result (if given) is called from this thread as each download finishes.
+        """
+        results = [None] * len(jobs)
+        pending = []
+        for i, (url, output_path) in enumerate(jobs):
+            if Path(output_path).exists():
+                results[i] = DownloadResult(url, Path(output_path), 'skipped')
+            else:
+                pending.append(i)
+
+        skipped = len(jobs) - len(pending)
+        if skipped:
+            print(f"  Skipping {skipped} files that already exist")
+        if not pending:
+            return results
+
+        reporter = ThroughputReporter(len(pending))
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.download, *jobs[i]): i for i in pending}
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                reporter.report(results[i])
+                if on_result:
+                    on_result(results[i])
+
+        return results
@@ -0,0 +1,169 @@
+"""
+Streaming, resumable file downloads
+
+Used by every image downloader instead of writing response.content:
+1. The body is streamed in chunks to "<name>.part" (memory stays flat)
+2. An existing .part file is resumed with an HTTP Range request
+3. The .part file is renamed over the real name only once it's complete,
+   so an existing output file is always a whole file; existing files are
+   skipped unless overwrite=True, and then only replaced once the new copy
+   is complete
+4. Replacing a file (overwrite=True) from a CachingSession revalidates it
+   first: the validators stored with the file are sent, and a 304 keeps it
+5. Anything over max_bytes is abandoned
+6. With a RateController, the request holds one of the host's slots and
+   the body is paced by its bytes/second token bucket
+7. Transient failures are retried (resuming the .part file) by the shared
+   retry.Retrier; downloads that still fail go to failed_downloads.jsonl
+
+Usage:
+    from downloads import download_file
+    result = download_file(session, url, Path("out/M51.jpg"))
+    if result.ok: ...
+"""
+
+import os
+import re
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from http_cache import conditional_headers
+from rate_control import SlotOutcome, retry_after_seconds
+from retry import Retrier, CircuitOpen, RETRYABLE_STATUS, get_retrier, failed_downloads
+
+CHUNK_SIZE = 64 * 1024
+MAX_BYTES = 100 * 1024 * 1024  # no image on the old site comes close
+PART_SUFFIX = '.part'
+
+# Ask for the raw bytes - byte ranges of a gzip stream can't be resumed
+DOWNLOAD_HEADERS = {'Accept-Encoding': 'identity'}
+
+
+class TooLarge(Exception):
+    pass
+
+
+@dataclass
+class DownloadResult:
+    url: str
+    path: Path
+    status: str              # 'ok', 'resumed', 'skipped', 'too-large' or 'failed'
+    bytes: int = 0           # bytes transferred by this call
+    error: Optional[str] = None
+    http_status: Optional[int] = None
+    retry_after: Optional[float] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ('ok', 'resumed', 'skipped')
+
+
+def part_path(output_path: Path) -> Path:
+    return output_path.with_name(output_path.name + PART_SUFFIX)
+
+
+def range_complete(response, offset: int) -> bool:
+    """For a 416 answer: does the .part file already hold the whole body?"""
+    match = re.match(r'bytes \*/(\d+)', response.headers.get('Content-Range', ''))
+    return bool(match) and int(match.group(1)) == offset
+
+
+def download_retryable(result: DownloadResult) -> bool:
+    """Failed on the network side - no answer, a cut-off body or a retryable status?"""
+    status = result.http_status
+    return result.status == 'failed' and (status is None or status < 400 or status in RETRYABLE_STATUS)
+
+
+def download_file(session, url: str, output_path: Path, timeout: int = 60,
+                  max_bytes: int = MAX_BYTES, chunk_size: int = CHUNK_SIZE,
+                  rate=None, retry: Optional[Retrier] = None, overwrite: bool = False) -> DownloadResult:
+    """Stream a URL to output_path, retrying transient failures"""
+    retry = retry or get_retrier()
+    try:
+        result = retry.call(
+            url, lambda: download_once(session, url, output_path, timeout, max_bytes, chunk_size, rate, overwrite),
+            retryable=download_retryable, retry_after=lambda r: r.retry_after)
+    except CircuitOpen as e:
+        result = DownloadResult(url, Path(output_path), 'failed', error=str(e))
+
+    if result.status == 'failed':
+        failed_downloads.record(url, output_path, result.error)
+    return result
+
+
+def download_once(session, url: str, output_path: Path, timeout: int = 60,
+                  max_bytes: int = MAX_BYTES, chunk_size: int = CHUNK_SIZE,
+                  rate=None, overwrite: bool = False) -> DownloadResult:
+    """One attempt: stream a URL to output_path, resuming a previous partial download"""
+    output_path = Path(output_path)
+    if output_path.exists() and not overwrite:
+        return DownloadResult(url, output_path, 'skipped')
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    part = part_path(output_path)
+    offset = part.stat().st_size if part.exists() else 0
+
+    cache = getattr(session, 'cache', None)  # http_cache.HttpCache of a CachingSession
+    headers = dict(DOWNLOAD_HEADERS)
+    if offset:
+        headers['Range'] = f"bytes={offset}-"
+    elif cache and output_path.exists():
+        meta = cache.load_file(url, output_path)
+        if meta:
+            headers.update(conditional_headers(meta))
+
+    written = 0
+    http_status = retry_after = None
+    stale_part = not_modified = False
+    try:
+        with rate.slot(url) if rate else nullcontext(SlotOutcome()) as slot, \
+                session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+            http_status = slot.status = response.status_code
+            slot.latency = response.elapsed.total_seconds()
+            retry_after = slot.retry_after = retry_after_seconds(response)
+
+            if offset and response.status_code == 416:
+                stale_part = not range_complete(response, offset)
+            elif response.status_code == 304:
+                not_modified = True  # the file we have is still current
+            else:
+                response.raise_for_status()
+
+                # Server ignored the Range header - start from scratch
+                if response.status_code != 206:
+                    offset = 0
+
+                length = response.headers.get('Content-Length')
+                if length and length.isdigit() and offset + int(length) > max_bytes:
+                    raise TooLarge(f"{offset + int(length)} bytes")
+
+                with open(part, 'ab' if offset else 'wb') as f:
+                    for chunk in response.iter_content(chunk_size):
+                        written += len(chunk)
+                        if offset + written > max_bytes:
+                            raise TooLarge(f"over {max_bytes} bytes")
+                        if rate:
+                            rate.throttle(url, len(chunk))
+                        f.write(chunk)
+
+        if stale_part:
+            # Stale partial file - throw it away and start over
+            part.unlink()
+            return download_once(session, url, output_path, timeout, max_bytes, chunk_size, rate, overwrite)
+        if not_modified:
+            return DownloadResult(url, output_path, 'skipped', http_status=http_status)
+
+        os.replace(part, output_path)
+        if cache and ('ETag' in response.headers or 'Last-Modified' in response.headers):
+            cache.store_file(url, response, output_path)
+        return DownloadResult(url, output_path, 'resumed' if offset else 'ok', written,
+                              http_status=http_status)
+
+    except TooLarge as e:
+        part.unlink(missing_ok=True)
+        return DownloadResult(url, output_path, 'too-large', written, str(e), http_status)
+    except Exception as e:
+        # Keep the .part file so the next run can resume it
+        return DownloadResult(url, output_path, 'failed', written, str(e), http_status, retry_after)
@@ -4,6 +4,10 @@ Find and remove duplicate images/videos in the project.
 Identifies duplicates by:
 1. File hash (exact duplicates)
 2. Similar filenames (e.g., image.jpg and image_thumb.jpg)
+3. Perceptual hash (re-encoded / resized copies, see perceptual_hash.py) -
+   old-website copies that directly match a public/images picture are
+   offered for removal behind a second confirmation; the groups themselves
+   are reported for review
 """
 
 import os
@@ -12,6 +16,9 @@ from pathlib import Path
 from collections import defaultdict
 import shutil
 
+from hash_index import get_index
+from inventory import get_tree, scan_trees
+
 # Configuration
 PROJECT_PATH = Path(r"C:\Users\Adir\Desktop\Coding\Dev\silverspringastro-2")
 PUBLIC_IMAGES_PATH = PROJECT_PATH / "public" / "images"
@@ -22,16 +29,12 @@ IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tif', '.tiff', '.
 VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.wmv', '.webm', '.mkv'}
 ALL_MEDIA = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS
 
-def get_file_hash(filepath, chunk_size=8192):
-    """Calculate MD5 hash of a file."""
-    hasher = hashlib.md5()
-    try:
-        with open(filepath, 'rb') as f:
-            while chunk := f.read(chunk_size):
-                hasher.update(chunk)
-        return hasher.hexdigest()
-    except Exception:
-        return None
+# Bytes read from each end of a file for the partial hash
+PARTIAL_BYTES = 64 * 1024
+
+def get_file_hash(filepath):
+    """MD5 of a file, from the hash index unless the file changed since the last run."""
+    return get_index().digest(filepath)
 
 def format_size(size_bytes):
     """Format bytes to human readable string."""
@@ -42,31 +45,59 @@ def format_size(size_bytes):
     return f"{size_bytes:.1f} TB"
 
 def find_all_media(base_path):
-    """Find all media files in a directory."""
-    files = []
-    if not base_path.exists():
-        return files
-    
-    for filepath in base_path.rglob('*'):
-        if filepath.is_file() and filepath.suffix.lower() in ALL_MEDIA:
-            files.append(filepath)
-    return files
+    """Find all media files in a directory, as inventory entries (path, size, mtime)."""
+    return [entry for entry in get_tree(base_path).files() if entry.path.suffix.lower() in ALL_MEDIA]
+
+def get_partial_hash(filepath, size):
+    """MD5 of the first and last PARTIAL_BYTES of a file - cheap pre-filter for the full hash."""
+    hasher = hashlib.md5()
+    try:
+        with open(filepath, 'rb') as f:
+            hasher.update(f.read(PARTIAL_BYTES))
+            f.seek(size - PARTIAL_BYTES)
+            hasher.update(f.read(PARTIAL_BYTES))
+        return hasher.hexdigest()
+    except Exception:
+        return None
+
+def collisions(groups):
+    """Only the groups with more than one file."""
+    return {key: paths for key, paths in groups.items() if len(paths) > 1}
 
 def find_duplicates_by_hash(files):
-    """Find exact duplicates by file hash."""
-    hash_to_files = defaultdict(list)
+    """Find exact duplicates by file hash among inventory entries.
     
-    print("  Calculating file hashes...")
-    for i, filepath in enumerate(files):
-        if (i + 1) % 100 == 0:
-            print(f"    Processed {i + 1}/{len(files)} files...")
-        
-        file_hash = get_file_hash(filepath)
+    Staged so that I/O scales with the duplicates, not the total bytes:
+    1. Group by size (from the inventory walk) - a file with a unique size has no duplicate
+    2. Hash the first and last 64 KB of each size collision
+    3. Full hash (via the hash index) only what still collides
+    """
+    by_size = defaultdict(list)
+    for entry in files:
+        by_size[entry.size].append(entry.path)
+    candidates = collisions(by_size)
+    print(f"  Size collisions: {sum(map(len, candidates.values()))} of {len(files)} files")
+    
+    by_partial = defaultdict(list)
+    for size, group in candidates.items():
+        for filepath in group:
+            # Small files are read whole by the full hash anyway
+            partial = get_partial_hash(filepath, size) if size > 2 * PARTIAL_BYTES else ''
+            if partial is not None:
+                by_partial[(size, partial)].append(filepath)
+    candidates = collisions(by_partial)
+    print(f"  Partial hash collisions: {sum(map(len, candidates.values()))} files")
+    
+    hash_to_files = defaultdict(list)
+    print("  Calculating full hashes...")
+    digests = get_index().digest_many(p for group in candidates.values() for p in group)
+    for filepath, file_hash in digests.items():
         if file_hash:
             hash_to_files[file_hash].append(filepath)
+    print(f"    {get_index().summary()}")
     
     # Return only groups with duplicates
-    return {h: paths for h, paths in hash_to_files.items() if len(paths) > 1}
+    return collisions(hash_to_files)
 
 def find_thumbnail_pairs(files):
     """Find files that have both full and thumbnail versions."""
@@ -90,6 +121,9 @@ def analyze_duplicates():
     print("DUPLICATE FILE FINDER")
     print("=" * 60)
     
+    # Walk both trees once, in parallel; every step below reads the result
+    scan_trees([PUBLIC_IMAGES_PATH, OLD_WEBSITE_PATH])
+    
     # Scan public images
     print("\n[1] Scanning public/images folder...")
     public_files = find_all_media(PUBLIC_IMAGES_PATH)
@@ -101,6 +135,7 @@ def analyze_duplicates():
     print(f"    Found {len(old_files)} media files")
     
     all_files = public_files + old_files
+    sizes = {entry.path: entry.size for entry in all_files}
     print(f"\n    TOTAL: {len(all_files)} media files")
     
     # Find exact duplicates
@@ -118,11 +153,11 @@ def analyze_duplicates():
             keep = paths[0]
             remove = paths[1:]
             
-            waste = sum(p.stat().st_size for p in remove)
+            waste = sum(sizes[p] for p in remove)
             total_waste += waste
             
             for r in remove:
-                dup_list.append((r, keep, r.stat().st_size))
+                dup_list.append((r, keep, sizes[r]))
         
         print(f"\n    Potential space savings: {format_size(total_waste)}")
         
@@ -145,11 +180,10 @@ def find_thumbs_in_public():
     print("\n[4] Finding thumbnail files that can be removed...")
     
     thumbs_to_remove = []
+    public = get_tree(PUBLIC_IMAGES_PATH)
     
-    for filepath in PUBLIC_IMAGES_PATH.rglob('*'):
-        if not filepath.is_file():
-            continue
-        
+    for entry in public.files():
+        filepath = entry.path
         name_lower = filepath.stem.lower()
         
         # Check if this is a thumbnail
@@ -165,17 +199,17 @@ def find_thumbs_in_public():
             parent = filepath.parent
             for ext in IMAGE_EXTENSIONS:
                 full_path = parent / f"{base_name}{ext}"
-                if full_path.exists() and full_path != filepath:
-                    thumbs_to_remove.append((filepath, full_path))
+                if full_path in public and full_path != filepath:
+                    thumbs_to_remove.append((filepath, full_path, entry.size))
                     break
     
     if thumbs_to_remove:
-        total_size = sum(t[0].stat().st_size for t in thumbs_to_remove)
+        total_size = sum(t[2] for t in thumbs_to_remove)
         print(f"    Found {len(thumbs_to_remove)} thumbnail files with full versions")
         print(f"    Potential space savings: {format_size(total_size)}")
         
         print("\n    Thumbnails that can be removed:")
-        for thumb, full in thumbs_to_remove[:20]:
+        for thumb, full, size in thumbs_to_remove[:20]:
             print(f"      - {thumb.relative_to(PROJECT_PATH)}")
         if len(thumbs_to_remove) > 20:
             print(f"      ... and {len(thumbs_to_remove) - 20} more")
@@ -184,7 +218,73 @@ def find_thumbs_in_public():
     
     return thumbs_to_remove
 
-def cleanup_duplicates(dup_list, thumbs_list, dry_run=True):
+def find_near_duplicates(dup_list, thumbs_list):
+    """Find re-encoded or resized copies (same picture, different bytes)."""
+    print("\n[5] Finding near-duplicates (re-encoded / resized copies)...")
+    try:
+        # Imported here so the exact checks need nothing beyond the stdlib
+        from perceptual_hash import near_duplicate_groups
+    except ImportError:
+        print("    Skipped - needs numpy and Pillow (pip install -r requirements.txt)")
+        return [], []
+    
+    # Files already handled as exact duplicates or thumbnails
+    handled = {d[0] for d in dup_list} | {t[0] for t in thumbs_list}
+    images = [entry.path for entry in find_all_media(PUBLIC_IMAGES_PATH) + find_all_media(OLD_WEBSITE_PATH)
+              if entry.path.suffix.lower() in IMAGE_EXTENSIONS and entry.path not in handled]
+    
+    groups = near_duplicate_groups(images)
+    if not groups:
+        print("    No near-duplicates found.")
+        return [], []
+    
+    print(f"    Found {len(groups)} groups of near-duplicates ({get_index().summary()})")
+    print("    Review them by hand:")
+    for in_old in (False, True):
+        matching = [g for g in groups if any('old-website' in str(p) for p in g) == in_old]
+        if not matching:
+            continue
+        print(f"\n    {'Involving old-website' if in_old else 'Only in public/images'} ({len(matching)} groups):")
+        for i, group in enumerate(matching[:20]):
+            print(f"      {i+1}. " + "\n         ".join(str(p.relative_to(PROJECT_PATH)) for p in group))
+        if len(matching) > 20:
+            print(f"      ... and {len(matching) - 20} more")
+    
+    sizes = {entry.path: entry.size for entry in find_all_media(OLD_WEBSITE_PATH)}
+    near_list = near_duplicate_removals(groups, sizes)
+    if near_list:
+        print(f"\n    {len(near_list)} old-website copies match a public/images picture directly")
+        print("    (offered for removal, behind their own confirmation)")
+    
+    return groups, near_list
+
+def near_duplicate_removals(groups, sizes):
+    """(copy, keep, size) for each old-website image in a near-duplicate group
+    that matches one of the group's public/images files directly.
+    
+    A perceptual match is not proof (different filter shots of one field can
+    match), and groups are chained A~B~C with C possibly far from A - so only
+    direct matches against a kept public copy are listed, and the caller
+    still has to ask before deleting them. Groups without a public/images
+    file are left for review: there is nothing to say which copy to keep.
+    """
+    from perceptual_hash import is_match, perceptual_hashes
+    
+    near_list = []
+    for group in groups:
+        public = [p for p in group if 'old-website' not in str(p)]
+        if not public:
+            continue
+        hashes = perceptual_hashes(group)  # cached in the hash index by now
+        for path in group:
+            if path in public or path not in hashes:
+                continue
+            keep = next((p for p in public if p in hashes and is_match(hashes[path], hashes[p])), None)
+            if keep is not None:
+                near_list.append((path, keep, sizes[path]))
+    return near_list
+
+def cleanup_duplicates(dup_list, thumbs_list, dry_run=True, near_list=()):
     """Remove duplicate files."""
     action = "Would remove" if dry_run else "Removing"
     total_saved = 0
@@ -202,8 +302,7 @@ def cleanup_duplicates(dup_list, thumbs_list, dry_run=True):
                     print(f"    Error: {e}")
     
     # Remove thumbnails
-    for thumb_path, full_path in thumbs_list:
-        size = thumb_path.stat().st_size
+    for thumb_path, full_path, size in thumbs_list:
         print(f"  {action}: {thumb_path.name} (has full version)")
         if not dry_run:
             try:
@@ -212,26 +311,40 @@ def cleanup_duplicates(dup_list, thumbs_list, dry_run=True):
             except Exception as e:
                 print(f"    Error: {e}")
     
+    # Remove near-duplicates (only ever old-website copies, see near_duplicate_removals)
+    for copy_path, keep_path, size in near_list:
+        print(f"  {action}: {copy_path.name} (near-duplicate of {keep_path.name})")
+        if not dry_run:
+            try:
+                copy_path.unlink()
+                total_saved += size
+            except Exception as e:
+                print(f"    Error: {e}")
+    
     return total_saved
 
 def main():
     # Find duplicates
     dup_list = analyze_duplicates()
     thumbs_list = find_thumbs_in_public()
+    near_groups, near_list = find_near_duplicates(dup_list, thumbs_list)
     
-    if not dup_list and not thumbs_list:
+    if not dup_list and not thumbs_list and not near_list:
         print("\n✓ No duplicates or removable thumbnails found!")
         return
     
     # Calculate total potential savings
     dup_size = sum(d[2] for d in dup_list if 'old-website' in str(d[0]))
-    thumb_size = sum(t[0].stat().st_size for t in thumbs_list)
+    thumb_size = sum(t[2] for t in thumbs_list)
     total_potential = dup_size + thumb_size
     
     print("\n" + "=" * 60)
     print("SUMMARY")
     print("=" * 60)
     print(f"  Exact duplicates (in old-website): {len([d for d in dup_list if 'old-website' in str(d[0])])}")
+    print(f"  Near-duplicate groups to review by hand: {len(near_groups)}")
+    print(f"  Near-duplicate copies (in old-website): {len(near_list)} "
+          f"({format_size(sum(n[2] for n in near_list))}, removed only after a second confirmation)")
     print(f"  Removable thumbnails: {len(thumbs_list)}")
     print(f"  Potential space savings: {format_size(total_potential)}")
     
@@ -247,17 +360,22 @@ def main():
     except EOFError:
         # Non-interactive mode - just do dry run
         print("\n[DRY RUN - Non-interactive mode]")
-        cleanup_duplicates(dup_list, thumbs_list, dry_run=True)
+        cleanup_duplicates(dup_list, thumbs_list, dry_run=True, near_list=near_list)
         return
     
     if choice == '1':
         print("\n[DRY RUN]")
-        cleanup_duplicates(dup_list, thumbs_list, dry_run=True)
+        cleanup_duplicates(dup_list, thumbs_list, dry_run=True, near_list=near_list)
     elif choice == '2':
         confirm = input("\nThis will DELETE files. Type 'DELETE' to confirm: ").strip()
         if confirm == 'DELETE':
+            near = []
+            if near_list:
+                print(f"\n{len(near_list)} near-duplicate copies match by picture, not by bytes - check them in the dry run first.")
+                if input("Type 'NEAR' to remove them too (anything else keeps them): ").strip() == 'NEAR':
+                    near = near_list
             print("\n[REMOVING DUPLICATES]")
-            saved = cleanup_duplicates(dup_list, thumbs_list, dry_run=False)
+            saved = cleanup_duplicates(dup_list, thumbs_list, dry_run=False, near_list=near)
             print(f"\nSaved {format_size(saved)} of disk space!")
         else:
             print("Cancelled.")
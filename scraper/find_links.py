@@ -1,9 +1,11 @@
-import requests
+from http_client import get_session
 from bs4 import BeautifulSoup
 
+session = get_session()
+
 BASE = "https://silverspringastro.com"
 
-r = requests.get(f"{BASE}/index.html", timeout=30)
+r = session.get(f"{BASE}/index.html", timeout=30)
 soup = BeautifulSoup(r.content, 'html.parser')
 
 print("=== All Links ===")
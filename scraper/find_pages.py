@@ -1,4 +1,8 @@
-import requests
+from http_client import get_session
+from url_probe import UrlProber
+from url_utils import canonical_url
+
+prober = UrlProber(get_session())
 
 BASE = "https://silverspringastro.com"
 
@@ -24,12 +28,12 @@ urls = [
     "Nebulae.htm",
 ]
 
+# One concurrent batch; known 404s and case variants cost no requests
+results = prober.probe(f"{BASE}/{u}" for u in urls)
 for u in urls:
-    try:
-        r = requests.head(f"{BASE}/{u}", timeout=5)
-        print(f"{u}: {r.status_code}")
-    except Exception as e:
-        print(f"{u}: ERROR - {e}")
-
-
-
+    result = results[canonical_url(f"{BASE}/{u}")]
+    if result.status is None:
+        print(f"{u}: ERROR")
+    else:
+        print(f"{u}: {result.status}{' (cached)' if result.cached else ''}")
+print(f"\n{prober.requests} requests for {len(urls)} URLs")
@@ -0,0 +1,186 @@
+"""
+Persistent, leased crawl frontier for sharded crawls
+
+Several worker processes - on one machine or several sharing a folder -
+crawl from one SQLite database:
+1. FrontierStore keeps every page ever seen (keyed by url_key) with its
+   state: pending -> leased -> done / failed
+2. claim() hands a worker a batch of pending pages under a time-limited
+   lease; pages leased by a worker that died are handed out again once
+   the lease expires - up to MAX_ATTEMPTS times, then the page is marked
+   failed, so a page that kills every worker can't stall the crawl
+3. SeenFilter answers "has this URL been seen?" with a Bloom filter in
+   front of the exact store - about 1.8 MB per million URLs instead of a
+   set of strings, and repeats cost a shared read instead of a write lock
+
+Usage:
+    store = FrontierStore(Path("shard/frontier.sqlite"))
+    store.add(["https://silverspringastro.com/home.htm"])
+    for key, url in store.claim("worker-1", 8): ...
+    store.complete(key, ok=True, owner="worker-1")
+"""
+
+import math
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from url_utils import canonical_url, url_key
+
+LEASE_SECONDS = 300
+BUSY_TIMEOUT = 60  # seconds to wait for another worker's write lock
+MAX_ATTEMPTS = 3   # claims of one page before it is given up as failed
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS pages_state ON pages (state, lease_expires);
+"""
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives)"""
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for pos in self.positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self.positions(item))
+
+
+class FrontierStore:
+    def __init__(self, path: Path, shared_fs: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        created = not self.path.exists()
+        self.db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None,
+                                  check_same_thread=False)
+        # WAL lets readers and the writer overlap, but needs shared memory -
+        # a folder shared between machines has to use the rollback journal.
+        # The mode sticks to the file, so it's only chosen when creating it
+        if created:
+            self.db.execute(f"PRAGMA journal_mode={'DELETE' if shared_fs else 'WAL'}")
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def add(self, urls: Iterable[str]) -> int:
+        """Queue URLs that have never been seen; returns how many were new"""
+        rows = [(url_key(u), canonical_url(u)) for u in urls]
+        if not rows:
+            return 0
+        with self.lock:
+            before = self.db.total_changes
+            self.db.execute("BEGIN IMMEDIATE")  # one write transaction for the batch
+            try:
+                self.db.executemany("INSERT OR IGNORE INTO pages (key, url) VALUES (?, ?)", rows)
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            return self.db.total_changes - before
+
+    def known(self, keys: List[str]) -> set:
+        """Which of these keys the store already has (one read, no write lock)"""
+        if not keys:
+            return set()
+        with self.lock:
+            found = set()
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                found.update(row[0] for row in self.db.execute(
+                    f"SELECT key FROM pages WHERE key IN ({marks})", chunk))
+            return found
+
+    def claim(self, owner: str, limit: int, lease: float = LEASE_SECONDS,
+              max_attempts: int = MAX_ATTEMPTS) -> List[Tuple[str, str]]:
+        """Lease up to `limit` pending (or abandoned) pages to a worker"""
+        now = time.time()
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                # Abandoned too often: whatever is on the page kills workers
+                self.db.execute(
+                    "UPDATE pages SET state = 'failed', lease_expires = NULL "
+                    "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?", (now, max_attempts))
+                rows = self.db.execute(
+                    "SELECT key, url FROM pages WHERE state = 'pending' "
+                    "OR (state = 'leased' AND lease_expires < ?) LIMIT ?", (now, limit)).fetchall()
+                self.db.executemany(
+                    "UPDATE pages SET state = 'leased', owner = ?, lease_expires = ?, "
+                    "attempts = attempts + 1 WHERE key = ?",
+                    [(owner, now + lease, key) for key, _ in rows])
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+        return rows
+
+    def complete(self, key: str, ok: bool, owner: str):
+        """Finish a leased page (ignored if the lease was lost to another worker)"""
+        with self.lock:
+            self.db.execute("UPDATE pages SET state = ?, lease_expires = NULL WHERE key = ? AND owner = ?",
+                            ('done' if ok else 'failed', key, owner))
+
+    def keys(self) -> Iterable[str]:
+        """Every key, streamed (used once, to fill a SeenFilter)"""
+        for (key,) in self.db.execute("SELECT key FROM pages"):
+            yield key
+
+    def counts(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.db.execute("SELECT state, COUNT(*) FROM pages GROUP BY state").fetchall())
+
+    def unfinished(self) -> int:
+        """Pages still pending or under lease"""
+        counts = self.counts()
+        return counts.get('pending', 0) + counts.get('leased', 0)
+
+    def failed_urls(self) -> List[str]:
+        with self.lock:
+            return [row[0] for row in self.db.execute("SELECT url FROM pages WHERE state = 'failed' ORDER BY url")]
+
+    def close(self):
+        self.db.close()
+
+
+class SeenFilter:
+    """Bloom filter in front of a FrontierStore; no URL is ever wrongly skipped"""
+
+    def __init__(self, store: FrontierStore, capacity: int = 1_000_000, error_rate: float = 0.001):
+        self.store = store
+        self.bloom = BloomFilter(capacity, error_rate)
+        for key in store.keys():
+            self.bloom.add(key)
+
+    def add_new(self, urls: Iterable[str]) -> int:
+        """Queue whichever URLs the frontier hasn't seen; returns how many were new"""
+        urls = {url_key(u): u for u in urls}
+        maybe_seen = [key for key in urls if key in self.bloom]
+        # Bloom hits are confirmed against the store - a false positive costs a read
+        seen = self.store.known(maybe_seen)
+        fresh = [url for key, url in urls.items() if key not in seen]
+        for key in urls:
+            self.bloom.add(key)
+        return self.store.add(fresh)
@@ -0,0 +1,183 @@
+"""
+Persistent file-hash index shared by the dedupe and migration scripts
+
+find_duplicates.py, cleanup_duplicates.py, migrate_old_site.py and
+do_migration.py all hash every media file to spot duplicates - and used to
+re-read and MD5 the whole tree on every run, do_migration.py straight after
+migrate_old_site.py had hashed the same files. Here:
+1. Every digest is stored in one SQLite database with the file's size,
+   mtime (ns) and inode at the time it was hashed
+2. digest() stats the file; if those three still match, the stored digest
+   is returned without opening the file - only new or changed files are
+   read again
+3. Digests are stored per algorithm, so switching algorithms never returns
+   a stale value; cached_many() stores other per-file values the same way
+   (perceptual_hash.py keeps its image hashes here)
+4. digest_many() hashes the files that need it in a thread pool (or a
+   process pool), with large reads via hashlib.file_digest - hashlib
+   releases the GIL, so a big tree keeps the disk busy instead of one core.
+   Any hashlib algorithm works (HASH_ALGO=blake2b etc. to switch); which is
+   fastest depends on the CPU - bench_hashing.py compares them
+
+The index lives in scraper/.hash_index.sqlite - delete it to start fresh.
+
+Usage:
+    from hash_index import get_index
+    index = get_index()
+    digest = index.digest(path)          # None if the file can't be read
+    digests = index.digest_many(paths)   # {path: digest}, hashed in parallel
+    print(index.summary())
+"""
+
+import os
+import atexit
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+INDEX_PATH = Path(__file__).parent / ".hash_index.sqlite"
+DEFAULT_ALGO = os.environ.get("HASH_ALGO", "md5")
+CHUNK_SIZE = 1 << 20  # read size where hashlib.file_digest is unavailable
+HASH_WORKERS = os.cpu_count() or 4
+COMMIT_EVERY = 256  # new digests per write transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    path TEXT NOT NULL,
+    algo TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (path, algo)
+);
+"""
+
+
+def hash_file(filepath, algo: str = DEFAULT_ALGO) -> str:
+    with open(filepath, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+: reads into one reused buffer
+            return hashlib.file_digest(f, algo).hexdigest()
+        hasher = hashlib.new(algo)
+        while chunk := f.read(CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def try_hash_file(filepath, algo: str = DEFAULT_ALGO) -> Optional[str]:
+    try:
+        return hash_file(filepath, algo)
+    except OSError:
+        return None
+
+
+class HashIndex:
+    def __init__(self, path: Path = INDEX_PATH):
+        self.path = Path(path)
+        self.db = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: str, algo: str, st: os.stat_result) -> Optional[str]:
+        """Stored digest of a file, if it hasn't changed since it was hashed"""
+        with self.lock:
+            row = self.db.execute("SELECT size, mtime_ns, inode, digest FROM hashes WHERE path = ? AND algo = ?",
+                                  (key, algo)).fetchone()
+        if row and row[:3] == (st.st_size, st.st_mtime_ns, st.st_ino):
+            return row[3]
+        return None
+
+    def store(self, key: str, algo: str, st: os.stat_result, digest: str):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)",
+                            (key, algo, st.st_size, st.st_mtime_ns, st.st_ino, digest))
+            self.pending += 1
+            if self.pending >= COMMIT_EVERY:
+                self.db.commit()
+                self.pending = 0
+
+    def digest(self, filepath, algo: str = DEFAULT_ALGO) -> Optional[str]:
+        """Hex digest of a file, reusing the stored one while size, mtime and inode match"""
+        key = os.path.abspath(filepath)
+        try:
+            st = os.stat(key)
+            digest = self.lookup(key, algo, st)
+            if digest is not None:
+                self.hits += 1
+                return digest
+            digest = hash_file(key, algo)
+        except OSError:
+            return None
+        self.misses += 1
+        self.store(key, algo, st, digest)
+        return digest
+
+    def cached_many(self, paths: Iterable, algo: str,
+                    compute: Callable[[List[str]], Iterable[Optional[str]]]) -> Dict[object, Optional[str]]:
+        """Stored values of many files; compute(paths) fills in the new or changed ones"""
+        values = {}
+        todo = []
+        for filepath in paths:
+            key = os.path.abspath(filepath)
+            try:
+                st = os.stat(key)
+            except OSError:
+                values[filepath] = None
+                continue
+            value = self.lookup(key, algo, st)
+            if value is None:
+                todo.append((filepath, key, st))
+            else:
+                self.hits += 1
+            values[filepath] = value
+
+        if todo:
+            for (filepath, key, st), value in zip(todo, compute([key for _, key, _ in todo])):
+                values[filepath] = value
+                if value is not None:
+                    self.misses += 1
+                    self.store(key, algo, st, value)
+        return values
+
+    def digest_many(self, paths: Iterable, algo: str = DEFAULT_ALGO, workers: int = HASH_WORKERS,
+                    processes: bool = False) -> Dict[object, Optional[str]]:
+        """digest() of many files; the ones not in the index are hashed in parallel"""
+        def compute(keys: List[str]) -> List[Optional[str]]:
+            pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+            with pool(max_workers=workers) as executor:
+                return list(executor.map(try_hash_file, keys, [algo] * len(keys),
+                                         chunksize=16 if processes else 1))
+        return self.cached_many(paths, algo, compute)
+
+    def commit(self):
+        with self.lock:
+            self.db.commit()
+            self.pending = 0
+
+    def summary(self) -> str:
+        return f"{self.hits} hashes reused, {self.misses} files hashed"
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_index() -> HashIndex:
+    """The shared index (opened on first use, committed at exit)"""
+    global _index
+    with _lock:
+        if _index is None:
+            _index = HashIndex()
+            atexit.register(_index.close)
+    return _index
@@ -0,0 +1,376 @@
+"""
+HTML extraction backends for the scrapers
+
+Turns raw page bytes into a PageExtract: the <img> tags (with the caption
+text around them and the link they sit in), <a href> links and <frame>/<iframe> sources the crawler
+cares about. Two interchangeable engines produce the same PageExtract:
+- 'html.parser': BeautifulSoup with the stdlib parser (the original path)
+- 'lxml':        single pass over an lxml tree, several times faster
+
+Where the HTML itself is broken the two parsers build different trees:
+libxml2 closes an unclosed <p>/<li>/<td> where a browser would,
+html.parser nests the rest of the page inside it. The BeautifulSoup
+backend reads its tree as if those tags had been closed (IMPLIED_END),
+and the lxml backend parses the <noframes> body libxml2 keeps as raw
+text, so both give the same PageExtract - bench_parsers.py checks that on
+saved pages. lxml is the default; html.parser stays as the reference.
+
+Captions are read from a bounded neighbourhood of each image, never from
+the whole page: the nearest caption container (table cell, list item,
+paragraph, figure) if there is one below the table/body level, otherwise
+the text that directly follows the image. At most MAX_CAPTION_CHARS are
+read, and container text is cached per page, so extraction stays linear
+in page size even on the old one-big-table FrontPage layouts.
+
+Usage:
+    page = extract_page(content)          # default backend
+    page = extract_page(content, 'lxml')  # fast single-pass engine
+"""
+
+import re
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import List, Optional, Union
+
+import lxml.html
+from lxml import etree
+from bs4 import BeautifulSoup, Tag, NavigableString, CData, UnicodeDammit
+
+DEFAULT_BACKEND = 'lxml'
+
+XML_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+# Text inside these never counts as caption text (matches BeautifulSoup's get_text)
+SKIP_TEXT_TAGS = {'script', 'style', 'template'}
+
+# Caption neighbourhood
+MAX_CAPTION_CHARS = 200
+MAX_CLIMB = 4          # inline wrappers (<a>, <font>, <b>...) to climb through
+MAX_SIBLINGS = 20      # siblings to scan for trailing caption text
+CAPTION_CONTAINERS = {'td', 'th', 'li', 'dd', 'dt', 'p', 'figure', 'figcaption', 'caption', 'center'}
+# Never read a caption from these - they hold the whole page
+PAGE_CONTAINERS = {'html', 'body', 'table', 'thead', 'tbody', 'tfoot', 'tr', 'form',
+                   'frameset', 'noframes', 'div', 'ul', 'ol', 'dl'}
+# Trailing caption text stops at the next one of these
+CAPTION_BREAKS = {'img', 'p', 'div', 'table', 'tr', 'td', 'th', 'hr', 'ul', 'ol', 'li',
+                  'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'center', 'blockquote'}
+# Tags that close an open caption container in libxml2 (as in browsers).
+# html.parser closes nothing implicitly, so an unclosed <p> there holds the
+# rest of its parent; the BeautifulSoup backend stops reading at these
+TABLE_CELL_END = {'td', 'th', 'tr', 'tbody', 'tfoot'}
+IMPLIED_END = {
+    'p': {'p', 'div', 'table', 'ul', 'ol', 'dl', 'li', 'dd', 'dt', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+          'blockquote', 'center', 'hr', 'pre', 'form', 'address', 'fieldset', 'menu', 'dir',
+          'listing', 'xmp', 'caption'} | TABLE_CELL_END,
+    'li': {'li'},
+    'dd': {'dt'},
+    'dt': {'dl', 'dd'},
+    'td': TABLE_CELL_END,
+    'th': TABLE_CELL_END,
+    'caption': {'tr', 'tbody', 'thead', 'tfoot'},
+}
+# ...unless they sit in a nested element of their own (a table in a cell)
+IMPLIED_END_SCOPES = {'td': {'table'}, 'th': {'table'}, 'caption': {'table'},
+                      'li': {'ul', 'ol'}, 'dd': {'dl'}, 'dt': {'dl'}}
+
+
+def clip_text(strings) -> str:
+    """Join stripped strings with single spaces, reading at most MAX_CAPTION_CHARS"""
+    words = []
+    size = 0
+    for s in strings:
+        s = ' '.join(s.split())
+        if not s:
+            continue
+        words.append(s)
+        size += len(s) + 1
+        if size >= MAX_CAPTION_CHARS:
+            break
+    return ' '.join(words)[:MAX_CAPTION_CHARS]
+
+
+@dataclass
+class ImageTag:
+    """An <img> tag plus the text around it"""
+    src: Optional[str]
+    alt: Optional[str] = None
+    title: Optional[str] = None
+    width: Optional[str] = None
+    height: Optional[str] = None
+    caption: str = ''                        # text from the image's neighbourhood
+    next_sibling_text: Optional[str] = None  # sole string of the next sibling element
+    link: Optional[str] = None               # href of the <a> wrapping the image, as written
+
+
+@dataclass
+class PageExtract:
+    images: List[ImageTag] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)   # <a href> values, as written
+    frames: List[str] = field(default_factory=list)  # <frame>/<iframe> src values
+
+
+# --- BeautifulSoup backend ---------------------------------------------------
+
+def bs4_following_strings(node):
+    """Text after a node up to the next caption break"""
+    for sibling in islice(node.next_siblings, MAX_SIBLINGS):
+        if isinstance(sibling, Tag):
+            if sibling.name in CAPTION_BREAKS or sibling.find('img'):
+                return
+            yield from sibling.stripped_strings
+        elif type(sibling) is NavigableString:
+            yield sibling
+
+
+def bs4_container_strings(container):
+    """A caption container's text (like .strings), up to where libxml2 would close it"""
+    closers = IMPLIED_END.get(container.name, ())
+    scopes = IMPLIED_END_SCOPES.get(container.name, ())
+    types = container.interesting_string_types or (NavigableString, CData)
+
+    def walk(node, scoped):
+        """Yields the strings under node; returns True once a closer is reached"""
+        for child in node.children:
+            if isinstance(child, Tag):
+                if not scoped and child.name in closers:
+                    return True
+                if (yield from walk(child, scoped or child.name in scopes)):
+                    return True
+            elif type(child) is types if isinstance(types, type) else type(child) in types:
+                yield child
+        return False
+
+    yield from walk(container, False)
+
+
+def bs4_closed_before(node, container) -> bool:
+    """Would libxml2 have closed `container` before reaching its child `node`?"""
+    closers = IMPLIED_END.get(container.name, ())
+    return any(isinstance(s, Tag) and s.name in closers for s in node.previous_siblings)
+
+
+def bs4_caption(img, cache: dict) -> str:
+    """Caption text from the image's bounded neighbourhood"""
+    node = img
+    parent = img.parent
+    climbed = 0
+    while climbed < MAX_CLIMB:
+        if parent is None or parent.name in PAGE_CONTAINERS or parent.name == '[document]':
+            break
+        if parent.name in CAPTION_CONTAINERS:
+            if bs4_closed_before(node, parent):
+                parent = parent.parent  # libxml2 closed it already - node sits in the next one up
+                continue
+            if id(parent) not in cache:
+                cache[id(parent)] = clip_text(bs4_container_strings(parent))
+            return cache[id(parent)]
+        node = parent
+        parent = node.parent
+        climbed += 1
+    return clip_text(bs4_following_strings(node))
+
+
+def bs4_link(img) -> Optional[str]:
+    """href of the <a> the image sits in (through at most MAX_CLIMB inline wrappers)"""
+    for parent in islice(img.parents, MAX_CLIMB):
+        if parent.name == 'a':
+            return parent.get('href')
+        if parent.name in PAGE_CONTAINERS or parent.name in CAPTION_CONTAINERS:
+            break
+    return None
+
+
+def bs4_string(tag, outermost: bool = True) -> Optional[str]:
+    """tag.string, ignoring anything after the point where libxml2 would close the tag"""
+    closers = IMPLIED_END.get(tag.name, ())
+    children = []
+    for child in tag.children:
+        if isinstance(child, Tag) and child.name in closers:
+            if not outermost:
+                return None  # in libxml2's tree the rest is a sibling - the parent has several children
+            break
+        children.append(child)
+    if len(children) != 1:
+        return None
+    return bs4_string(children[0], False) if isinstance(children[0], Tag) else children[0]
+
+
+def bs4_next_sibling(img):
+    """Next sibling element, unless libxml2 would have closed the image's container before it"""
+    sibling = img.find_next_sibling()
+    if sibling is None:
+        return None
+    node = img
+    for parent in img.parents:
+        if bs4_closed_before(node, parent):
+            continue
+        if sibling.name in IMPLIED_END.get(parent.name, ()):
+            return None
+        if parent.name in PAGE_CONTAINERS or parent.name in CAPTION_CONTAINERS:
+            break
+        node = parent
+    return sibling
+
+
+def extract_bs4(content: bytes) -> PageExtract:
+    """The original BeautifulSoup + html.parser path"""
+    soup = BeautifulSoup(content, 'html.parser')
+    page = PageExtract()
+    cache = {}
+
+    for img in soup.find_all('img'):
+        next_sib = bs4_next_sibling(img)
+        page.images.append(ImageTag(
+            src=img.get('src'),
+            alt=img.get('alt'),
+            title=img.get('title'),
+            width=img.get('width'),
+            height=img.get('height'),
+            caption=bs4_caption(img, cache),
+            next_sibling_text=bs4_string(next_sib) if next_sib else None,
+            link=bs4_link(img),
+        ))
+
+    page.links = [a['href'] for a in soup.find_all('a', href=True)]
+    page.frames = [f['src'] for f in soup.find_all(['frame', 'iframe']) if f.get('src')]
+    return page
+
+
+# --- lxml backend ------------------------------------------------------------
+
+def is_element(node) -> bool:
+    """Comments and processing instructions are nodes too in lxml"""
+    return isinstance(node.tag, str)
+
+
+def element_strings(element):
+    """Lazily yield an element's text in document order (like BeautifulSoup's .strings)"""
+    if element.text and element.tag not in SKIP_TEXT_TAGS:
+        yield element.text
+    for child in element:
+        if is_element(child):
+            yield from element_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def lxml_following_strings(node):
+    """Text after a node up to the next caption break"""
+    if node.tail:
+        yield node.tail
+    for sibling in islice(node.itersiblings(), MAX_SIBLINGS):
+        if is_element(sibling):
+            if sibling.tag in CAPTION_BREAKS or next(sibling.iter('img'), None) is not None:
+                return
+            yield from element_strings(sibling)
+        if sibling.tail:
+            yield sibling.tail
+
+
+def lxml_caption(img, cache: dict) -> str:
+    """Caption text from the image's bounded neighbourhood"""
+    node = img
+    for _ in range(MAX_CLIMB):
+        parent = node.getparent()
+        if parent is None or parent.tag in PAGE_CONTAINERS:
+            break
+        if parent.tag in CAPTION_CONTAINERS:
+            if parent not in cache:
+                cache[parent] = clip_text(element_strings(parent))
+            return cache[parent]
+        node = parent
+    return clip_text(lxml_following_strings(node))
+
+
+def lxml_link(img) -> Optional[str]:
+    """href of the <a> the image sits in (through at most MAX_CLIMB inline wrappers)"""
+    for parent in islice(img.iterancestors(), MAX_CLIMB):
+        if parent.tag == 'a':
+            return parent.get('href')
+        if parent.tag in PAGE_CONTAINERS or parent.tag in CAPTION_CONTAINERS:
+            break
+    return None
+
+
+def element_string(element) -> Optional[str]:
+    """Equivalent of BeautifulSoup's Tag.string: the element's only string, if any"""
+    children = list(element)
+    if not children:
+        return element.text or None
+    if element.text or len(children) > 1 or children[0].tail:
+        return None
+    child = children[0]
+    return element_string(child) if is_element(child) else child.text
+
+
+def next_element_sibling(element):
+    for sibling in element.itersiblings():
+        if is_element(sibling):
+            return sibling
+    return None
+
+
+def decode_html(content: Union[bytes, str]) -> str:
+    """Page text, decoded the way BeautifulSoup decodes it.
+
+    libxml2 reads bytes without a <meta> charset as latin-1; the old site's
+    pages are mostly cp1252 or utf-8 with no declaration, so lxml is handed
+    the text UnicodeDammit finds (declared charset, then detection, then
+    utf-8 / windows-1252) instead.
+    """
+    if isinstance(content, bytes):
+        content = UnicodeDammit(content, is_html=True).unicode_markup or ''
+    # lxml refuses text that still carries an <?xml encoding=...?> declaration
+    return XML_DECLARATION.sub('', content, count=1)
+
+
+def extract_lxml(content: Union[bytes, str]) -> PageExtract:
+    """Images, links and frames in a single walk over an lxml tree"""
+    page = PageExtract()
+    try:
+        root = lxml.html.document_fromstring(decode_html(content))
+    except (etree.ParserError, ValueError):
+        return page  # empty document
+
+    cache = {}
+    for element in root.iter():
+        tag = element.tag
+        if tag == 'img':
+            next_sib = next_element_sibling(element)
+            page.images.append(ImageTag(
+                src=element.get('src'),
+                alt=element.get('alt'),
+                title=element.get('title'),
+                width=element.get('width'),
+                height=element.get('height'),
+                caption=lxml_caption(element, cache),
+                next_sibling_text=element_string(next_sib) if next_sib is not None else None,
+                link=lxml_link(element),
+            ))
+        elif tag == 'a':
+            href = element.get('href')
+            if href is not None:
+                page.links.append(href)
+        elif tag in ('frame', 'iframe'):
+            src = element.get('src')
+            if src:
+                page.frames.append(src)
+        elif tag == 'noframes' and element.text:
+            # libxml2 keeps the no-frames page as raw text - parse it on its own
+            inner = extract_lxml(element.text)
+            page.images.extend(inner.images)
+            page.links.extend(inner.links)
+            page.frames.extend(inner.frames)
+
+    return page
+
+
+BACKENDS = {
+    'lxml': extract_lxml,
+    'html.parser': extract_bs4,
+}
+
+
+def extract_page(content: bytes, backend: str = DEFAULT_BACKEND) -> PageExtract:
+    """Extract images, links and frames from page bytes"""
+    return BACKENDS[backend](content)
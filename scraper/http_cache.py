@@ -0,0 +1,189 @@
+"""
+Persistent HTTP response cache with conditional revalidation
+
+Shared by all the scraper scripts so re-runs don't re-download pages and
+images that haven't changed:
+1. Every 200 response that carries an ETag or Last-Modified is stored on disk
+   (keyed by the canonical URL, see url_utils.url_key)
+2. Later GETs for the same URL send If-None-Match / If-Modified-Since
+3. A 304 answer is turned back into a normal 200 response from the cached body
+4. Streamed downloads (downloads.py) are not stored here - the file they were
+   saved to is the cached copy. Only its validators are kept, with the file's
+   size and mtime; a 304 then means the file on disk is still current
+
+Usage (normally through http_client.get_session(), which builds on this):
+    session = CachingSession()
+    r = session.get(url, timeout=30)   # r.from_cache is True on a 304 hit
+
+The cache lives in scraper/.http_cache/ - delete the folder to start fresh.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from url_utils import url_key
+
+CACHE_DIR = Path(__file__).parent / ".http_cache"
+
+# Response headers worth keeping with the cached body (bodies are stored
+# decoded, so Content-Encoding/Content-Length are deliberately left out)
+STORED_HEADERS = ['Content-Type', 'ETag', 'Last-Modified']
+
+
+class HttpCache:
+    def __init__(self, cache_dir: Path = CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def paths(self, url: str):
+        """Metadata and body file paths for a URL"""
+        digest = hashlib.sha1(url_key(url).encode('utf-8')).hexdigest()
+        folder = self.cache_dir / digest[:2]
+        return folder / f"{digest}.json", folder / f"{digest}.body"
+
+    def load(self, url: str) -> Optional[dict]:
+        """Cached metadata for a URL, or None"""
+        meta_path, body_path = self.paths(url)
+        if not meta_path.exists() or not body_path.exists():
+            return None
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def body(self, url: str) -> bytes:
+        _, body_path = self.paths(url)
+        return body_path.read_bytes()
+
+    def store(self, url: str, response: requests.Response):
+        """Save a response body plus its validators"""
+        meta_path, body_path = self.paths(url)
+        meta_path.parent.mkdir(exist_ok=True)
+
+        meta = {
+            'url': response.url,
+            'key': url_key(url),
+            'headers': {h: response.headers[h] for h in STORED_HEADERS if h in response.headers},
+        }
+        write_atomic(body_path, response.content)
+        write_atomic(meta_path, json.dumps(meta, indent=2).encode('utf-8'))
+
+    def load_file(self, url: str, path: Path) -> Optional[dict]:
+        """Validators for a downloaded file, or None if the file changed since"""
+        meta_path, _ = self.paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            stat = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        if meta.get('file') != str(path) or [stat.st_size, stat.st_mtime_ns] != meta.get('stat'):
+            return None
+        return meta
+
+    def store_file(self, url: str, response: requests.Response, path: Path):
+        """Remember the validators of a response that was downloaded to `path`"""
+        meta_path, body_path = self.paths(url)
+        meta_path.parent.mkdir(exist_ok=True)
+
+        stat = os.stat(path)
+        meta = {
+            'url': response.url,
+            'key': url_key(url),
+            'headers': {h: response.headers[h] for h in STORED_HEADERS if h in response.headers},
+            'file': str(path),
+            'stat': [stat.st_size, stat.st_mtime_ns],
+        }
+        body_path.unlink(missing_ok=True)  # the file is the body now
+        write_atomic(meta_path, json.dumps(meta, indent=2).encode('utf-8'))
+
+    def remove(self, url: str):
+        for path in self.paths(url):
+            path.unlink(missing_ok=True)
+
+
+def write_atomic(path: Path, data: bytes):
+    """Write a file via a temp file + rename so readers never see half of it"""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def conditional_headers(meta: dict) -> dict:
+    """Revalidation headers for a cached entry"""
+    headers = {}
+    if 'ETag' in meta['headers']:
+        headers['If-None-Match'] = meta['headers']['ETag']
+    if 'Last-Modified' in meta['headers']:
+        headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+    return headers
+
+
+class CachingSession(requests.Session):
+    """requests.Session that revalidates GETs against an HttpCache"""
+
+    def __init__(self, cache: HttpCache = None):
+        super().__init__()
+        self.cache = cache or HttpCache()  # set to None to bypass the cache entirely
+        self.hits = 0
+        self.misses = 0
+
+    def request(self, method, url, **kwargs):
+        # Replay (no cache) and non-GETs bypass the cache
+        if self.cache is None or method.upper() != 'GET':
+            return super().request(method, url, **kwargs)
+
+        # Streamed downloads send their own validators (see downloads.py)
+        if kwargs.get('stream'):
+            response = super().request(method, url, **kwargs)
+            response.from_cache = response.status_code == 304
+            if response.from_cache:
+                self.hits += 1
+            return response
+
+        meta = self.cache.load(url)
+        if meta:
+            headers = dict(kwargs.pop('headers', None) or {})
+            headers.update(conditional_headers(meta))
+            kwargs['headers'] = headers
+
+        response = super().request(method, url, **kwargs)
+
+        if response.status_code == 304 and meta:
+            self.hits += 1
+            return self.cached_response(url, meta, response)
+
+        self.misses += 1
+        response.from_cache = False
+        if response.status_code == 200 and ('ETag' in response.headers or 'Last-Modified' in response.headers):
+            self.cache.store(url, response)
+        return response
+
+    def cached_response(self, url: str, meta: dict, not_modified: requests.Response) -> requests.Response:
+        """Rebuild a 200 response from the cache for a 304 answer"""
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = not_modified.url
+        response.request = not_modified.request
+        response.elapsed = not_modified.elapsed
+        response.history = not_modified.history
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response.headers.update(not_modified.headers)
+        response._content = self.cache.body(url)
+        response.from_cache = True
+        return response
+
@@ -0,0 +1,146 @@
+"""
+Shared pooled HTTP client for all the scraper scripts
+
+One session per process instead of a bare requests.get() (new TCP + TLS
+handshake) per request:
+1. Keep-alive connection pools, sized for the download worker pools
+2. A default timeout for any request that doesn't pass one
+3. The browser User-Agent every script should send (HEADERS)
+4. The on-disk revalidation cache from http_cache.CachingSession
+5. Instrumentation hooks - called with every response; RequestStats tallies
+   requests, bytes and latency per host
+6. Optional WARC recording / offline replay (see warc.py), also switchable
+   for any script with SCRAPER_RECORD=<file> or SCRAPER_REPLAY=<file>
+
+Usage:
+    from http_client import get_session
+    session = get_session()
+    r = session.get(url)                 # pooled, cached, default timeout
+    print(session.stats.summary(), session.connections_opened())
+"""
+
+import os
+import threading
+from collections import defaultdict
+from typing import Callable, List, Optional
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+
+from http_cache import CachingSession
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+POOL_CONNECTIONS = 4    # hosts with a pool of their own (the site + its www alias)
+POOL_MAXSIZE = 16       # keep-alive connections per host; >= download workers
+DEFAULT_TIMEOUT = (10, 30)  # (connect, read) seconds
+
+ResponseHook = Callable[..., None]
+
+
+class RequestStats:
+    """Response hook that tallies traffic per host"""
+
+    def __init__(self):
+        self.requests = defaultdict(int)
+        self.bytes = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self.lock = threading.Lock()
+
+    def __call__(self, response, *args, **kwargs):
+        host = urlparse(response.url).netloc.lower()
+        length = response.headers.get('Content-Length', '')
+        with self.lock:
+            self.requests[host] += 1
+            self.bytes[host] += int(length) if length.isdigit() else 0
+            self.seconds[host] += response.elapsed.total_seconds()
+
+    def summary(self) -> str:
+        with self.lock:
+            return ", ".join(
+                f"{host}: {n} requests, {self.bytes[host] / (1024 * 1024):.1f} MB, "
+                f"{self.seconds[host] / n:.2f}s avg"
+                for host, n in sorted(self.requests.items()))
+
+
+class PooledSession(CachingSession):
+    """CachingSession with sized keep-alive pools, a default timeout and hooks"""
+
+    def __init__(self, pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE,
+                 timeout=DEFAULT_TIMEOUT, headers: Optional[dict] = None):
+        super().__init__()
+        self.timeout = timeout
+        self.headers.update(headers or HEADERS)
+        # Retries are handled by retry.Retrier, not urllib3
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              pool_block=False, max_retries=0)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+        self.adapter = adapter
+
+        self.stats = RequestStats()
+        self.hooks['response'].append(self.stats)
+        self.recorder = None  # warc.WarcWriter while recording
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        response = super().request(method, url, **kwargs)
+        if self.recorder:
+            # After the cache layer, so a revalidated page is archived as its 200.
+            # A streamed body is archived as the caller reads it, not read here
+            if kwargs.get('stream'):
+                self.recorder.record_streamed(response)
+            else:
+                self.recorder.record(response)
+        return response
+
+    def record_to(self, path):
+        """Archive every exchange from now on to a WARC file"""
+        from warc import WarcWriter
+        self.recorder = WarcWriter(path)
+        return self.recorder
+
+    def replay_from(self, path):
+        """Serve every request from a WARC archive - no network at all"""
+        from warc import WarcArchive, ReplayAdapter
+        # Archived answers must not end up in (or be revalidated against) the live cache
+        self.cache = None
+        self.adapter = ReplayAdapter(WarcArchive(path))
+        self.mount('https://', self.adapter)
+        self.mount('http://', self.adapter)
+        return self.adapter.archive
+
+    def add_hook(self, hook: ResponseHook):
+        """Call hook(response) for every response this session receives"""
+        self.hooks['response'].append(hook)
+
+    def connections_opened(self) -> int:
+        """TCP connections opened so far (requests minus this = handshakes saved)"""
+        if not isinstance(self.adapter, HTTPAdapter):
+            return 0
+        pools = self.adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+
+_session = None
+_lock = threading.Lock()
+
+
+def get_session(headers: dict = None, pool_maxsize: Optional[int] = None,
+                hooks: List[ResponseHook] = ()) -> PooledSession:
+    """The shared pooled session (created on first use; pool_maxsize only applies then)"""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = PooledSession(pool_maxsize=pool_maxsize or POOL_MAXSIZE)
+            if os.environ.get('SCRAPER_REPLAY'):
+                _session.replay_from(os.environ['SCRAPER_REPLAY'])
+            elif os.environ.get('SCRAPER_RECORD'):
+                _session.record_to(os.environ['SCRAPER_RECORD'])
+    if headers:
+        _session.headers.update(headers)
+    for hook in hooks:
+        _session.add_hook(hook)
+    return _session
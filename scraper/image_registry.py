@@ -0,0 +1,72 @@
+"""
+Keyed registry of scraped images
+
+Replaces the plain list + linear "have we seen this URL?" scan:
+- Primary index: url_key(image.url) -> record (O(1) dedupe)
+- Secondary index: lowercase filename -> keys (same file under different paths)
+
+When the same image turns up on several pages the records are merged
+instead of keeping whichever copy was found first.
+"""
+
+from dataclasses import fields
+from typing import Dict, List, Iterator, Optional
+
+from url_utils import url_key
+
+# Category used when a page didn't tell us anything better
+FALLBACK_CATEGORY = 'misc'
+
+
+class ImageRegistry:
+    def __init__(self):
+        self.by_key: Dict[str, object] = {}
+        self.by_name: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.by_key)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.by_key.values())
+
+    def __contains__(self, url: str) -> bool:
+        return url_key(url) in self.by_key
+
+    def get(self, url: str):
+        """Look up a record by (any spelling of) its URL"""
+        return self.by_key.get(url_key(url))
+
+    def with_filename(self, filename: str) -> List:
+        """All records that share a filename, regardless of folder"""
+        return [self.by_key[k] for k in self.by_name.get(filename.lower(), [])]
+
+    def add(self, image) -> bool:
+        """Add an image record; returns True if it was new, False if merged"""
+        key = url_key(image.url)
+        existing = self.by_key.get(key)
+        if existing is None:
+            self.by_key[key] = image
+            self.by_name.setdefault(image.filename.lower(), []).append(key)
+            return True
+
+        merge_records(existing, image)
+        return False
+
+
+def merge_records(existing, new):
+    """Merge metadata from another sighting of the same image into `existing`"""
+    # A real category beats the fallback (and moves the local path with it)
+    if existing.category == FALLBACK_CATEGORY and new.category not in (None, FALLBACK_CATEGORY):
+        existing.category = new.category
+        existing.local_path = new.local_path
+
+    # Page-wide text dumps are long; the tighter caption is the better one
+    if new.description and (not existing.description or len(new.description) < len(existing.description)):
+        existing.description = new.description
+
+    # Fill in anything the first sighting didn't know
+    for field in fields(existing):
+        if getattr(existing, field.name) in (None, '') and getattr(new, field.name) not in (None, ''):
+            setattr(existing, field.name, getattr(new, field.name))
+
+    return existing
@@ -0,0 +1,96 @@
+"""
+Streaming image record writer
+
+Appends one JSON line per image to images_raw.jsonl as soon as it is found
+(and again whenever a later page merges more metadata into it), instead of
+holding the whole catalog for one json.dump at the end.
+
+finalize() then builds images_raw.json and the per-category files from
+that stream. It only keeps a {key: file offset} index in memory; each
+record is read back from disk once and written straight to its outputs.
+The .json files come out byte-for-byte as json.dump(..., indent=2) would
+write them.
+"""
+
+import json
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict
+
+from crawl_journal import repair_tail
+from url_utils import url_key
+
+
+class JsonArrayWriter:
+    """Write a JSON array one element at a time, formatted like json.dump(indent=2)"""
+
+    def __init__(self, path: Path):
+        self.file = open(path, 'w')
+        self.count = 0
+
+    def write(self, record: dict):
+        body = json.dumps(record, indent=2).replace('\n', '\n  ')
+        self.file.write(('[\n  ' if self.count == 0 else ',\n  ') + body)
+        self.count += 1
+
+    def close(self):
+        self.file.write('\n]' if self.count else '[]')
+        self.file.close()
+
+
+class ImageStreamWriter:
+    def __init__(self, path: Path, resume: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume:
+            repair_tail(self.path)  # don't append onto a line torn by a crash
+        self.file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+
+    def write(self, image):
+        """Append the current state of an image record"""
+        self.file.write(json.dumps(asdict(image)) + '\n')
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def index(self) -> Dict[str, int]:
+        """url key -> offset of its latest line, in order of first appearance"""
+        offsets = {}
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                try:
+                    offsets[url_key(json.loads(line)['url'])] = offset
+                except ValueError:
+                    pass  # torn line from an interrupted run
+                offset += len(line)
+        return offsets
+
+    def finalize(self, data_dir: Path) -> Dict[str, int]:
+        """Write images_raw.json and <category>.json; returns counts per output file"""
+        self.close()
+        offsets = self.index()
+
+        all_images = JsonArrayWriter(Path(data_dir) / "images_raw.json")
+        by_category: Dict[str, JsonArrayWriter] = {}
+        try:
+            with open(self.path, 'rb') as f:
+                for offset in offsets.values():
+                    f.seek(offset)
+                    record = json.loads(f.readline())
+                    all_images.write(record)
+
+                    cat = record['category']
+                    if cat not in by_category:
+                        by_category[cat] = JsonArrayWriter(Path(data_dir) / f"{cat}.json")
+                    by_category[cat].write(record)
+        finally:
+            all_images.close()
+            for writer in by_category.values():
+                writer.close()
+
+        counts = {"images_raw.json": all_images.count}
+        counts.update({f"{cat}.json": w.count for cat, w in by_category.items()})
+        return counts
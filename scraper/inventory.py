@@ -0,0 +1,169 @@
+"""
+Single-walk filesystem inventory for the cleanup and migration scripts
+
+migrate_old_site.py used to walk the old-site folders four times
+(delete_junk_folders, delete_junk_files, scan_existing_images,
+find_all_images), each an rglob('*') plus an is_file()/stat() call per
+file; cleanup_duplicates.py walked public/images twice. Here:
+1. Each tree is walked once with os.scandir - the DirEntry already knows
+   file vs folder, and its stat() is served from the directory listing on
+   Windows, so there's no extra call per file
+2. The walks run in a thread pool, one job per top-level folder of every
+   root asked for at once
+3. Every stage reads the cached Tree; a stage that deletes files or
+   folders calls forget() so later stages see the tree as it now is
+
+Usage:
+    from inventory import get_tree, scan_trees
+    scan_trees([PUBLIC_IMAGES_PATH, OLD_WEBSITE_PATH])   # walk both, in parallel
+    for entry in get_tree(PUBLIC_IMAGES_PATH).files():
+        entry.path, entry.size
+"""
+
+import os
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+SCAN_WORKERS = min(32, (os.cpu_count() or 4) * 4)  # scandir waits on the disk, not the CPU
+
+
+class FileEntry(NamedTuple):
+    path: Path
+    size: int
+    mtime_ns: int
+
+
+# folder -> (subfolders, files) for every folder below one starting point
+Listing = Dict[str, Tuple[List[str], List[FileEntry]]]
+
+
+def list_folder(folder: str) -> Tuple[List[str], List[FileEntry]]:
+    """(subfolders, files) of one folder; symlinked folders are not followed, like rglob"""
+    subfolders, files = [], []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subfolders.append(entry.path)
+                elif entry.is_file():
+                    st = entry.stat()
+                    files.append(FileEntry(Path(entry.path), st.st_size, st.st_mtime_ns))
+            except OSError:
+                continue
+    return subfolders, files
+
+
+def walk(top: str) -> Listing:
+    """list_folder() of every folder under `top`"""
+    listing = {}
+    stack = [top]
+    while stack:
+        folder = stack.pop()
+        try:
+            listing[folder] = list_folder(folder)
+        except OSError:
+            listing[folder] = ([], [])  # unreadable or vanished - listed as empty
+        stack.extend(listing[folder][0])
+    return listing
+
+
+class Tree:
+    """Files and folders under one root, as walked"""
+
+    def __init__(self, root: Path, listing: Listing):
+        self.root = root
+        self.listing = listing
+        # Keyed like the filesystem compares names (case-insensitive on Windows)
+        self.paths = {os.path.normcase(entry.path): entry for _, files in listing.values() for entry in files}
+
+    def exists(self) -> bool:
+        return str(self.root) in self.listing
+
+    def folders(self, folder=None) -> Iterator[Path]:
+        """Every folder under `folder` (default the root), deepest first"""
+        order = []
+        stack = [str(folder or self.root)]
+        while stack:
+            current = stack.pop()
+            if current in self.listing:
+                order.append(current)
+                stack.extend(self.listing[current][0])
+        for current in reversed(order[1:]):
+            yield Path(current)
+
+    def files(self, folder=None) -> Iterator[FileEntry]:
+        """Every file under `folder` (default the root)"""
+        stack = [str(folder or self.root)]
+        while stack:
+            current = stack.pop()
+            if current in self.listing:
+                subfolders, files = self.listing[current]
+                yield from files
+                stack.extend(reversed(subfolders))  # same order as rglob
+
+    def size(self, folder=None) -> int:
+        return sum(entry.size for entry in self.files(folder))
+
+    def __contains__(self, path) -> bool:
+        return os.path.normcase(path) in self.paths
+
+    def get(self, path):
+        return self.paths.get(os.path.normcase(path))
+
+    def forget(self, path):
+        """Drop a deleted file or folder (and everything under it)"""
+        path = Path(path)
+        parent = str(path.parent)
+        if str(path) in self.listing:
+            for entry in list(self.files(path)):
+                del self.paths[os.path.normcase(entry.path)]
+            for folder in list(self.folders(path)) + [path]:
+                del self.listing[str(folder)]
+            if parent in self.listing:
+                self.listing[parent][0].remove(str(path))
+        elif path in self:
+            entry = self.paths.pop(os.path.normcase(path))
+            if parent in self.listing:
+                self.listing[parent][1].remove(entry)
+
+
+_trees: Dict[Path, Tree] = {}
+_lock = threading.Lock()
+
+
+def scan_trees(roots: Iterable, workers: int = SCAN_WORKERS) -> Dict[Path, Tree]:
+    """Walk every root not walked yet, in parallel across their top-level folders"""
+    roots = [Path(root) for root in roots]
+    with _lock:
+        listings = {}
+        for root in dict.fromkeys(roots):
+            if root in _trees:
+                continue
+            try:
+                listings[root] = {str(root): list_folder(str(root))}
+            except OSError:
+                listings[root] = {}  # missing root: an empty tree
+        jobs = [folder for root, listing in listings.items() for folder in listing.get(str(root), ([], []))[0]]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            walked = dict(zip(jobs, executor.map(walk, jobs)))
+        for root, listing in listings.items():
+            for folder in listing.get(str(root), ([], []))[0]:
+                listing.update(walked[folder])
+            _trees[root] = Tree(root, listing)
+        return {root: _trees[root] for root in roots}
+
+
+def get_tree(root) -> Tree:
+    """The cached tree of a root (walked on first use)"""
+    return scan_trees([root])[Path(root)]
+
+
+def lookup(path):
+    """The FileEntry of a path in any tree walked so far, or None"""
+    for tree in list(_trees.values()):
+        entry = tree.get(path)
+        if entry:
+            return entry
+    return None
@@ -0,0 +1,104 @@
+"""
+Serve the old site from a local backup instead of the network
+
+LocalSiteAdapter is a requests transport that maps
+https://silverspringastro.com/<path> onto <root>/<path>, so SiteScraper
+(and the prober and downloaders behind it) run unchanged over the backup
+that migrate_old_site.py works on - at disk speed, with no network:
+1. Paths resolve case-insensitively, segment by segment, like the old
+   IIS server did (Galaxies.htm finds galaxies.htm)
+2. Directory URLs fall back to their index page (url_utils.INDEX_PAGES)
+3. Anything missing is a 404
+
+Usage:
+    python scrape_site.py --site-dir "C:\\Users\\Adir\\Desktop"
+"""
+
+import io
+import os
+import mimetypes
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import unquote, urlsplit
+
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from url_utils import INDEX_PAGES
+
+
+class FileBody(io.FileIO):
+    """Streamed file body; requests calls release_conn() when the response is closed"""
+
+    def release_conn(self):
+        self.close()
+
+
+class LocalSiteAdapter(BaseAdapter):
+    def __init__(self, root: Path):
+        super().__init__()
+        self.root = Path(root)
+        self.listings: Dict[Path, Dict[str, str]] = {}  # folder -> {lowercase name: real name}
+        self.lock = threading.Lock()
+
+    def listing(self, folder: Path) -> Dict[str, str]:
+        with self.lock:
+            if folder not in self.listings:
+                try:
+                    self.listings[folder] = {name.lower(): name for name in os.listdir(folder)}
+                except OSError:
+                    self.listings[folder] = {}
+            return self.listings[folder]
+
+    def resolve(self, url: str) -> Optional[Path]:
+        """The file a URL maps to, or None"""
+        path = self.root
+        for segment in unquote(urlsplit(url).path).split('/'):
+            if not segment or segment == '.':
+                continue
+            if segment == '..':
+                return None  # never leave the backup folder
+            name = self.listing(path).get(segment.lower())
+            if name is None:
+                return None
+            path = path / name
+
+        if path.is_dir():
+            index = self.listing(path)
+            for page in sorted(INDEX_PAGES):
+                if page in index:
+                    return path / index[page]
+            return None
+        return path
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        response = Response()
+        response.url = request.url
+        response.request = request
+        response.encoding = None
+
+        path = self.resolve(request.url)
+        if path is None:
+            response.status_code, response.reason = 404, 'Not Found'
+            response.headers = CaseInsensitiveDict({'Content-Length': '0'})
+            response.raw = io.BytesIO(b'')
+            return response
+
+        size = path.stat().st_size
+        response.status_code, response.reason = 200, 'OK'
+        response.headers = CaseInsensitiveDict({
+            'Content-Type': mimetypes.guess_type(path.name)[0] or 'application/octet-stream',
+            'Content-Length': str(size),
+        })
+        if request.method == 'HEAD':
+            response.raw = io.BytesIO(b'')
+        elif stream:
+            response.raw = FileBody(path)
+        else:
+            response.raw = io.BytesIO(path.read_bytes())
+        return response
+
+    def close(self):
+        pass
@@ -4,23 +4,27 @@ Migrate Old Silver Spring Astro Website
 ========================================
 This script processes the old website backup and:
 1. Extracts relevant images (astronomy, travel, equipment)
-2. Deletes junk files (_vti folders, admin stuff, etc.)
-3. Copies useful content to the new site structure
-4. Checks for duplicates
+2. Reads captions/metadata out of the old HTML (before it gets deleted)
+3. Deletes junk files (_vti folders, admin stuff, etc.)
+4. Copies useful content to the new site structure
+5. Checks for duplicates
 """
 
-import os
 import shutil
-import hashlib
 from pathlib import Path
 from collections import defaultdict
 
+from hash_index import get_index
+from inventory import get_tree, lookup, scan_trees
+
 # Configuration - UPDATE THESE PATHS
 # NOTE: The old website was extracted directly to the Desktop, mixed with other folders!
 # We'll only process specific known folders from the old website.
 OLD_SITE_BASE = Path(r"C:\Users\Adir\Desktop")
 NEW_SITE_PATH = Path(r"C:\Users\Adir\Desktop\Coding\Dev\silverspringastro-2")
 NEW_IMAGES_PATH = NEW_SITE_PATH / "public" / "images"
+# Captions read from the backup's HTML - kept apart from the live scrape's src/data/scraped
+OLD_SITE_DATA_PATH = NEW_SITE_PATH / "src" / "data" / "scraped-old-site"
 
 # Image extensions to look for
 IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tif', '.tiff', '.webp'}
@@ -121,15 +125,8 @@ FAMILY_SUBFOLDER_MAPPING = {
 }
 
 def get_file_hash(filepath):
-    """Calculate MD5 hash of a file for duplicate detection."""
-    hash_md5 = hashlib.md5()
-    try:
-        with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
-    except:
-        return None
+    """MD5 of a file for duplicate detection (cached in the hash index, see hash_index.py)."""
+    return get_index().digest(filepath)
 
 def is_image_file(filepath):
     """Check if file is an image based on extension."""
@@ -143,12 +140,13 @@ def delete_junk_folders():
     # Delete top-level junk folders
     for folder_name in FOLDERS_TO_DELETE:
         folder_path = OLD_SITE_BASE / folder_name
-        if folder_path.exists() and folder_path.is_dir():
+        tree = get_tree(folder_path)
+        if tree.exists():
             try:
-                for f in folder_path.rglob('*'):
-                    if f.is_file():
-                        deleted_size += f.stat().st_size
+                size = tree.size()
                 shutil.rmtree(folder_path)
+                tree.forget(folder_path)
+                deleted_size += size
                 deleted_count += 1
                 print(f"    Deleted: {folder_name}/")
             except Exception as e:
@@ -156,42 +154,76 @@ def delete_junk_folders():
     
     # Also delete _vti_cnf subfolders inside content folders
     for folder_name in OLD_WEBSITE_FOLDERS:
-        folder_path = OLD_SITE_BASE / folder_name
-        if folder_path.exists() and folder_name not in FOLDERS_TO_DELETE:
-            for root, dirs, files in os.walk(folder_path, topdown=False):
-                for dir_name in dirs:
-                    if dir_name in FOLDERS_TO_DELETE or dir_name.startswith('_vti'):
-                        dir_path = Path(root) / dir_name
-                        try:
-                            for f in dir_path.rglob('*'):
-                                if f.is_file():
-                                    deleted_size += f.stat().st_size
-                            shutil.rmtree(dir_path)
-                            deleted_count += 1
-                        except:
-                            pass
+        tree = get_tree(OLD_SITE_BASE / folder_name)
+        if tree.exists() and folder_name not in FOLDERS_TO_DELETE:
+            # Deepest first, so a junk folder inside a junk folder goes first
+            for dir_path in list(tree.folders()):
+                if dir_path.name in FOLDERS_TO_DELETE or dir_path.name.startswith('_vti'):
+                    try:
+                        size = tree.size(dir_path)
+                        shutil.rmtree(dir_path)
+                        tree.forget(dir_path)
+                        deleted_size += size
+                        deleted_count += 1
+                    except:
+                        pass
     
     print(f"  Total deleted: {deleted_count} junk folders ({deleted_size / (1024*1024):.1f} MB)")
     return deleted_count, deleted_size
 
+def extract_site_metadata():
+    """Crawl the backup's own HTML (no network) for image captions and metadata.
+    
+    Must run before delete_junk_files(), which removes every .htm.
+    Writes the same *.json files as a live scrape_site.py run, but to
+    OLD_SITE_DATA_PATH with its own crawl journal, so the live scrape's
+    data and resume state are left alone. An interrupted crawl is resumed
+    on the next run.
+    
+    Returns True only if every page in the backup was read - main() must
+    not delete any HTML otherwise.
+    """
+    if not any(OLD_SITE_BASE.glob('*.htm')):
+        print("  No .htm pages left in the backup - skipping")
+        return True
+    
+    # Imported here so the rest of the migration needs nothing beyond the stdlib
+    from scrape_site import SiteScraper
+    from crawl_journal import load_journal
+    from local_site import LocalSiteAdapter
+    
+    journal_path = OLD_SITE_DATA_PATH / "crawl_journal.jsonl"
+    resume = journal_path.exists() and not load_journal(journal_path).done
+    scraper = SiteScraper(site_dir=OLD_SITE_BASE, data_dir=OLD_SITE_DATA_PATH, journal_path=journal_path)
+    scraper.run(download=False, resume=resume)
+    
+    if not load_journal(journal_path).done:
+        print("  Metadata extraction did not finish")
+        return False
+    # Links to pages that aren't in the backup fail too - nothing to lose there
+    adapter = LocalSiteAdapter(OLD_SITE_BASE)
+    unread = [url for url in dict.fromkeys(scraper.failed_urls) if adapter.resolve(url)]
+    for url in unread:
+        print(f"  Could not read: {url}")
+    return not unread
+
 def delete_junk_files():
     """Delete HTML, CSS, JS and other non-image files from old website folders."""
     deleted_count = 0
     deleted_size = 0
     
     for folder_name in OLD_WEBSITE_FOLDERS:
-        folder_path = OLD_SITE_BASE / folder_name
-        if folder_path.exists() and folder_path.is_dir() and folder_name not in FOLDERS_TO_DELETE:
-            for file_path in folder_path.rglob('*'):
-                if file_path.is_file():
-                    ext = file_path.suffix.lower()
-                    if ext in FILES_TO_DELETE:
-                        try:
-                            deleted_size += file_path.stat().st_size
-                            file_path.unlink()
-                            deleted_count += 1
-                        except:
-                            pass
+        tree = get_tree(OLD_SITE_BASE / folder_name)
+        if tree.exists() and folder_name not in FOLDERS_TO_DELETE:
+            for entry in list(tree.files()):
+                if entry.path.suffix.lower() in FILES_TO_DELETE:
+                    try:
+                        entry.path.unlink()
+                        tree.forget(entry.path)
+                        deleted_size += entry.size
+                        deleted_count += 1
+                    except:
+                        pass
     
     print(f"  Deleted {deleted_count} junk files ({deleted_size / (1024*1024):.1f} MB)")
     return deleted_count, deleted_size
@@ -201,13 +233,11 @@ def scan_existing_images(new_images_path):
     existing_hashes = {}
     existing_names = set()
     
-    if new_images_path.exists():
-        for img_path in new_images_path.rglob('*'):
-            if img_path.is_file() and is_image_file(img_path):
-                file_hash = get_file_hash(img_path)
-                if file_hash:
-                    existing_hashes[file_hash] = img_path
-                existing_names.add(img_path.name.lower())
+    image_paths = [entry.path for entry in get_tree(new_images_path).files() if is_image_file(entry.path)]
+    for img_path, file_hash in get_index().digest_many(image_paths).items():
+        if file_hash:
+            existing_hashes[file_hash] = img_path
+        existing_names.add(img_path.name.lower())
     
     return existing_hashes, existing_names
 
@@ -218,13 +248,15 @@ def find_all_images():
     
     for folder_name in OLD_WEBSITE_FOLDERS:
         folder_path = OLD_SITE_BASE / folder_name
+        tree = get_tree(folder_path)
         
         # Skip junk folders and non-existent folders
-        if not folder_path.exists() or folder_name in FOLDERS_TO_DELETE:
+        if not tree.exists() or folder_name in FOLDERS_TO_DELETE:
             continue
             
-        for img_path in folder_path.rglob('*'):
-            if img_path.is_file() and is_image_file(img_path):
+        for entry in tree.files():
+            img_path = entry.path
+            if is_image_file(img_path):
                 # Determine category based on path
                 rel_path = img_path.relative_to(folder_path)
                 parts = rel_path.parts
@@ -267,8 +299,9 @@ def copy_images_to_new_site(images_by_category, existing_hashes, existing_names,
         print(f"Category: {category} ({len(image_paths)} images)")
         print(f"{'='*50}")
         
+        hashes = get_index().digest_many(image_paths)
         for img_path in image_paths:
-            file_hash = get_file_hash(img_path)
+            file_hash = hashes[img_path]
             file_name = img_path.name.lower()
             
             # Check for duplicate by hash
@@ -312,7 +345,7 @@ def print_summary(images_by_category):
         count = len(images)
         total += count
         # Calculate total size
-        size = sum(img.stat().st_size for img in images if img.exists())
+        size = sum(entry.size for entry in map(lookup, images) if entry)
         size_mb = size / (1024 * 1024)
         print(f"  {category:20s}: {count:5d} images ({size_mb:.1f} MB)")
     
@@ -329,8 +362,11 @@ def main():
         print(f"ERROR: Base path not found: {OLD_SITE_BASE}")
         return
     
+    # Walk every folder the steps below look at, once and in parallel
+    trees = scan_trees([OLD_SITE_BASE / f for f in OLD_WEBSITE_FOLDERS + FOLDERS_TO_DELETE] + [NEW_IMAGES_PATH])
+    
     # Check if old website folders exist
-    found_folders = [f for f in OLD_WEBSITE_FOLDERS if (OLD_SITE_BASE / f).exists()]
+    found_folders = [f for f in OLD_WEBSITE_FOLDERS if trees[OLD_SITE_BASE / f].exists()]
     print(f"\nFound {len(found_folders)} old website folders on Desktop")
     print(f"New site path: {NEW_SITE_PATH}")
     
@@ -338,21 +374,27 @@ def main():
     print("\n[STEP 1] Cleaning up junk folders...")
     deleted_count, deleted_size = delete_junk_folders()
     
-    # Step 2: Delete junk files (HTML, CSS, etc.)
-    print("\n[STEP 2] Cleaning up junk files (HTML, CSS, JS)...")
+    # Step 2: Extract captions/metadata from the HTML while it still exists
+    print("\n[STEP 2] Extracting image metadata from the old HTML...")
+    if not extract_site_metadata():
+        print("\nABORTED before deleting any HTML - run the migration again to finish the extraction")
+        return
+    
+    # Step 3: Delete junk files (HTML, CSS, etc.)
+    print("\n[STEP 3] Cleaning up junk files (HTML, CSS, JS)...")
     delete_junk_files()
     
-    # Step 3: Scan existing images in new site
-    print("\n[STEP 3] Scanning existing images in new site...")
+    # Step 4: Scan existing images in new site
+    print("\n[STEP 4] Scanning existing images in new site...")
     existing_hashes, existing_names = scan_existing_images(NEW_IMAGES_PATH)
-    print(f"  Found {len(existing_names)} existing images")
+    print(f"  Found {len(existing_names)} existing images ({get_index().summary()})")
     
-    # Step 4: Find all images in old site
-    print("\n[STEP 4] Finding images in old site...")
+    # Step 5: Find all images in old site
+    print("\n[STEP 5] Finding images in old site...")
     images_by_category = find_all_images()
     print_summary(images_by_category)
     
-    # Step 5: Ask user what to do
+    # Step 6: Ask user what to do
     print("\n" + "="*60)
     print("WHAT WOULD YOU LIKE TO DO?")
     print("="*60)
@@ -0,0 +1,186 @@
+"""
+Perceptual near-duplicate detection for the dedupe scripts
+
+find_duplicates.py's file hashes only catch byte-identical copies; most of
+our real duplicates are re-encodes and resized copies (M74_LRGB_BBO.jpg vs
+M74_LRGB_BBO_orig.jpg). Here every image gets two 64-bit perceptual hashes
+that survive re-encoding and resizing:
+1. Each image is decoded once at reduced size (JPEG draft mode) to a small
+   grayscale thumbnail, in a thread pool
+2. Whole batches are hashed with NumPy: dHash compares neighbouring pixels
+   of a 9x8 thumbnail; pHash keeps the signs of the low 8x8 DCT frequencies
+   of a 32x32 one against their median
+3. Hashes are cached in the hash index (hash_index.py) under the file's
+   size/mtime/inode, so a re-run only decodes new or changed images
+4. A BK-tree over the pHashes answers "everything within N bits" without
+   comparing every pair; a match must also be close in dHash, and matches
+   are joined into groups
+
+Needs numpy and Pillow (requirements.txt); only this module imports them.
+
+Usage:
+    from perceptual_hash import near_duplicate_groups
+    for group in near_duplicate_groups(image_paths):
+        print([p.name for p in group])
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from hash_index import HASH_WORKERS, get_index
+
+PERCEPTUAL_ALGO = "phash+dhash"  # key in the hash index: 16 hex pHash + 16 hex dHash
+PHASH_SIZE = 32
+DHASH_SIZE = 8
+BATCH_SIZE = 256
+# Max differing bits (of 64) for two images to count as the same picture -
+# catches M74_LRGB_BBO_orig (6 / 10 bits). Shots of one field through other
+# filters (Arp319 L vs RGB: 6 / 3) can land inside too, so matches are
+# candidates for review, not proof - callers must not delete on them
+# without asking first
+PHASH_RADIUS = 7
+DHASH_RADIUS = 11
+
+
+def dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix: dct(x) = M @ x"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix.astype(np.float32)
+
+
+DCT = dct_matrix(PHASH_SIZE)
+
+
+def thumbnails(path) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """(32x32, 8x9) grayscale thumbnails of an image, or None if it can't be decoded"""
+    try:
+        with Image.open(path) as img:
+            img.draft('L', (PHASH_SIZE * 2, PHASH_SIZE * 2))  # JPEG: decode at 1/2..1/8 scale
+            gray = img.convert('L')
+            big = gray.resize((PHASH_SIZE, PHASH_SIZE), Image.Resampling.LANCZOS)
+            small = gray.resize((DHASH_SIZE + 1, DHASH_SIZE), Image.Resampling.LANCZOS)
+            return np.asarray(big, dtype=np.float32), np.asarray(small, dtype=np.float32)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def pack(bits: np.ndarray) -> np.ndarray:
+    """(N, 8, 8) booleans -> N 64-bit integers"""
+    return np.packbits(bits.reshape(len(bits), -1), axis=1).view('>u8').ravel()
+
+
+def phash_batch(big: np.ndarray) -> np.ndarray:
+    coeffs = (DCT @ big @ DCT.T)[:, :8, :8].reshape(len(big), -1)
+    # The DC term is left out of the median - it only measures brightness
+    median = np.median(coeffs[:, 1:], axis=1, keepdims=True)
+    return pack((coeffs > median).reshape(-1, 8, 8))
+
+
+def dhash_batch(small: np.ndarray) -> np.ndarray:
+    return pack(small[:, :, 1:] > small[:, :, :-1])
+
+
+def compute_hashes(paths: List[str]) -> List[Optional[str]]:
+    """Index values (pHash + dHash as hex) of images, None for unreadable ones"""
+    values = [None] * len(paths)
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as executor:
+        for start in range(0, len(paths), BATCH_SIZE):
+            batch = executor.map(thumbnails, paths[start:start + BATCH_SIZE])
+            loaded = [(start + i, thumbs) for i, thumbs in enumerate(batch) if thumbs is not None]
+            if not loaded:
+                continue
+            phashes = phash_batch(np.stack([big for _, (big, _) in loaded]))
+            dhashes = dhash_batch(np.stack([small for _, (_, small) in loaded]))
+            for (i, _), p, d in zip(loaded, phashes, dhashes):
+                values[i] = f"{int(p):016x}{int(d):016x}"
+    return values
+
+
+def perceptual_hashes(paths: Iterable) -> Dict[object, Tuple[int, int]]:
+    """{path: (pHash, dHash)} for every image that could be decoded"""
+    values = get_index().cached_many(paths, PERCEPTUAL_ALGO, compute_hashes)
+    return {path: (int(value[:16], 16), int(value[16:], 16)) for path, value in values.items() if value}
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def is_match(a: Tuple[int, int], b: Tuple[int, int], radius: int = PHASH_RADIUS,
+             dhash_radius: int = DHASH_RADIUS) -> bool:
+    """Whether two (pHash, dHash) pairs count as the same picture"""
+    return hamming(a[0], b[0]) <= radius and hamming(a[1], b[1]) <= dhash_radius
+
+
+class BKTree:
+    """Metric tree over 64-bit hashes for Hamming-radius queries.
+
+    Each child sits at its exact distance from the parent, so by the
+    triangle inequality a query only descends into children within
+    `radius` of its own distance - a small part of the tree for small radii.
+    """
+
+    def __init__(self):
+        self.root = None  # node: (hash, items, {distance: child})
+
+    def add(self, value: int, item):
+        if self.root is None:
+            self.root = (value, [item], {})
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, [item], {})
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, object]]:
+        """(distance, item) of everything within `radius` bits"""
+        found = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                found.extend((distance, item) for item in node[1])
+            stack.extend(child for d, child in node[2].items() if distance - radius <= d <= distance + radius)
+        return found
+
+
+def near_duplicate_groups(paths: Iterable, radius: int = PHASH_RADIUS,
+                          dhash_radius: int = DHASH_RADIUS) -> List[List]:
+    """Groups of images that show the same picture (each group sorted, > 1 image)"""
+    hashes = perceptual_hashes(paths)
+    tree = BKTree()
+    for path, (phash, _) in hashes.items():
+        tree.add(phash, path)
+
+    # Union-find over every matching pair
+    parent = {path: path for path in hashes}
+
+    def root(path):
+        while parent[path] != path:
+            parent[path] = parent[parent[path]]
+            path = parent[path]
+        return path
+
+    for path, (phash, dhash) in hashes.items():
+        for _, other in tree.search(phash, radius):
+            if other != path and is_match(hashes[path], hashes[other], radius, dhash_radius):
+                parent[root(other)] = root(path)
+
+    groups = {}
+    for path in hashes:
+        groups.setdefault(root(path), []).append(path)
+    return [sorted(group, key=str) for group in groups.values() if len(group) > 1]
@@ -0,0 +1,153 @@
+"""
+Fetch -> parse -> persist pipeline crawl engine for SiteScraper
+
+Splits each page's work into stages joined by queues, so network I/O and
+CPU-bound parsing overlap instead of alternating:
+1. Fetch: a pool of threads downloads page bytes (I/O-bound)
+2. Parse/extract: a process pool runs the HTML parser plus the metadata
+   extraction (detect_category, detect_filters, ...) on every core
+3. Persist: the main thread merges image records, writes the journal and
+   output stream and queues newly found links back to the fetchers
+
+The queue between fetch and parse is bounded, and so is the number of pages
+inside the process pool. When the parsers fall behind, the fetchers block
+instead of piling up page bodies in memory.
+
+The parser processes are spawned (fresh interpreters), never forked from
+the threaded crawler, so a script driving the pipeline needs the usual
+`if __name__ == "__main__":` guard.
+
+Usage: python scrape_site.py --pipeline [--workers 8] [--parsers N]
+"""
+
+import os
+import queue
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict
+from typing import Optional
+
+from html_extract import extract_page
+from url_utils import url_key
+
+DEFAULT_FETCHERS = 8
+DEFAULT_PARSERS = os.cpu_count() or 2
+QUEUE_PAGES = 2  # fetched-but-unparsed pages buffered per parser process
+
+_extractor = None
+
+
+def parse_worker(url: str, content: bytes, parser: str):
+    """Runs in a worker process: parse a page and build its image records"""
+    global _extractor
+    if _extractor is None:
+        # The extraction methods are stateless, so a bare instance (no session,
+        # no output folders) is all a worker needs
+        from scrape_site import SiteScraper
+        _extractor = object.__new__(SiteScraper)
+    images, links = _extractor.page_records(url, extract_page(content, parser))
+    # Plain dicts pickle the same whichever module the parent ran as
+    return [asdict(image) for image in images], links
+
+
+class PipelineCrawler:
+    def __init__(self, scraper, fetchers: int = DEFAULT_FETCHERS, parsers: Optional[int] = None):
+        self.scraper = scraper
+        self.fetchers = max(1, fetchers)
+        self.parsers = max(1, parsers or DEFAULT_PARSERS)
+        self.frontier = queue.Queue()                                    # urls to fetch
+        self.fetched = queue.Queue(maxsize=self.parsers * QUEUE_PAGES)   # (url, bytes) to parse
+        self.done = queue.Queue()                                        # (url, future or None)
+        self.in_pool = threading.BoundedSemaphore(self.parsers * QUEUE_PAGES)
+        self.scraped = 0
+
+    def fetch_stage(self):
+        """Fetcher thread: frontier -> fetched (blocks when the parsers fall behind)"""
+        while True:
+            url = self.frontier.get()
+            if url is None:
+                return
+            self.fetched.put((url, self.scraper.fetch_html(url)))
+
+    def parse_stage(self, pool: ProcessPoolExecutor):
+        """Dispatcher thread: fetched -> process pool -> done"""
+        while True:
+            item = self.fetched.get()
+            if item is None:
+                return
+            url, content = item
+            if content is None:
+                self.done.put((url, None))
+                continue
+            self.in_pool.acquire()
+            try:
+                future = pool.submit(parse_worker, url, content, self.scraper.parser)
+            except Exception as e:
+                # e.g. BrokenProcessPool after a worker died - the page fails,
+                # the crawl goes on (persist() reports it like a parse error)
+                self.in_pool.release()
+                future = Future()
+                future.set_exception(e)
+                self.done.put((url, future))
+                continue
+            future.add_done_callback(lambda f, url=url: (self.in_pool.release(), self.done.put((url, f))))
+
+    def enqueue(self, url: str) -> bool:
+        key = url_key(url)
+        if key in self.scraper.visited_urls:
+            return False
+        self.scraper.visited_urls.add(key)
+        self.frontier.put(url)
+        return True
+
+    def persist(self, url: str, future) -> int:
+        """Main thread: store one parsed page; returns how many pages it queued"""
+        self.scraped += 1
+        if future is None:
+            self.scraper.finish_page(url, False)
+            return 0
+        try:
+            records, links = future.result()
+        except Exception as e:
+            print(f"    Error parsing {url}: {e}")
+            self.scraper.failed_urls.append(url)
+            self.scraper.finish_page(url, False)
+            return 0
+
+        print(f"\n[{self.scraped}/{len(self.scraper.discovered_pages)}] Scraped: {url}")
+        images = [self.scraper.restore_image(record) for record in records]
+        queued = sum(self.enqueue(new_url) for new_url in self.scraper.persist_page(url, images, links))
+        self.scraper.finish_page(url, True)
+        return queued
+
+    def run(self):
+        """Scrape every discovered page (and everything they link to)"""
+        print(f"\n=== Scraping Pages (pipeline, {self.fetchers} fetchers, {self.parsers} parser processes) ===")
+
+        pending = sum(self.enqueue(url) for url in list(self.scraper.discovered_pages.values()))
+
+        # Spawned, not forked: the pool starts its workers on the first submit,
+        # when the fetcher threads already hold requests/urllib3/rate locks, and
+        # a child forked then can inherit a lock that is never released
+        pool = ProcessPoolExecutor(max_workers=self.parsers, mp_context=multiprocessing.get_context('spawn'))
+        threads = [threading.Thread(target=self.fetch_stage, daemon=True) for _ in range(self.fetchers)]
+        threads.append(threading.Thread(target=self.parse_stage, args=(pool,), daemon=True))
+        for thread in threads:
+            thread.start()
+        try:
+            while pending:
+                url, future = self.done.get()
+                pending += self.persist(url, future) - 1
+        finally:
+            if pending:
+                # Interrupted - stages may be blocked on full queues; they are
+                # daemon threads, so just stop feeding them
+                pool.shutdown(wait=False, cancel_futures=True)
+            else:
+                for _ in range(self.fetchers):
+                    self.frontier.put(None)
+                self.fetched.put(None)
+                for thread in threads:
+                    thread.join()
+                pool.shutdown()
@@ -0,0 +1,155 @@
+"""
+Adaptive per-host politeness controller
+
+Replaces the fixed time.sleep(0.5) between requests. Each host gets an
+AIMD (additive increase, multiplicative decrease) controller:
+- While responses are fast and healthy, the allowed concurrency creeps up
+  (+1 per "round" of requests) and the spacing between request starts
+  shrinks towards zero
+- On 429/5xx, connection errors or latency well above the host's baseline,
+  concurrency is halved and the spacing doubled (Retry-After is honoured)
+- An optional token bucket caps bytes/second for large image transfers
+
+Usage:
+    rate = RateController(max_concurrency=4, bytes_per_sec=500_000)
+    with rate.slot(url) as slot:
+        response = session.get(url)
+        slot.status = response.status_code
+        slot.latency = response.elapsed.total_seconds()
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlparse
+
+DEFAULT_MAX_CONCURRENCY = 4
+INITIAL_CONCURRENCY = 2
+INITIAL_DELAY = 0.25      # seconds between request starts until the host proves healthy
+MAX_DELAY = 30.0
+TARGET_LATENCY = 2.0      # seconds; slower than this (or 3x baseline) counts as strain
+EWMA_WEIGHT = 0.3
+
+
+class SlotOutcome:
+    """Filled in by the caller so the controller can learn from the response"""
+
+    def __init__(self):
+        self.status: Optional[int] = None    # HTTP status; None means the request failed
+        self.latency: Optional[float] = None  # seconds to response headers
+        self.retry_after: Optional[float] = None
+
+
+class HostController:
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 bytes_per_sec: Optional[float] = None, initial_delay: float = INITIAL_DELAY):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(min(INITIAL_CONCURRENCY, self.max_concurrency))
+        self.delay = initial_delay
+        self.in_flight = 0
+        self.next_start = 0.0
+        self.latency = None       # EWMA of response latency
+        self.baseline = None      # fastest latency seen
+        self.cond = threading.Condition()
+
+        # Token bucket (bytes); None = unlimited
+        self.bytes_per_sec = bytes_per_sec
+        self.tokens = bytes_per_sec or 0.0
+        self.refilled = time.monotonic()
+
+    def acquire(self):
+        """Block until this host may take another request"""
+        with self.cond:
+            while True:
+                now = time.monotonic()
+                if self.in_flight < int(self.limit) and now >= self.next_start:
+                    break
+                wait = self.next_start - now if self.in_flight < int(self.limit) else None
+                self.cond.wait(wait)
+            self.in_flight += 1
+            self.next_start = now + self.delay
+
+    def release(self, outcome: SlotOutcome):
+        """Finish a request and adapt limits to how it went"""
+        with self.cond:
+            self.in_flight -= 1
+
+            if outcome.latency is not None:
+                self.latency = outcome.latency if self.latency is None else (
+                    EWMA_WEIGHT * outcome.latency + (1 - EWMA_WEIGHT) * self.latency)
+                self.baseline = outcome.latency if self.baseline is None else min(self.baseline, outcome.latency)
+
+            status = outcome.status
+            overloaded = status is None or status == 429 or status >= 500
+            slow = self.latency is not None and self.latency > max(TARGET_LATENCY, 3 * (self.baseline or 0))
+
+            if overloaded:
+                self.limit = max(1.0, self.limit / 2)
+                self.delay = min(MAX_DELAY, max(self.delay * 2, INITIAL_DELAY))
+                if outcome.retry_after:
+                    self.next_start = max(self.next_start, time.monotonic() + outcome.retry_after)
+            elif slow:
+                self.limit = max(1.0, self.limit * 0.75)
+                self.delay = min(MAX_DELAY, max(self.delay * 1.5, 0.1))
+            else:
+                # +1 concurrency per full window of healthy responses
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+                self.delay = self.delay * 0.8 if self.delay > 0.01 else 0.0
+
+            self.cond.notify_all()
+
+    def throttle(self, nbytes: int):
+        """Token bucket: sleep until nbytes may be transferred"""
+        if not self.bytes_per_sec:
+            return
+        with self.cond:
+            now = time.monotonic()
+            self.tokens = min(self.bytes_per_sec, self.tokens + (now - self.refilled) * self.bytes_per_sec)
+            self.refilled = now
+            self.tokens -= nbytes
+            wait = -self.tokens / self.bytes_per_sec if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class RateController:
+    """One HostController per host, created on first use"""
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 bytes_per_sec: Optional[float] = None, initial_delay: float = INITIAL_DELAY):
+        self.max_concurrency = max_concurrency
+        self.bytes_per_sec = bytes_per_sec
+        self.initial_delay = initial_delay  # 0 for archives and local backups
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def for_url(self, url: str) -> HostController:
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = HostController(self.max_concurrency, self.bytes_per_sec, self.initial_delay)
+            return self.hosts[host]
+
+    @contextmanager
+    def slot(self, url: str):
+        """Hold one request slot for url's host; fill in the yielded outcome"""
+        host = self.for_url(url)
+        host.acquire()
+        outcome = SlotOutcome()
+        started = time.monotonic()
+        try:
+            yield outcome
+        finally:
+            if outcome.latency is None and outcome.status is not None:
+                outcome.latency = time.monotonic() - started
+            host.release(outcome)
+
+    def throttle(self, url: str, nbytes: int):
+        self.for_url(url).throttle(nbytes)
+
+
+def retry_after_seconds(response) -> Optional[float]:
+    """Parse a numeric Retry-After header"""
+    value = response.headers.get('Retry-After', '')
+    return float(value) if value.isdigit() else None
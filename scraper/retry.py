@@ -0,0 +1,206 @@
+"""
+Shared retry policy, per-host circuit breaker and failed-download log
+
+Every page fetch and image download goes through one Retrier:
+1. Transient failures (connection errors, timeouts, 408/425/429/5xx) are
+   retried with exponential backoff and full jitter; Retry-After wins when
+   the server sends one
+2. A per-host circuit breaker opens after BREAKER_THRESHOLD failures in a
+   row, so a dead host fails fast instead of eating every retry; after
+   BREAKER_COOLDOWN seconds a single trial request is let through
+3. Downloads that still fail are appended to failed_downloads.jsonl, which
+   `python scrape_site.py --retry-failed` replays (together with
+   failed_urls.json) without a full recrawl
+
+Usage:
+    from retry import get_retrier
+    response = get_retrier().call(url, lambda: session.get(url, timeout=30),
+                                  retryable=response_retryable)
+"""
+
+import json
+import time
+import random
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, TypeVar
+from urllib.parse import urlparse
+
+import requests
+
+from rate_control import retry_after_seconds
+
+T = TypeVar('T')
+
+MAX_ATTEMPTS = 4
+BASE_DELAY = 1.0          # seconds before the first retry
+MAX_BACKOFF = 30.0
+BREAKER_THRESHOLD = 5     # consecutive failures before a host is cut off
+BREAKER_COOLDOWN = 60.0   # seconds before a trial request is allowed again
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+FAILED_DOWNLOADS_PATH = Path(__file__).parent / "failed_downloads.jsonl"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of sending a request to a host that keeps failing"""
+
+
+class RetryPolicy:
+    def __init__(self, attempts: int = MAX_ATTEMPTS, base_delay: float = BASE_DELAY,
+                 max_delay: float = MAX_BACKOFF):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait after failed attempt number `attempt` (1-based)"""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        # Full jitter: uniform in [0, base * 2^(attempt-1)], capped
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """closed -> (threshold failures) -> open -> (cooldown) -> half-open -> closed/open"""
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_running or time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.trial_running = True  # half-open: let one request through
+            return True
+
+    def record(self, ok: bool):
+        with self.lock:
+            self.trial_running = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if self.opened_at is not None or self.failures >= self.threshold:
+                    self.opened_at = time.monotonic()
+
+
+def error_retryable(error: Exception) -> bool:
+    """Connection problems, timeouts and retryable HTTP errors"""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRYABLE_STATUS
+    return False
+
+
+def response_retryable(response) -> bool:
+    return response.status_code in RETRYABLE_STATUS
+
+
+class Retrier:
+    def __init__(self, policy: RetryPolicy = None, threshold: int = BREAKER_THRESHOLD,
+                 cooldown: float = BREAKER_COOLDOWN):
+        self.policy = policy or RetryPolicy()
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.lock = threading.Lock()
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker(self.threshold, self.cooldown)
+            return self.breakers[host]
+
+    def call(self, url: str, attempt: Callable[[], T],
+             retryable: Optional[Callable[[T], bool]] = None,
+             retry_after: Callable[[T], Optional[float]] = retry_after_seconds) -> T:
+        """Run attempt() until it succeeds, fails permanently or runs out of tries.
+
+        attempt() either returns a result - retried while retryable(result) is
+        true - or raises; only error_retryable() exceptions are retried.
+        Raises CircuitOpen if the host's breaker is open.
+        """
+        breaker = self.breaker(url)
+        for number in range(1, self.policy.attempts + 1):
+            if not breaker.allow():
+                raise CircuitOpen(f"too many failures from {urlparse(url).netloc}, backing off")
+
+            try:
+                result = attempt()
+            except Exception as e:
+                transient = error_retryable(e)
+                breaker.record(not transient)
+                if not transient or number == self.policy.attempts:
+                    raise
+                wait = self.policy.backoff(number)
+            else:
+                transient = retryable is not None and retryable(result)
+                breaker.record(not transient)
+                if not transient or number == self.policy.attempts:
+                    return result
+                wait = self.policy.backoff(number, retry_after(result))
+
+            print(f"    Retrying {url} in {wait:.1f}s (attempt {number + 1}/{self.policy.attempts})")
+            time.sleep(wait)
+
+
+_retrier = None
+
+
+def get_retrier() -> Retrier:
+    """The shared retrier (created on first use)"""
+    global _retrier
+    if _retrier is None:
+        _retrier = Retrier()
+    return _retrier
+
+
+class FailedDownloads:
+    """Append-only log of downloads that failed after all retries"""
+
+    def __init__(self, path: Path = FAILED_DOWNLOADS_PATH):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+
+    def record(self, url: str, output_path: Path, error: Optional[str]):
+        line = json.dumps({'url': url, 'path': str(Path(output_path).resolve()), 'error': error})
+        with self.lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+    def pending(self) -> List[dict]:
+        """Latest entry per URL whose file still doesn't exist"""
+        if not self.path.exists():
+            return []
+        entries = {}
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn line from a crash
+                entries[entry['url']] = entry
+        return [e for e in entries.values() if not Path(e['path']).exists()]
+
+    def rewrite(self, entries: List[dict]):
+        """Replace the log with the entries that are still failing"""
+        with self.lock:
+            if not entries:
+                self.path.unlink(missing_ok=True)
+                return
+            with open(self.path, 'w', encoding='utf-8') as f:
+                for entry in entries:
+                    f.write(json.dumps(entry) + '\n')
+
+
+failed_downloads = FailedDownloads()
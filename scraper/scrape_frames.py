@@ -1,10 +1,16 @@
-import requests
+from http_client import get_session
+from downloads import download_file
+from url_probe import UrlProber
+from url_utils import canonical_url
 from bs4 import BeautifulSoup
 from pathlib import Path
 import sys
 import re
 import urllib.parse
 
+session = get_session()
+prober = UrlProber(session)
+
 if sys.stdout.encoding != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8')
 
@@ -13,7 +19,7 @@ BASE = "https://silverspringastro.com"
 def get_page(url):
     """Fetch a page and return soup."""
     try:
-        r = requests.get(url, timeout=30)
+        r = session.get(url, timeout=30)
         r.raise_for_status()
         return BeautifulSoup(r.content, 'html.parser')
     except Exception as e:
@@ -49,19 +55,14 @@ def download_image(url, output_dir):
     filename = urllib.parse.unquote(filename)
     output_path = output_dir / filename
     
-    if output_path.exists():
+    result = download_file(session, url, output_path, timeout=30)
+    if result.status == 'skipped':
         print(f"    [SKIP] {filename}")
-        return
-    
-    try:
-        r = requests.get(url, timeout=30)
-        r.raise_for_status()
-        with open(output_path, 'wb') as f:
-            f.write(r.content)
+    elif result.ok:
         size_kb = output_path.stat().st_size / 1024
         print(f"    [OK] {filename} ({size_kb:.1f} KB)")
-    except Exception as e:
-        print(f"    [FAIL] {filename}: {e}")
+    else:
+        print(f"    [FAIL] {filename}: {result.error}")
 
 # First, get home.htm
 print("=== Checking home.htm ===")
@@ -104,18 +105,16 @@ test_urls = [
     "family.htm",
 ]
 
+probes = prober.probe(f"{BASE}/{page}" for page in test_urls)
 for page in test_urls:
     url = f"{BASE}/{page}"
-    try:
-        r = requests.head(url, timeout=5)
-        print(f"  {page}: {r.status_code}")
-        if r.status_code == 200:
-            soup = get_page(url)
-            if soup:
-                images = find_all_images(soup, url)
-                print(f"    -> {len(images)} images found")
-    except Exception as e:
+    result = probes[canonical_url(url)]
+    if result.status is None:
         print(f"  {page}: ERROR")
-
-
-
+        continue
+    print(f"  {page}: {result.status}")
+    if result.exists:
+        soup = get_page(url)
+        if soup:
+            images = find_all_images(soup, url)
+            print(f"    -> {len(images)} images found")
@@ -1,12 +1,15 @@
 """
 Scrape and download missing images from silverspringastro.com
 """
-import requests
+from http_client import get_session
+from downloads import download_file
 from bs4 import BeautifulSoup
 from pathlib import Path
 import sys
 import re
 
+session = get_session()
+
 if sys.stdout.encoding != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8')
 
@@ -16,7 +19,7 @@ def scrape_page(url: str):
     """Scrape a page and return all image URLs."""
     print(f"Scraping: {url}")
     try:
-        response = requests.get(url, timeout=30)
+        response = session.get(url, timeout=30)
         response.raise_for_status()
         soup = BeautifulSoup(response.content, 'html.parser')
         
@@ -46,23 +49,15 @@ def download_image(url: str, output_dir: Path):
     filename = url.split('/')[-1].split('?')[0]
     output_path = output_dir / filename
     
-    if output_path.exists():
+    result = download_file(session, url, output_path, timeout=30)
+    if result.status == 'skipped':
         print(f"  [SKIP] {filename}")
-        return True
-    
-    try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
-        
+    elif result.ok:
         size_kb = output_path.stat().st_size / 1024
         print(f"  [OK] {filename} ({size_kb:.1f} KB)")
-        return True
-    except Exception as e:
-        print(f"  [FAIL] {filename}: {e}")
-        return False
+    else:
+        print(f"  [FAIL] {filename}: {result.error}")
+    return result.ok
 
 def main():
     print("=" * 60)
@@ -7,28 +7,57 @@ This script crawls silverspringastro.com to:
 3. Extract metadata (names, descriptions, observatory codes)
 4. Save structured data for the new site
 
-Usage: python scrape_site.py
+Progress is journaled to crawl_journal.jsonl as the crawl runs; after a
+crash or Ctrl-C, --resume carries on where the previous run stopped.
+Transient errors are retried with backoff (see retry.py); --retry-failed
+later replays just the pages and downloads that still failed.
+
+--record archives the crawl to a WARC file and --replay re-runs extraction
+from it offline (see warc.py). --site-dir crawls a local backup of the old
+site instead (see local_site.py).
+
+Requests are paced per host by rate_control.RateController, which backs off
+on 429/5xx/slow responses and speeds up again while the server is healthy.
+
+Usage: python scrape_site.py [--async | --pipeline [--parsers N]] [--workers N] [--per-host N] [--download-workers N]
+                             [--parser lxml|html.parser] [--resume] [--max-rate-kbps N]
+                             [--retry-failed] [--record WARC | --replay WARC | --site-dir DIR]
+                             [--no-download]
 """
 
 import os
-import re
 import json
-import time
-import requests
+import argparse
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
 from pathlib import Path
-from dataclasses import dataclass, asdict
-from typing import Optional, List, Set
+from dataclasses import dataclass
+from typing import Optional, List, Set, Dict
 import hashlib
 
+from async_crawl import AsyncCrawler, DEFAULT_WORKERS
+from pipeline import PipelineCrawler
+from url_utils import canonical_url, url_key, is_site_url
+from url_probe import UrlProber, ProbeCache
+from local_site import LocalSiteAdapter
+from image_registry import ImageRegistry
+from http_client import get_session, PooledSession, HEADERS
+from downloads import download_file
+from download_plan import linked_image, plan_downloads
+from download_scheduler import DownloadScheduler, DEFAULT_WORKERS as DEFAULT_DOWNLOAD_WORKERS
+import classify
+from html_extract import extract_page, ImageTag, PageExtract, BACKENDS, DEFAULT_BACKEND
+from crawl_journal import CrawlJournal, JournalState, load_journal
+from image_writer import ImageStreamWriter
+from retry import get_retrier, response_retryable, failed_downloads
+from rate_control import RateController, INITIAL_DELAY, retry_after_seconds, DEFAULT_MAX_CONCURRENCY as DEFAULT_PER_HOST
+
 # Configuration
 BASE_URL = "https://silverspringastro.com"
 OUTPUT_DIR = Path("../public/images")
 DATA_DIR = Path("../src/data/scraped")
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-}
+JOURNAL_PATH = Path("crawl_journal.jsonl")
+IMAGES_STREAM_PATH = DATA_DIR / "images_raw.jsonl"
+FAILED_URLS_PATH = DATA_DIR / "failed_urls.json"
 
 # Known page patterns from the original site
 KNOWN_PAGES = [
@@ -48,9 +77,9 @@ KNOWN_PAGES = [
 ]
 
 
-@dataclass
+@dataclass(slots=True)
 class ScrapedImage:
-    """Represents a scraped astronomy image"""
+    """Represents a scraped astronomy image (slotted - no per-record __dict__)"""
     url: str
     filename: str
     local_path: str
@@ -66,17 +95,39 @@ class ScrapedImage:
 
 
 class SiteScraper:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(HEADERS)
-        self.visited_urls: Set[str] = set()
-        self.discovered_pages: Set[str] = set()
-        self.images: List[ScrapedImage] = []
+    def __init__(self, parser: str = DEFAULT_BACKEND, site_dir: Optional[Path] = None,
+                 data_dir: Optional[Path] = None, journal_path: Optional[Path] = None):
+        self.parser = parser  # html_extract backend name
+        self.session = get_session(HEADERS)  # pooled keep-alive + on-disk revalidation cache
+        self.site_dir = site_dir  # local backup of the old site to crawl instead of the network
+        # Where the JSON output and crawl journal go (default: the live site's)
+        self.data_dir = Path(data_dir) if data_dir else DATA_DIR
+        self.stream_path = self.data_dir / IMAGES_STREAM_PATH.name if data_dir else IMAGES_STREAM_PATH
+        self.failed_urls_path = self.data_dir / FAILED_URLS_PATH.name if data_dir else FAILED_URLS_PATH
+        self.journal_path = Path(journal_path) if journal_path else JOURNAL_PATH
+        self.probe_cache = ProbeCache()
+        if site_dir:
+            # A session of our own - the backup adapter must not leak into
+            # get_session() for everything else running in this process
+            self.session = PooledSession(headers=HEADERS)
+            # Every spelling of the site URL resolves against the backup folder
+            adapter = LocalSiteAdapter(site_dir)
+            for prefix in ("https://silverspringastro.com/", "http://silverspringastro.com/",
+                           "https://www.silverspringastro.com/", "http://www.silverspringastro.com/"):
+                self.session.mount(prefix, adapter)
+            self.probe_cache = ProbeCache(None)  # don't mix backup 404s into the live cache
+        self.visited_urls: Set[str] = set()        # url_key() of every page fetched
+        self.discovered_pages: Dict[str, str] = {}  # url_key() -> canonical URL
+        self.images = ImageRegistry()  # canonical URL -> ScrapedImage
         self.failed_urls: List[str] = []
+        self.journal: Optional[CrawlJournal] = None
+        self.writer: Optional[ImageStreamWriter] = None
+        self.rate = RateController(DEFAULT_PER_HOST)  # adaptive per-host pacing
+        self.retry = get_retrier()  # backoff + per-host circuit breaker
         
         # Create output directories
         OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
         
         # Category subdirectories
         for cat in ["galaxies", "galaxy-clusters", "star-clusters", "nebulae", 
@@ -84,59 +135,116 @@ class SiteScraper:
             (OUTPUT_DIR / cat).mkdir(exist_ok=True)
             (OUTPUT_DIR / cat / "thumbs").mkdir(exist_ok=True)
 
-    def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
+    def add_page(self, url: str) -> Optional[str]:
+        """Add a page to the frontier; returns its canonical URL if it is new"""
+        key = url_key(url)
+        if key in self.discovered_pages:
+            return None
+        self.discovered_pages[key] = canonical_url(url)
+        if self.journal:
+            self.journal.page(self.discovered_pages[key])
+        return self.discovered_pages[key]
+
+    def finish_page(self, url: str, ok: bool):
+        """Record that a page has been fully processed (or failed)"""
+        if self.journal:
+            self.journal.visited(url, ok)
+
+    def resume_from(self, state: JournalState):
+        """Restore the frontier, visited pages and images from a crawl journal"""
+        for url in state.pages:
+            self.add_page(url)
+        for url, ok in state.visited.items():
+            self.visited_urls.add(url_key(url))
+            if not ok:
+                self.failed_urls.append(url)
+        for record in state.images.values():
+            self.images.add(self.restore_image(record))
+
+    def restore_image(self, record: dict) -> ScrapedImage:
+        """Rebuild an image record from its dict form (journal, worker processes)"""
+        return ScrapedImage(**record)
+
+    def fetch_page(self, url: str) -> Optional[PageExtract]:
         """Fetch and parse a page"""
-        if url in self.visited_urls:
+        key = url_key(url)
+        if key in self.visited_urls:
             return None
         
-        self.visited_urls.add(url)
+        self.visited_urls.add(key)
+        content = self.fetch_html(url)
+        if content is None:
+            return None
+        return self.parse_html(content)
+
+    def fetch_html(self, url: str) -> Optional[bytes]:
+        """Fetch the raw bytes of a page (safe to call from worker threads)"""
         print(f"  Fetching: {url}")
         
         try:
-            response = self.session.get(url, timeout=30)
+            response = self.retry.call(url, lambda: self.fetch_once(url), retryable=response_retryable)
             response.raise_for_status()
-            return BeautifulSoup(response.content, 'html.parser')
+            return response.content
         except Exception as e:
             print(f"    Error fetching {url}: {e}")
             self.failed_urls.append(url)
             return None
 
+    def fetch_once(self, url: str):
+        """One GET, holding a rate-controller slot for the host"""
+        with self.rate.slot(url) as slot:
+            response = self.session.get(url, timeout=30)
+            slot.status = response.status_code
+            slot.latency = response.elapsed.total_seconds()
+            slot.retry_after = retry_after_seconds(response)
+        return response
+
+    def parse_html(self, content: bytes) -> PageExtract:
+        """Pull images, links and frames out of page bytes"""
+        return extract_page(content, self.parser)
+
     def discover_pages(self):
         """Discover all pages on the site"""
         print("\n=== Discovering Pages ===")
         
         # Try the main frameset page first
-        main_soup = self.fetch_page(BASE_URL)
-        if main_soup:
+        main_page = None
+        if url_key(BASE_URL) not in self.visited_urls:
+            main_page = self.fetch_page(BASE_URL)
+            self.finish_page(BASE_URL, main_page is not None)
+        if main_page:
             # Look for frames
-            for frame in main_soup.find_all(['frame', 'iframe']):
-                src = frame.get('src')
-                if src:
-                    full_url = urljoin(BASE_URL, src)
-                    self.discovered_pages.add(full_url)
-                    print(f"  Found frame: {src}")
-        
-        # Try all known page patterns
-        for page in KNOWN_PAGES:
-            url = urljoin(BASE_URL, page)
-            self.discovered_pages.add(url)
-        
-        # Also try with/without www
-        www_base = "https://www.silverspringastro.com"
-        for page in KNOWN_PAGES:
-            self.discovered_pages.add(urljoin(www_base, page))
+            for src in main_page.frames:
+                self.add_page(urljoin(BASE_URL, src))
+                print(f"  Found frame: {src}")
+        
+        # Probe the known page patterns with concurrent HEADs (www/non-www
+        # and case variants collapse onto one probe; known 404s cost nothing).
+        # Only a 404/410 rules a page out - one whose probe timed out or got
+        # a 5xx is queued anyway, and fetch_html() records it as failed if it
+        # still can't be read
+        probes = UrlProber(self.session, rate=self.rate, cache=self.probe_cache).probe(urljoin(BASE_URL, page) for page in KNOWN_PAGES)
+        for url, result in probes.items():
+            if result.exists:
+                self.add_page(result.final_url or url)
+            elif not result.missing:
+                self.add_page(url)
+        found = sum(1 for r in probes.values() if r.exists)
+        missing = sum(1 for r in probes.values() if r.missing)
+        print(f"  Known page guesses: {found} found, {missing} missing, "
+              f"{len(probes) - found - missing} unknown (queued anyway)")
         
         print(f"\n  Total pages to check: {len(self.discovered_pages)}")
 
-    def extract_image_info(self, img_tag, soup, page_url: str) -> Optional[ScrapedImage]:
+    def extract_image_info(self, img_tag: ImageTag, page_url: str) -> Optional[ScrapedImage]:
         """Extract information about an image from its tag and surrounding context"""
-        src = img_tag.get('src')
+        src = img_tag.src
         if not src:
             return None
         
         # Skip tiny images, icons, and tracking pixels
-        width = img_tag.get('width', '999')
-        height = img_tag.get('height', '999')
+        width = img_tag.width if img_tag.width is not None else '999'
+        height = img_tag.height if img_tag.height is not None else '999'
         try:
             if int(width) < 50 or int(height) < 50:
                 return None
@@ -148,46 +256,37 @@ class SiteScraper:
         if any(pat in src.lower() for pat in skip_patterns):
             return None
         
-        full_url = urljoin(page_url, src)
+        full_url = canonical_url(src, page_url)
+        
+        # A thumbnail linked to its full-size file: record (and later download) the full image
+        thumbnail_url = None
+        linked = linked_image(img_tag.link, page_url)
+        if linked and url_key(linked) != url_key(full_url):
+            thumbnail_url, full_url = full_url, linked
+        
         filename = os.path.basename(urlparse(full_url).path)
         
         if not filename or not any(filename.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif']):
             return None
         
         # Try to extract title/description from various sources
-        title = img_tag.get('alt') or img_tag.get('title')
-        
-        # Look at parent elements for more context
-        parent = img_tag.parent
+        title = img_tag.alt or img_tag.title
         description = None
         
-        # Check for captions in nearby text
-        if parent:
-            # Check for text in parent or siblings
-            parent_text = parent.get_text(strip=True)
-            if parent_text and len(parent_text) > len(title or ''):
-                description = parent_text
-            
-            # Check next sibling for caption
-            next_sib = img_tag.find_next_sibling()
-            if next_sib and next_sib.string:
-                if not description:
-                    description = next_sib.string.strip()
-        
-        # Detect category from page URL
-        category = self.detect_category(page_url, filename)
-        
-        # Detect observatory code from filename or nearby text
-        observatory = self.detect_observatory(filename, description or title or '')
+        # Check for captions in nearby text: the image's cell/paragraph first
+        caption = img_tag.caption
+        if caption and len(caption) > len(title or ''):
+            description = caption
         
-        # Detect filter info
-        filters = self.detect_filters(filename, description or title or '')
+        # Then the next sibling
+        if img_tag.next_sibling_text and not description:
+            description = img_tag.next_sibling_text.strip()
         
-        # Try to extract Messier/NGC designation
-        designation = self.extract_designation(filename, title or '', description or '')
+        # Category, observatory, filters and designation in one pass (classify.py)
+        meta = classify.classify(page_url, filename, title, description)
         
         # Determine local path based on category
-        local_path = f"{category}/{filename}"
+        local_path = f"{meta.category}/{filename}"
         
         return ScrapedImage(
             url=full_url,
@@ -195,240 +294,283 @@ class SiteScraper:
             local_path=local_path,
             page_source=page_url,
             title=title,
-            designation=designation,
-            category=category,
-            observatory=observatory,
-            filters=filters,
-            description=description
+            designation=meta.designation,
+            category=meta.category,
+            observatory=meta.observatory,
+            filters=meta.filters,
+            description=description,
+            thumbnail_url=thumbnail_url
         )
 
     def detect_category(self, page_url: str, filename: str) -> str:
         """Detect the category based on page URL and filename"""
-        url_lower = page_url.lower()
-        file_lower = filename.lower()
-        
-        if 'galax' in url_lower and 'cluster' in url_lower:
-            return 'galaxy-clusters'
-        elif 'galaxy' in url_lower or 'galaxi' in url_lower:
-            return 'galaxies'
-        elif 'star' in url_lower and 'cluster' in url_lower:
-            return 'star-clusters'
-        elif 'nebula' in url_lower:
-            return 'nebulae'
-        elif 'supernova' in url_lower:
-            return 'supernovae'
-        elif 'asteroid' in url_lower:
-            return 'asteroids'
-        elif 'exoplanet' in url_lower:
-            return 'exoplanets'
-        elif 'equipment' in url_lower or 'scope' in file_lower or 'mount' in file_lower:
-            return 'equipment'
-        elif 'family' in url_lower or 'travel' in url_lower or 'israel' in file_lower:
-            return 'travel'
-        else:
-            return 'misc'
+        return classify.detect_category(page_url, filename)
 
     def detect_observatory(self, filename: str, text: str) -> Optional[str]:
         """Detect observatory code from filename or description"""
-        combined = f"{filename} {text}".upper()
-        
-        if 'BBO' in combined or 'BLACKBIRD' in combined:
-            return 'BBO'
-        elif 'SRO' in combined or 'SIERRA' in combined:
-            return 'SRO'
-        elif 'G53' in combined or 'ALDER' in combined:
-            return 'G53'
-        elif 'H85' in combined or 'SILVER SPRING' in combined:
-            return 'H85'
-        
-        # Check filename patterns
-        if '_bbo' in filename.lower() or 'bbo_' in filename.lower():
-            return 'BBO'
-        elif '_h85' in filename.lower() or 'h85_' in filename.lower():
-            return 'H85'
-        
-        return None
+        return classify.detect_observatory(filename, text)
 
     def detect_filters(self, filename: str, text: str) -> Optional[str]:
         """Detect filter information"""
-        combined = f"{filename} {text}".upper()
-        
-        filters = []
-        if 'LRGB' in combined:
-            filters.append('LRGB')
-        if 'HA' in combined or 'H-ALPHA' in combined or 'HALPHA' in combined:
-            if 'LRGB' in filters:
-                return 'LRGB+Ha'
-            filters.append('Ha')
-        if 'OIII' in combined or 'O3' in combined:
-            filters.append('OIII')
-        if 'SII' in combined or 'S2' in combined:
-            filters.append('SII')
-        
-        if 'SII' in filters and 'HA' in ' '.join(filters).upper() and 'OIII' in filters:
-            return 'SII/Ha/OIII'
-        
-        return filters[0] if filters else None
+        return classify.detect_filters(filename, text)
 
     def extract_designation(self, filename: str, title: str, description: str) -> Optional[str]:
         """Extract Messier, NGC, IC, or other designation"""
-        combined = f"{filename} {title} {description}"
-        
-        # Messier objects
-        m_match = re.search(r'\bM\s*(\d{1,3})\b', combined, re.IGNORECASE)
-        if m_match:
-            return f"M{m_match.group(1)}"
-        
-        # NGC objects
-        ngc_match = re.search(r'\bNGC\s*(\d{3,5})\b', combined, re.IGNORECASE)
-        if ngc_match:
-            return f"NGC {ngc_match.group(1)}"
-        
-        # IC objects
-        ic_match = re.search(r'\bIC\s*(\d{3,5})\b', combined, re.IGNORECASE)
-        if ic_match:
-            return f"IC {ic_match.group(1)}"
-        
-        # Abell clusters
-        abell_match = re.search(r'\bAbell\s*(\d+)\b', combined, re.IGNORECASE)
-        if abell_match:
-            return f"Abell {abell_match.group(1)}"
-        
-        return None
+        return classify.extract_designation(filename, title, description)
 
-    def scrape_page(self, url: str):
+    def scrape_page(self, url: str) -> List[str]:
         """Scrape a single page for images and links"""
-        soup = self.fetch_page(url)
-        if not soup:
-            return
+        if url_key(url) in self.visited_urls:
+            return []
+        page = self.fetch_page(url)
+        new_pages = self.process_page(url, page) if page else []
+        self.finish_page(url, page is not None)
+        return new_pages
+
+    def process_page(self, url: str, page: PageExtract) -> List[str]:
+        """Extract images and links from a parsed page.
         
-        # Find all images
-        for img in soup.find_all('img'):
-            image_info = self.extract_image_info(img, soup, url)
-            if image_info:
-                # Check for duplicates by URL
-                if not any(i.url == image_info.url for i in self.images):
-                    self.images.append(image_info)
-                    print(f"    Found image: {image_info.filename}")
-        
-        # Find links to other pages (for recursive scraping)
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            if href.endswith('.htm') or href.endswith('.html'):
-                full_url = urljoin(url, href)
-                if full_url.startswith(BASE_URL) or full_url.startswith("https://www.silverspringastro.com"):
-                    if full_url not in self.discovered_pages:
-                        self.discovered_pages.add(full_url)
-                        print(f"    Discovered new page: {full_url}")
+        Returns the pages discovered for the first time on this page.
+        """
+        images, links = self.page_records(url, page)
+        return self.persist_page(url, images, links)
+
+    def page_records(self, url: str, page: PageExtract):
+        """Image records and absolute page links of a parsed page.
+        
+        Pure - touches no scraper state, so the pipeline engine runs it in
+        worker processes.
+        """
+        images = [info for info in (self.extract_image_info(img, url) for img in page.images) if info]
+        links = [urljoin(url, href) for href in page.links
+                 if href.endswith('.htm') or href.endswith('.html')]
+        return images, links
+
+    def persist_page(self, url: str, images: List[ScrapedImage], links: List[str]) -> List[str]:
+        """Record a page's images and queue its links; returns the newly discovered pages"""
+        new_pages = []
+        
+        # New images are added, repeats are merged into the first record
+        for image_info in images:
+            if self.images.add(image_info):
+                print(f"    Found image: {image_info.filename}")
+            record = self.images.get(image_info.url)
+            if self.journal:
+                self.journal.image(record)
+            if self.writer:
+                self.writer.write(record)
+        
+        # Links to other pages (for recursive scraping)
+        for full_url in links:
+            if is_site_url(full_url):
+                new_url = self.add_page(full_url)
+                if new_url:
+                    new_pages.append(new_url)
+                    print(f"    Discovered new page: {new_url}")
+        
+        return new_pages
 
     def download_image(self, image: ScrapedImage) -> bool:
         """Download a single image"""
-        output_path = OUTPUT_DIR / image.local_path
+        result = download_file(self.session, image.url, OUTPUT_DIR / image.local_path, rate=self.rate)
         
-        if output_path.exists():
+        if result.status == 'skipped':
             print(f"    Skipping (exists): {image.filename}")
-            return True
-        
-        try:
-            response = self.session.get(image.url, timeout=60)
-            response.raise_for_status()
-            
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(output_path, 'wb') as f:
-                f.write(response.content)
-            
+        elif result.ok:
             print(f"    Downloaded: {image.filename}")
-            return True
-        except Exception as e:
-            print(f"    Failed to download {image.url}: {e}")
-            return False
+        else:
+            print(f"    Failed to download {image.url}: {result.error}")
+        return result.ok
 
-    def download_all_images(self):
-        """Download all discovered images"""
+    def download_all_images(self, workers: int = DEFAULT_DOWNLOAD_WORKERS):
+        """Download all discovered images in parallel"""
         print(f"\n=== Downloading {len(self.images)} Images ===")
         
-        success = 0
-        failed = 0
-        
-        for i, image in enumerate(self.images):
-            print(f"  [{i+1}/{len(self.images)}] {image.filename}")
-            if self.download_image(image):
-                success += 1
-            else:
-                failed += 1
-            
-            # Be nice to the server
-            time.sleep(0.5)
+        # Only the variant we keep - no thumbnail whose full-size file is planned too
+        jobs, skipped = plan_downloads(self.images, OUTPUT_DIR)
+        if skipped:
+            print(f"  Skipping {skipped} thumbnails with a full-size version")
+        on_result = (lambda r: self.journal.download(r.url, r.status)) if self.journal else None
+        results = DownloadScheduler(self.session, workers=workers, rate=self.rate).run(jobs, on_result)
         
+        success = sum(1 for r in results if r.ok)
+        failed = len(results) - success
         print(f"\n  Downloaded: {success}, Failed: {failed}")
 
+    def requeue_failed_pages(self) -> int:
+        """Put every page from failed_urls.json back on the frontier"""
+        urls = list(self.failed_urls)
+        if self.failed_urls_path.exists():
+            with open(self.failed_urls_path) as f:
+                urls.extend(json.load(f))
+        
+        self.failed_urls = []
+        requeued = set()
+        for url in urls:
+            key = url_key(url)
+            self.visited_urls.discard(key)
+            self.add_page(url)
+            requeued.add(key)
+        return len(requeued)
+
+    def retry_failed_downloads(self, workers: int = DEFAULT_DOWNLOAD_WORKERS):
+        """Replay failed_downloads.jsonl (from this script or any ad-hoc downloader)"""
+        entries = failed_downloads.pending()
+        print(f"\n=== Retrying {len(entries)} Failed Downloads ===")
+        if not entries:
+            return
+        
+        jobs = [(entry['url'], Path(entry['path'])) for entry in entries]
+        on_result = (lambda r: self.journal.download(r.url, r.status)) if self.journal else None
+        results = DownloadScheduler(self.session, workers=workers, rate=self.rate).run(jobs, on_result)
+        
+        # Keep only what is still failing (download_file re-logged those too)
+        failed_downloads.rewrite([entry for entry, result in zip(entries, results) if not result.ok])
+        success = sum(1 for r in results if r.ok)
+        print(f"\n  Recovered: {success}, Still failing: {len(results) - success}")
+
     def save_data(self):
         """Save scraped data to JSON files"""
         print("\n=== Saving Data ===")
         
-        # Save all image data
-        images_data = [asdict(img) for img in self.images]
-        with open(DATA_DIR / "images_raw.json", 'w') as f:
-            json.dump(images_data, f, indent=2)
-        print(f"  Saved {len(images_data)} images to images_raw.json")
-        
-        # Group by category
-        by_category = {}
-        for img in self.images:
-            cat = img.category
-            if cat not in by_category:
-                by_category[cat] = []
-            by_category[cat].append(asdict(img))
-        
-        for cat, imgs in by_category.items():
-            with open(DATA_DIR / f"{cat}.json", 'w') as f:
-                json.dump(imgs, f, indent=2)
-            print(f"  Saved {len(imgs)} images to {cat}.json")
-        
-        # Save failed URLs
+        # Build images_raw.json and the category files from the record stream
+        if self.writer is None:
+            self.writer = ImageStreamWriter(self.stream_path)
+            for img in self.images:
+                self.writer.write(img)
+        
+        for name, count in self.writer.finalize(self.data_dir).items():
+            print(f"  Saved {count} images to {name}")
+        
+        # Save failed URLs (and drop a stale list once everything succeeded)
         if self.failed_urls:
-            with open(DATA_DIR / "failed_urls.json", 'w') as f:
+            with open(self.failed_urls_path, 'w') as f:
                 json.dump(self.failed_urls, f, indent=2)
             print(f"  Saved {len(self.failed_urls)} failed URLs")
+        else:
+            self.failed_urls_path.unlink(missing_ok=True)
 
-    def run(self):
+    def crawl_pages(self):
+        """Scrape every discovered page one at a time"""
+        print("\n=== Scraping Pages ===")
+        pages_to_scrape = [url for key, url in self.discovered_pages.items()
+                           if key not in self.visited_urls]
+        for i, url in enumerate(pages_to_scrape):
+            print(f"\n[{i+1}/{len(pages_to_scrape)}] Scraping: {url}")
+            
+            # Queue any newly discovered pages
+            pages_to_scrape.extend(self.scrape_page(url))
+
+    def run(self, async_mode: bool = False, workers: int = DEFAULT_WORKERS,
+            per_host: int = DEFAULT_PER_HOST, download_workers: int = DEFAULT_DOWNLOAD_WORKERS,
+            resume: bool = False, max_rate_kbps: Optional[float] = None,
+            retry_failed: bool = False, record: Optional[Path] = None, replay: Optional[Path] = None,
+            download: bool = True, pipeline: bool = False, parsers: Optional[int] = None):
         """Main scraping process"""
         print("=" * 60)
         print("Silver Spring Observatory Website Scraper")
         print("=" * 60)
         
-        # Step 1: Discover pages
-        self.discover_pages()
+        resume = resume or retry_failed
+        if resume:
+            state = load_journal(self.journal_path)
+            self.resume_from(state)
+            print(f"\nResuming: {len(self.visited_urls)} pages done, "
+                  f"{sum(k not in self.visited_urls for k in self.discovered_pages)} left, {len(self.images)} images")
+        if retry_failed:
+            print(f"Retrying {self.requeue_failed_pages()} failed pages")
+        offline = bool(replay or self.site_dir)
+        self.rate = RateController(per_host, max_rate_kbps * 1024 if max_rate_kbps else None,
+                                   initial_delay=0 if offline else INITIAL_DELAY)
+        if self.site_dir:
+            print(f"\nCrawling the local backup in {self.site_dir} (no network)")
+        elif replay:
+            archive = self.session.replay_from(replay)
+            print(f"\nReplaying {len(archive.index)} archived responses from {replay} (no network)")
+        elif record:
+            self.session.record_to(record)
+            print(f"\nRecording every HTTP exchange to {record}")
+        self.journal = CrawlJournal(self.journal_path, resume=resume)
+        self.writer = ImageStreamWriter(self.stream_path, resume=resume)
         
-        # Step 2: Scrape each page
-        print("\n=== Scraping Pages ===")
-        pages_to_scrape = list(self.discovered_pages)
-        for i, url in enumerate(pages_to_scrape):
-            print(f"\n[{i+1}/{len(pages_to_scrape)}] Scraping: {url}")
-            self.scrape_page(url)
+        try:
+            # Step 1: Discover pages
+            self.discover_pages()
+            
+            # Step 2: Scrape each page
+            if pipeline:
+                PipelineCrawler(self, fetchers=workers, parsers=parsers).run()
+            elif async_mode:
+                AsyncCrawler(self, workers=workers).run()
+            else:
+                self.crawl_pages()
             
-            # Check for newly discovered pages
-            new_pages = self.discovered_pages - set(pages_to_scrape)
-            if new_pages:
-                pages_to_scrape.extend(new_pages)
+            # Step 3: Download images (files already on disk are skipped)
+            if download:
+                self.download_all_images(workers=download_workers)
+                if retry_failed:
+                    self.retry_failed_downloads(workers=download_workers)
             
-            time.sleep(0.5)  # Be nice to the server
-        
-        # Step 3: Download images
-        self.download_all_images()
-        
-        # Step 4: Save data
-        self.save_data()
+            # Step 4: Save data
+            self.save_data()
+            self.journal.done()
+        except KeyboardInterrupt:
+            print("\n\nInterrupted - run again with --resume to continue")
+            return
+        finally:
+            self.journal.close()
+            self.writer.close()
+            if self.session.recorder:
+                self.session.recorder.close()
         
         print("\n" + "=" * 60)
         print("Scraping Complete!")
         print(f"  Pages scraped: {len(self.visited_urls)}")
         print(f"  Images found: {len(self.images)}")
         print(f"  Failed URLs: {len(self.failed_urls)}")
+        print(f"  HTTP: {self.session.stats.summary()} "
+              f"({self.session.connections_opened()} connections opened)")
         print("=" * 60)
 
 
 if __name__ == "__main__":
-    scraper = SiteScraper()
-    scraper.run()
+    parser = argparse.ArgumentParser(description="Scrape silverspringastro.com")
+    engine = parser.add_mutually_exclusive_group()
+    engine.add_argument("--async", dest="async_mode", action="store_true",
+                        help="crawl pages concurrently with the asyncio engine")
+    engine.add_argument("--pipeline", action="store_true",
+                        help="fetch with threads and parse in a process pool (see pipeline.py)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"concurrent page fetches in async/pipeline mode (default {DEFAULT_WORKERS})")
+    parser.add_argument("--parsers", type=int, default=None,
+                        help="parser processes in pipeline mode (default: one per core)")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST,
+                        help=f"ceiling for adaptive per-host concurrency (default {DEFAULT_PER_HOST})")
+    parser.add_argument("--parser", choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+                        help=f"HTML extraction backend (default {DEFAULT_BACKEND})")
+    parser.add_argument("--download-workers", type=int, default=DEFAULT_DOWNLOAD_WORKERS,
+                        help=f"parallel image downloads (default {DEFAULT_DOWNLOAD_WORKERS})")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"continue the crawl recorded in {JOURNAL_PATH}")
+    parser.add_argument("--max-rate-kbps", type=float, default=None,
+                        help="cap image download bandwidth per host, in KB/s")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="resume and re-fetch only failed_urls.json plus failed_downloads.jsonl")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--record", type=Path, metavar="WARC",
+                        help="archive every HTTP exchange to a WARC file")
+    source.add_argument("--replay", type=Path, metavar="WARC",
+                        help="crawl from a recorded WARC file with no network access")
+    source.add_argument("--site-dir", type=Path, metavar="DIR",
+                        help="crawl a local backup of the old site instead of the network")
+    parser.add_argument("--no-download", dest="download", action="store_false",
+                        help="extract metadata only; don't fetch the images")
+    args = parser.parse_args()
+    
+    scraper = SiteScraper(parser=args.parser, site_dir=args.site_dir)
+    scraper.run(async_mode=args.async_mode, workers=args.workers, per_host=args.per_host,
+                download_workers=args.download_workers, resume=args.resume,
+                max_rate_kbps=args.max_rate_kbps, retry_failed=args.retry_failed,
+                record=args.record, replay=args.replay, download=args.download,
+                pipeline=args.pipeline, parsers=args.parsers)
 
@@ -0,0 +1,178 @@
+"""
+Sharded crawl - several worker processes over one persistent frontier
+
+For mirroring sites too big for one process. Any number of workers, on one
+machine or on several machines sharing the shard folder, run the normal
+SiteScraper fetch/extract logic against a leased SQLite frontier
+(frontier_store.py):
+1. seed  - discover the start pages and put them in the frontier
+2. work  - claim a batch of pages, fetch + extract them, queue their links,
+           mark them done; each worker appends its image records to its own
+           images.<worker>.jsonl, so workers never contend on outputs
+3. merge - fold every worker's records together (the usual ImageRegistry
+           merge rules) into images_raw.json, the per-category files and
+           failed_urls.json, optionally downloading the images too
+
+A worker that dies loses nothing: its leases expire and other workers pick
+the pages up again. Rate limits and circuit breakers apply per worker.
+
+Usage:
+    python shard_crawl.py seed   [--dir shard] [--shared-fs]
+    python shard_crawl.py work   [--dir shard] [--processes 4] [--id NAME] [--shared-fs]
+    python shard_crawl.py status [--dir shard] [--shared-fs]
+    python shard_crawl.py merge  [--dir shard] [--download] [--shared-fs]
+"""
+
+import os
+import json
+import time
+import socket
+import argparse
+import multiprocessing
+from pathlib import Path
+
+from frontier_store import FrontierStore, SeenFilter
+from image_registry import ImageRegistry
+from image_writer import ImageStreamWriter
+from url_utils import is_site_url
+from scrape_site import (SiteScraper, ScrapedImage, DATA_DIR, IMAGES_STREAM_PATH,
+                         FAILED_URLS_PATH)
+
+SHARD_DIR = Path("shard")
+FRONTIER_NAME = "frontier.sqlite"
+BATCH_SIZE = 8
+IDLE_POLL = 2.0  # seconds between claims while other workers still hold leases
+
+
+def open_store(shard_dir: Path, shared_fs: bool = False) -> FrontierStore:
+    return FrontierStore(shard_dir / FRONTIER_NAME, shared_fs=shared_fs)
+
+
+def seed(shard_dir: Path, shared_fs: bool = False):
+    """Discover the start pages and queue them"""
+    store = open_store(shard_dir, shared_fs)
+    scraper = SiteScraper()
+    scraper.discover_pages()
+    added = store.add(scraper.discovered_pages.values())
+    print(f"\nSeeded {added} new pages into {store.path}")
+    store.close()
+
+
+def work(shard_dir: Path, owner: str, shared_fs: bool = False, batch: int = BATCH_SIZE):
+    """Crawl from the shared frontier until nothing is left anywhere"""
+    store = open_store(shard_dir, shared_fs)
+    seen = SeenFilter(store)
+    scraper = SiteScraper()
+    writer = ImageStreamWriter(shard_dir / f"images.{owner}.jsonl", resume=True)
+    pages = images = 0
+
+    print(f"[{owner}] started")
+    try:
+        while True:
+            claimed = store.claim(owner, batch)
+            if not claimed:
+                if store.unfinished() == 0:
+                    break
+                time.sleep(IDLE_POLL)  # leased pages elsewhere may still add work
+                continue
+
+            for key, url in claimed:
+                try:
+                    content = scraper.fetch_html(url)
+                    if content is None:
+                        store.complete(key, False, owner)
+                        continue
+                    found, links = scraper.page_records(url, scraper.parse_html(content))
+                    for image in found:
+                        writer.write(image)
+                    # Links go in before the page is marked done, so a crash re-crawls
+                    # the page rather than losing what it linked to
+                    new = seen.add_new(link for link in links if is_site_url(link))
+                except Exception as e:
+                    # One broken page must not take the worker down with it
+                    print(f"[{owner}] {url}: failed ({type(e).__name__}: {e})")
+                    store.complete(key, False, owner)
+                    continue
+                store.complete(key, True, owner)
+                pages += 1
+                images += len(found)
+                print(f"[{owner}] {url}: {len(found)} images, {new} new pages")
+    finally:
+        writer.close()
+        store.close()
+    print(f"[{owner}] finished: {pages} pages, {images} image records")
+
+
+def status(shard_dir: Path, shared_fs: bool = False):
+    store = open_store(shard_dir, shared_fs)
+    for state, count in sorted(store.counts().items()):
+        print(f"  {state:8s}: {count}")
+    store.close()
+
+
+def merge(shard_dir: Path, download: bool = False, shared_fs: bool = False):
+    """Fold every worker's image stream into the normal scrape_site outputs"""
+    print("\n=== Merging Shards ===")
+    registry = ImageRegistry()
+    for stream in sorted(shard_dir.glob("images.*.jsonl")):
+        with open(stream, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    registry.add(ScrapedImage(**json.loads(line)))
+                except ValueError:
+                    continue  # torn last line from a killed worker
+        print(f"  {stream.name}: {len(registry)} unique images so far")
+
+    writer = ImageStreamWriter(IMAGES_STREAM_PATH)
+    for image in registry:
+        writer.write(image)
+    for name, count in writer.finalize(DATA_DIR).items():
+        print(f"  Saved {count} images to {name}")
+
+    store = open_store(shard_dir, shared_fs)
+    failed = store.failed_urls()
+    store.close()
+    if failed:
+        with open(FAILED_URLS_PATH, 'w') as f:
+            json.dump(failed, f, indent=2)
+        print(f"  Saved {len(failed)} failed URLs")
+    else:
+        FAILED_URLS_PATH.unlink(missing_ok=True)
+
+    if download:
+        scraper = SiteScraper()
+        scraper.images = registry
+        scraper.download_all_images()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded crawl over a shared frontier")
+    parser.add_argument("command", choices=["seed", "work", "status", "merge"])
+    parser.add_argument("--dir", type=Path, default=SHARD_DIR,
+                        help=f"shard folder shared by all workers (default {SHARD_DIR})")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="worker processes to start on this machine")
+    parser.add_argument("--id", default=f"{socket.gethostname()}-{os.getpid()}",
+                        help="worker name (default host-pid)")
+    parser.add_argument("--shared-fs", action="store_true",
+                        help="the shard folder is shared between machines (disables SQLite WAL)")
+    parser.add_argument("--download", action="store_true",
+                        help="merge: also download the merged images")
+    args = parser.parse_args()
+    args.dir.mkdir(parents=True, exist_ok=True)
+
+    if args.command == "seed":
+        seed(args.dir, args.shared_fs)
+    elif args.command == "status":
+        status(args.dir, args.shared_fs)
+    elif args.command == "merge":
+        merge(args.dir, args.download, args.shared_fs)
+    elif args.processes <= 1:
+        work(args.dir, args.id, args.shared_fs)
+    else:
+        workers = [multiprocessing.Process(target=work, args=(args.dir, f"{args.id}-{i}", args.shared_fs))
+                   for i in range(args.processes)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
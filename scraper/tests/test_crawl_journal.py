@@ -0,0 +1,40 @@
+from crawl_journal import CrawlJournal, load_journal, repair_tail
+
+URL = "https://silverspringastro.com/galaxies.htm"
+OTHER = "https://silverspringastro.com/nebulae.htm"
+
+
+def test_resume_after_torn_line_keeps_new_events(tmp_path):
+    path = tmp_path / "crawl_journal.jsonl"
+    journal = CrawlJournal(path)
+    journal.page(URL)
+    journal.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"event": "visited", "url": "https://silver')  # crash mid-write
+
+    journal = CrawlJournal(path, resume=True)
+    journal.visited(OTHER, True)
+    journal.close()
+
+    state = load_journal(path)
+    assert state.pages == [URL]
+    assert state.visited == {OTHER: True}
+
+
+def test_whole_record_missing_its_newline_is_kept(tmp_path):
+    path = tmp_path / "crawl_journal.jsonl"
+    path.write_text('{"event": "page", "url": "%s"}\n{"event": "page", "url": "%s"}' % (URL, OTHER))
+    repair_tail(path)
+    assert path.read_text().endswith('"}\n')
+    assert load_journal(path).pages == [URL, OTHER]
+
+
+def test_repair_leaves_clean_file_alone(tmp_path):
+    path = tmp_path / "crawl_journal.jsonl"
+    text = '{"event": "done"}\n'
+    path.write_text(text)
+    repair_tail(path)
+    assert path.read_text() == text
+    path.write_text('{"ev')
+    repair_tail(path)
+    assert path.read_text() == ''
@@ -0,0 +1,58 @@
+import requests
+
+from downloads import download_file
+from http_cache import HttpCache
+from http_client import PooledSession
+from retry import Retrier
+from test_warc import BODY, URL, RangeAdapter
+
+
+def session():
+    s = requests.Session()
+    s.mount('https://', RangeAdapter())
+    return s
+
+
+def test_existing_file_is_skipped(tmp_path):
+    path = tmp_path / "M51_LRGB_H85.jpg"
+    path.write_bytes(b"old")
+    result = download_file(session(), URL, path, retry=Retrier())
+    assert result.status == 'skipped'
+    assert path.read_bytes() == b"old"
+
+
+def test_overwrite_replaces_existing_file(tmp_path):
+    path = tmp_path / "M51_LRGB_H85.jpg"
+    path.write_bytes(b"old")
+    result = download_file(session(), URL, path, retry=Retrier(), overwrite=True)
+    assert result.status == 'ok'
+    assert path.read_bytes() == BODY
+
+
+class ETagAdapter(RangeAdapter):
+    """RangeAdapter that sends an ETag and answers If-None-Match with a 304"""
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if request.headers.get('If-None-Match') == '"m51"':
+            response.status_code = 304
+            response.raw.close()
+        response.headers['ETag'] = '"m51"'
+        return response
+
+
+def test_unchanged_file_is_revalidated_not_downloaded(tmp_path):
+    s = PooledSession()
+    s.cache = HttpCache(tmp_path / "cache")
+    s.mount('https://', ETagAdapter())
+    path = tmp_path / "M51_LRGB_H85.jpg"
+    assert download_file(s, URL, path, retry=Retrier()).status == 'ok'
+
+    result = download_file(s, URL, path, retry=Retrier(), overwrite=True)
+    assert (result.status, result.http_status, s.hits) == ('skipped', 304, 1)
+    assert path.read_bytes() == BODY
+
+    path.write_bytes(b"edited")  # no longer the file the validators belong to
+    result = download_file(s, URL, path, retry=Retrier(), overwrite=True)
+    assert (result.status, s.hits) == ('ok', 1)
+    assert path.read_bytes() == BODY
@@ -0,0 +1,39 @@
+from frontier_store import FrontierStore
+
+URL = "https://silverspringastro.com/galaxies.htm"
+
+
+def journal_mode(store):
+    return store.db.execute("PRAGMA journal_mode").fetchone()[0].lower()
+
+
+def test_expired_lease_is_handed_out_again(tmp_path):
+    store = FrontierStore(tmp_path / "frontier.sqlite")
+    store.add([URL])
+    assert len(store.claim("w1", 8, lease=0)) == 1
+    # w1 "died": the lease has expired, so w2 gets the page
+    (key, _), = store.claim("w2", 8)
+    store.complete(key, True, "w2")
+    store.complete(key, False, "w1")  # late answer from the lost lease is ignored
+    assert store.counts() == {'done': 1}
+
+
+def test_page_that_keeps_killing_workers_is_failed(tmp_path):
+    store = FrontierStore(tmp_path / "frontier.sqlite")
+    store.add([URL])
+    for attempt in range(3):
+        assert len(store.claim(f"w{attempt}", 8, lease=0, max_attempts=3)) == 1
+    assert store.claim("w3", 8, max_attempts=3) == []
+    assert store.unfinished() == 0
+    assert store.failed_urls() == [URL]
+
+
+def test_journal_mode_is_only_chosen_on_creation(tmp_path):
+    path = tmp_path / "frontier.sqlite"
+    store = FrontierStore(path, shared_fs=True)
+    assert journal_mode(store) == 'delete'
+    store.close()
+    # A status/merge run without --shared-fs must not switch the file to WAL
+    store = FrontierStore(path)
+    assert journal_mode(store) == 'delete'
+    store.close()
@@ -0,0 +1,44 @@
+import pytest
+
+from html_extract import BACKENDS, extract_page
+
+PAGES = {
+    'unclosed p': b'<body><p><img src="M51.jpg"> M51 Whirlpool<p><img src="M82.jpg"> M82 Cigar</body>',
+    'unclosed td': (b'<table><tr><td><img src="M51_thumb.jpg"><br><font>M51</font>'
+                    b'<td><a href="M82.htm"><img src="M82_thumb.jpg"></a><b>Cigar</b></tr></table>'),
+    'unclosed li': b'<ul><li><img src="a.jpg"><li>next <img src="b.jpg"></ul>',
+    'block in p': b'<p><img src="a.jpg"><b><i>Only</i></b> tail<div><img src="b.jpg"> <i>z</i></div>',
+    'nested table in td': (b'<table><tr><td><img src="a.jpg"><table><tr><td>inner<td>cell</table>'
+                           b'<td>next</table>'),
+    'image after closed p': b'<p>intro<table><tr><td>x</table>after <img src="a.jpg"><p>M51',
+    'noframes': (b'<html><frameset><frame src="menu.htm"></frameset>'
+                 b'<noframes><body><a href="home.htm"><img src="nf.jpg"></a> caption</body></noframes></html>'),
+    # No charset declared: utf-8 and cp1252 pages must decode the same in both
+    'utf-8 caption': '<p><img src="M31.jpg"> M31 \u2013 Andromeda Galaxy \u00a9 K. Levin</p>'.encode('utf-8'),
+    'cp1252 caption': '<p><img src="a.jpg"> caf\u00e9 \u2013 x</p>'.encode('cp1252'),
+    'xml declaration': '<?xml version="1.0" encoding="utf-8"?><html xmlns="http://www.w3.org/1999/xhtml"><p><img src="a.jpg"> caf\u00e9</p></html>'.encode('utf-8'),
+}
+
+
+@pytest.mark.parametrize('name', sorted(PAGES))
+def test_backends_agree_on_broken_html(name):
+    assert extract_page(PAGES[name], 'html.parser') == extract_page(PAGES[name], 'lxml')
+
+
+def test_unclosed_p_caption_stops_at_next_paragraph():
+    for backend in BACKENDS:
+        page = extract_page(PAGES['unclosed p'], backend)
+        assert [img.caption for img in page.images] == ['M51 Whirlpool', 'M82 Cigar']
+
+
+def test_noframes_body_is_extracted():
+    page = extract_page(PAGES['noframes'], 'lxml')
+    assert [(img.src, img.link, img.caption) for img in page.images] == [('nf.jpg', 'home.htm', 'caption')]
+    assert page.links == ['home.htm']
+    assert page.frames == ['menu.htm']
+
+
+def test_undeclared_charset_is_detected():
+    for backend in BACKENDS:
+        assert extract_page(PAGES['utf-8 caption'], backend).images[0].caption == 'M31 \u2013 Andromeda Galaxy \u00a9 K. Levin'
+        assert extract_page(PAGES['cp1252 caption'], backend).images[0].caption == 'caf\u00e9 \u2013 x'
@@ -0,0 +1,25 @@
+from image_registry import ImageRegistry
+from scrape_site import ScrapedImage
+
+M51 = "https://silverspringastro.com/galaxies/images/M51_LRGB_H85.jpg"
+M51_OLD = "https://silverspringastro.com/images/m51_lrgb_h85.jpg"
+M1 = "https://silverspringastro.com/nebulae/images/M1_LRGB_H85.jpg"
+
+
+def image(url, category="galaxies", **metadata):
+    filename = url.rsplit('/', 1)[1]
+    return ScrapedImage(url, filename, f"{category}/{filename}", "https://silverspringastro.com/", category=category,
+                        **metadata)
+
+
+def test_same_file_under_different_paths_is_found_by_filename():
+    registry = ImageRegistry()
+    registry.add(image(M51))
+    registry.add(image(M51_OLD, "misc"))
+    registry.add(image(M1, "nebulae"))
+    registry.add(image(M51.replace("https://", "https://www."), title="M51 Whirlpool"))  # merged, not re-indexed
+
+    assert len(registry) == 3
+    assert [img.url for img in registry.with_filename("M51_LRGB_H85.JPG")] == [M51, M51_OLD]
+    assert registry.with_filename("M51_LRGB_H85.jpg")[0].title == "M51 Whirlpool"
+    assert registry.with_filename("M82.jpg") == []
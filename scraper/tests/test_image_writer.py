@@ -0,0 +1,32 @@
+import json
+from dataclasses import dataclass
+
+from image_writer import ImageStreamWriter
+
+M51 = "https://silverspringastro.com/galaxies/images/M51_LRGB_H85.jpg"
+M1 = "https://silverspringastro.com/nebulae/images/M1_LRGB_H85.jpg"
+
+
+@dataclass
+class Image:
+    url: str
+    category: str
+    title: str = ""
+
+
+def test_resume_after_torn_line_keeps_merged_record(tmp_path):
+    path = tmp_path / "images.w1.jsonl"
+    writer = ImageStreamWriter(path)
+    writer.write(Image(M51, "galaxies"))
+    writer.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"url": "https://silverspringastro.com/neb')  # crash mid-write
+
+    writer = ImageStreamWriter(path, resume=True)
+    writer.write(Image(M51, "galaxies", "M51 Whirlpool"))  # a later page merged more metadata
+    writer.write(Image(M1, "nebulae"))
+    counts = writer.finalize(tmp_path)
+
+    assert counts == {"images_raw.json": 2, "galaxies.json": 1, "nebulae.json": 1}
+    records = json.loads((tmp_path / "images_raw.json").read_text())
+    assert [(r['url'], r['title']) for r in records] == [(M51, "M51 Whirlpool"), (M1, "")]
@@ -0,0 +1,58 @@
+import pytest
+
+import migrate_old_site
+import scrape_site
+
+PAGES = {
+    'index.htm': '<html><body><a href="home.htm">home</a></body></html>',
+    'home.htm': ('<html><body><p><img src="new_mount2.jpg"> The new mount</p>'
+                 '<a href="galaxies.htm">Galaxies</a> <a href="gone.htm">not in the backup</a></body></html>'),
+    'galaxies.htm': '<html><body><p><img src="M51.jpg"> M51 Whirlpool</p></body></html>',
+}
+
+
+@pytest.fixture
+def backup(tmp_path, monkeypatch):
+    site = tmp_path / "Desktop"
+    site.mkdir()
+    for name, html in PAGES.items():
+        (site / name).write_text(html)
+    monkeypatch.setattr(migrate_old_site, 'OLD_SITE_BASE', site)
+    monkeypatch.setattr(migrate_old_site, 'OLD_SITE_DATA_PATH', tmp_path / "scraped-old-site")
+    monkeypatch.setattr(scrape_site, 'OUTPUT_DIR', tmp_path / "images")
+    monkeypatch.setattr(scrape_site, 'KNOWN_PAGES', ["home.htm"])
+    return site
+
+
+def test_complete_extraction_allows_cleanup(backup):
+    # gone.htm fails, but there is no file behind it to lose
+    assert migrate_old_site.extract_site_metadata() is True
+
+
+def test_interrupted_extraction_blocks_cleanup_then_resumes(backup, monkeypatch):
+    def interrupted(self):
+        raise KeyboardInterrupt
+    with monkeypatch.context() as m:
+        m.setattr(scrape_site.SiteScraper, 'crawl_pages', interrupted)
+        assert migrate_old_site.extract_site_metadata() is False
+    assert migrate_old_site.extract_site_metadata() is True
+
+
+def test_unread_page_blocks_cleanup(backup, monkeypatch):
+    fetch_html = scrape_site.SiteScraper.fetch_html
+
+    def failing(self, url):
+        if url.lower().endswith('galaxies.htm'):
+            self.failed_urls.append(url)
+            return None
+        return fetch_html(self, url)
+    monkeypatch.setattr(scrape_site.SiteScraper, 'fetch_html', failing)
+    assert migrate_old_site.extract_site_metadata() is False
+
+
+def test_main_stops_before_deleting_html(backup, monkeypatch):
+    monkeypatch.setattr(migrate_old_site, 'NEW_IMAGES_PATH', backup.parent / "new" / "images")
+    monkeypatch.setattr(migrate_old_site, 'extract_site_metadata', lambda: False)
+    monkeypatch.setattr(migrate_old_site, 'delete_junk_files', lambda: pytest.fail("HTML deleted"))
+    migrate_old_site.main()
+    assert (backup / 'home.htm').exists()
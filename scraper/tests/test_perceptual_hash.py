@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+import perceptual_hash
+from perceptual_hash import BKTree, hamming, near_duplicate_groups
+
+
+def flip(value, *bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def test_bktree_matches_brute_force():
+    rng = random.Random(7)
+    values = [rng.getrandbits(64) for _ in range(500)]
+    tree = BKTree()
+    for i, value in enumerate(values):
+        tree.add(value, i)
+    for query in values[:25]:
+        for radius in (0, 5, 20):
+            expected = sorted(i for i, v in enumerate(values) if hamming(query, v) <= radius)
+            assert sorted(i for _, i in tree.search(query, radius)) == expected
+
+
+def test_groups_join_chains_and_need_dhash_match(monkeypatch):
+    base = 0x0123456789ABCDEF
+    hashes = {
+        'a': (base, base),
+        'b': (flip(base, 0, 1, 2, 3, 4), base),            # 5 bits from a
+        'c': (flip(base, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9), base),  # 5 from b, 10 from a
+        'd': (flip(base, 60), flip(base, *range(20))),     # close pHash, far dHash
+        'e': (~base & (2**64 - 1), base),                  # unrelated
+    }
+    monkeypatch.setattr(perceptual_hash, 'perceptual_hashes', lambda paths: hashes)
+    groups = near_duplicate_groups(hashes, radius=5, dhash_radius=5)
+    # c joins through b although it is 10 bits from a - the reason cleanup
+    # only removes direct matches (see test below)
+    assert groups == [['a', 'b', 'c']]
+
+
+def test_cleanup_only_offers_old_copies_matching_a_public_file(monkeypatch):
+    from find_duplicates import OLD_WEBSITE_PATH, PUBLIC_IMAGES_PATH, near_duplicate_removals
+
+    base = 0x0123456789ABCDEF
+    public = PUBLIC_IMAGES_PATH / "galaxies" / "M74_LRGB_BBO.jpg"
+    orig = OLD_WEBSITE_PATH / "galaxies" / "M74_LRGB_BBO_orig.jpg"
+    chained = OLD_WEBSITE_PATH / "galaxies" / "M74_crop.jpg"
+    old_only = [OLD_WEBSITE_PATH / "misc" / "a.jpg", OLD_WEBSITE_PATH / "misc" / "b.jpg"]
+    hashes = {
+        public: (base, base),
+        orig: (flip(base, 0, 1, 2, 3, 4, 5), base),                          # 6 bits from public
+        chained: (flip(base, 0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11), base),  # only close to orig
+        old_only[0]: (base, base),
+        old_only[1]: (base, base),
+    }
+    monkeypatch.setattr(perceptual_hash, 'perceptual_hashes', lambda paths: {p: hashes[p] for p in paths})
+    sizes = {path: 1000 for path in hashes}
+
+    removals = near_duplicate_removals([[public, orig, chained], old_only], sizes)
+    assert removals == [(orig, public, 1000)]
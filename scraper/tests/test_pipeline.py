@@ -0,0 +1,50 @@
+import os
+import threading
+
+import pipeline
+from pipeline import PipelineCrawler
+
+PAGES = [f"https://silverspringastro.com/page{i}.htm" for i in range(6)]
+CRASH = PAGES[1]
+
+
+def crashing_worker(url, content, parser):
+    """Stands in for parse_worker; dies without a Python exception on one page"""
+    if url == CRASH:
+        os._exit(1)
+    return [], []
+
+
+class Scraper:
+    """The parts of SiteScraper the pipeline uses, with no network"""
+    parser = 'html.parser'
+
+    def __init__(self):
+        self.discovered_pages = {url: url for url in PAGES}
+        self.visited_urls = set()
+        self.failed_urls = []
+        self.finished = {}
+
+    def fetch_html(self, url):
+        return b"<html></html>"
+
+    def persist_page(self, url, images, links):
+        return []
+
+    def finish_page(self, url, ok):
+        self.finished[url] = ok
+
+
+def test_crashed_worker_fails_pages_instead_of_hanging(monkeypatch):
+    monkeypatch.setattr(pipeline, 'parse_worker', crashing_worker)
+    scraper = Scraper()
+    crawler = PipelineCrawler(scraper, fetchers=2, parsers=1)
+    thread = threading.Thread(target=crawler.run, daemon=True)
+    thread.start()
+    thread.join(timeout=120)
+
+    assert not thread.is_alive()
+    assert set(scraper.finished) == set(PAGES)
+    assert scraper.finished[CRASH] is False
+    assert CRASH in scraper.failed_urls
+    assert sorted(scraper.failed_urls) == sorted(url for url, ok in scraper.finished.items() if not ok)
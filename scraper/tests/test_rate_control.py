@@ -0,0 +1,52 @@
+import time
+
+from rate_control import INITIAL_DELAY, MAX_DELAY, HostController, SlotOutcome
+
+
+def finish(host, status=200, latency=0.1, retry_after=None):
+    """One request through the controller, without waiting for its slot"""
+    outcome = SlotOutcome()
+    outcome.status, outcome.latency, outcome.retry_after = status, latency, retry_after
+    host.in_flight += 1
+    host.release(outcome)
+
+
+def test_healthy_responses_raise_concurrency_up_to_the_cap():
+    host = HostController(max_concurrency=4)
+    limits = []
+    for _ in range(50):
+        finish(host)
+        limits.append(host.limit)
+    assert limits == sorted(limits)  # additive increase, never a step back
+    assert host.limit == 4.0
+    assert host.delay == 0.0
+
+
+def test_overload_halves_concurrency_and_doubles_delay_within_bounds():
+    host = HostController(max_concurrency=8, initial_delay=0)
+    for _ in range(100):
+        finish(host)
+    assert host.limit == 8.0
+
+    finish(host, 503)
+    assert (host.limit, host.delay) == (4.0, INITIAL_DELAY)
+    finish(host, None)  # connection error
+    assert (host.limit, host.delay) == (2.0, 2 * INITIAL_DELAY)
+    for _ in range(20):
+        finish(host, 429)
+    assert (host.limit, host.delay) == (1.0, MAX_DELAY)
+
+
+def test_slow_responses_back_off_gently():
+    host = HostController(max_concurrency=4)
+    finish(host, latency=0.5)
+    limit = host.limit
+    finish(host, latency=20.0)  # EWMA well above 3x the 0.5s baseline
+    assert host.limit == max(1.0, limit * 0.75)
+
+
+def test_retry_after_delays_the_next_request():
+    host = HostController(initial_delay=0)
+    before = time.monotonic()
+    finish(host, 429, retry_after=60)
+    assert host.next_start >= before + 60
@@ -0,0 +1,67 @@
+import pytest
+import requests
+
+import retry
+from retry import CircuitBreaker, CircuitOpen, Retrier, RetryPolicy, response_retryable
+
+URL = "https://silverspringastro.com/galaxies.htm"
+
+
+def answer(status, **headers):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers)
+    return response
+
+
+def test_breaker_opens_after_threshold_failures_in_a_row():
+    breaker = CircuitBreaker(threshold=3, cooldown=60)
+    for ok in (False, False, True, False, False):  # a success resets the count
+        breaker.record(ok)
+    assert breaker.allow()
+    breaker.record(False)
+    assert not breaker.allow()
+
+
+def test_half_open_breaker_lets_one_trial_through():
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    breaker.record(False)
+    assert breaker.allow()        # cooldown over: half-open
+    assert not breaker.allow()    # only one trial at a time
+    breaker.record(False)         # trial failed - open again
+    assert breaker.opened_at is not None
+    assert breaker.allow()
+    breaker.record(True)          # trial succeeded - closed
+    assert (breaker.opened_at, breaker.failures) == (None, 0)
+    assert breaker.allow() and breaker.allow()
+
+
+def test_open_circuit_fails_fast(monkeypatch):
+    monkeypatch.setattr(retry.time, 'sleep', lambda seconds: None)
+    retrier = Retrier(RetryPolicy(attempts=2), threshold=2, cooldown=60)
+    calls = []
+
+    def attempt():
+        calls.append(1)
+        raise requests.ConnectionError("refused")
+
+    with pytest.raises(requests.ConnectionError):
+        retrier.call(URL, attempt)
+    with pytest.raises(CircuitOpen):
+        retrier.call(URL, attempt)
+    assert len(calls) == 2
+
+
+def test_retry_after_sets_the_wait(monkeypatch):
+    waits = []
+    monkeypatch.setattr(retry.time, 'sleep', waits.append)
+    answers = iter([answer(503, **{'Retry-After': '7'}), answer(429, **{'Retry-After': '120'}), answer(200)])
+    result = Retrier(RetryPolicy(max_delay=30)).call(URL, lambda: next(answers), retryable=response_retryable)
+    assert result.status_code == 200
+    assert waits == [7.0, 30.0]  # capped at max_delay
+
+
+def test_backoff_without_retry_after_is_jittered_and_capped():
+    policy = RetryPolicy(base_delay=1, max_delay=5)
+    for attempt in range(1, 8):
+        assert 0 <= policy.backoff(attempt) <= min(5, 2 ** (attempt - 1))
@@ -0,0 +1,85 @@
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+import scrape_site
+import url_probe
+import url_utils
+from retry import Retrier, RetryPolicy
+from url_probe import ProbeCache, ProbeResult, UrlProber
+
+URL = "https://silverspringastro.com/galaxies/images/M51_LRGB_H85.jpg"
+HOST = "silverspringastro.com"
+
+
+def prober(statuses):
+    """A prober whose HEAD answers come from {url: status}"""
+    probe = UrlProber(session=None, cache=ProbeCache(path=None))
+    probe.head = lambda url: ProbeResult(url, statuses.get(url))
+    return probe
+
+
+def test_failed_case_check_learns_nothing(monkeypatch):
+    monkeypatch.setattr(url_utils, 'CASE_INSENSITIVE_HOSTS', {HOST})
+    probe = prober({})  # the flipped-case request times out
+    assert probe.learn_case([ProbeResult(URL, 200)]) == []
+    assert HOST not in probe.cache.case_insensitive
+    assert HOST in url_utils.CASE_INSENSITIVE_HOSTS
+
+
+def test_case_sensitive_host_is_learned(monkeypatch):
+    monkeypatch.setattr(url_utils, 'CASE_INSENSITIVE_HOSTS', {HOST})
+    probe = prober({URL.replace("M51_LRGB_H85.jpg", "m51_lrgb_h85.JPG"): 404})
+    assert probe.learn_case([ProbeResult(URL, 200)]) == [HOST]
+    assert probe.cache.case_insensitive == {HOST: False}
+    assert HOST not in url_utils.CASE_INSENSITIVE_HOSTS
+
+
+class StatusAdapter(BaseAdapter):
+    """Answers every request with one status code (None = connection error)"""
+
+    def __init__(self, status):
+        super().__init__()
+        self.status = status
+
+    def send(self, request, **kwargs):
+        if self.status is None:
+            raise requests.ConnectionError("connection refused")
+        response = requests.Response()
+        response.status_code = self.status
+        response.url = request.url
+        response.request = request
+        response._content = b""
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize('status, cached', [(404, True), (410, True), (403, False), (503, False), (None, False)])
+def test_only_not_found_answers_are_cached(status, cached):
+    session = requests.Session()
+    session.mount('https://', StatusAdapter(status))
+    probe = UrlProber(session, cache=ProbeCache(path=None))
+    probe.retry = Retrier(RetryPolicy(attempts=1))
+    result = probe.head(URL)
+    assert result.status == status
+    assert result.missing is cached
+    assert probe.cache.is_missing(url_utils.url_key(URL)) is cached
+
+
+def test_discovery_queues_pages_it_could_not_rule_out(tmp_path, monkeypatch):
+    site = tmp_path / "site"
+    site.mkdir()
+    (site / "index.htm").write_text("<html><body>home</body></html>")
+    monkeypatch.setattr(url_utils, 'CASE_INSENSITIVE_HOSTS', {HOST})
+    monkeypatch.setattr(scrape_site, 'OUTPUT_DIR', tmp_path / "images")
+    monkeypatch.setattr(scrape_site, 'KNOWN_PAGES', ["galaxies.htm", "gone.htm", "slow.htm", "busy.htm"])
+    statuses = {"galaxies.htm": 200, "gone.htm": 404, "slow.htm": None, "busy.htm": 503}
+    monkeypatch.setattr(url_probe.UrlProber, 'head',
+                        lambda self, url: ProbeResult(url, statuses[url.rsplit('/', 1)[1].lower()]))
+
+    scraper = scrape_site.SiteScraper(site_dir=site, data_dir=tmp_path / "data")
+    scraper.discover_pages()
+    pages = {url.rsplit('/', 1)[1] for url in scraper.discovered_pages.values()}
+    assert pages == {"galaxies.htm", "slow.htm", "busy.htm"}
@@ -0,0 +1,35 @@
+import pytest
+
+from url_utils import canonical_url, url_key
+
+KEY = "https://silverspringastro.com/galaxies/m51.htm"
+
+
+@pytest.mark.parametrize('url', [
+    "https://silverspringastro.com/galaxies/M51.htm",
+    "HTTPS://WWW.SilverSpringAstro.com/Galaxies/m51.HTM",   # scheme, host and path case
+    "http://www.silverspringastro.com/galaxies/M51.htm",     # scheme and alias
+    "https://silverspringastro.com:443/galaxies/M51.htm",    # default port
+    "http://silverspringastro.com:80/galaxies/M51.htm",      # default port of the original scheme
+    "https://silverspringastro.com/galaxies/M51.htm#top",    # fragment
+    "https://silverspringastro.com./galaxies/M51.htm",       # trailing dot on the host
+])
+def test_spellings_of_one_page_share_a_key(url):
+    assert url_key(url) == KEY
+
+
+def test_directory_index_and_trailing_slash():
+    assert url_key("https://silverspringastro.com/nebulae/Index.htm") == "https://silverspringastro.com/nebulae/"
+    assert url_key("https://silverspringastro.com") == url_key("https://silverspringastro.com/")
+    # Without the slash it is a different URL (relative links resolve differently)
+    assert url_key("https://silverspringastro.com/nebulae") != url_key("https://silverspringastro.com/nebulae/")
+
+
+def test_other_hosts_keep_path_case_and_explicit_ports():
+    assert url_key("https://Example.com:8443/Images/M51.jpg#x") == "https://example.com:8443/Images/M51.jpg"
+    assert url_key("http://example.com:80/a") == "http://example.com/a"
+
+
+def test_canonical_url_keeps_path_case_and_query():
+    assert (canonical_url("http://www.silverspringastro.com/Galaxies/M51.htm?Size=Full#top")
+            == "https://silverspringastro.com/Galaxies/M51.htm?Size=Full")
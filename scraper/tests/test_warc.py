@@ -0,0 +1,168 @@
+import io
+
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from downloads import download_file
+from http_cache import HttpCache
+from http_client import PooledSession
+from retry import Retrier
+from warc import WarcArchive, WarcWriter, replay_answer
+
+URL = "https://silverspringastro.com/galaxies/images/M51_LRGB_H85.jpg"
+OLD_URL = "https://silverspringastro.com/images/M51.jpg"
+BODY = bytes(range(256)) * 1000
+
+
+class RangeAdapter(BaseAdapter):
+    """Serves BODY for every URL, honouring 'bytes=N-' like a real server"""
+
+    def send(self, request, **kwargs):
+        status, body, headers = 200, BODY, {}
+        range_header = request.headers.get('Range')
+        if range_header:
+            start = int(range_header[6:].rstrip('-'))
+            status, body = 206, BODY[start:]
+            headers['Content-Range'] = f"bytes {start}-{len(BODY) - 1}/{len(BODY)}"
+        headers['Content-Length'] = str(len(body))
+        response = Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def recording_session(warc_path):
+    session = PooledSession()
+    session.mount('https://', RangeAdapter())
+    session.record_to(warc_path)
+    return session
+
+
+def test_streamed_body_is_archived_only_once_read(tmp_path):
+    session = recording_session(tmp_path / "crawl.warc")
+    response = session.get(URL, stream=True)
+    assert session.recorder.count == 0  # nothing read (or buffered) yet
+    assert b"".join(response.iter_content(4096)) == BODY
+    assert session.recorder.count == 1
+    session.recorder.close()
+
+    status, _, _, body = replay_answer(WarcArchive(tmp_path / "crawl.warc"), 'GET', URL)
+    assert (status, body) == (200, BODY)
+
+
+def test_resumed_download_is_not_archived_as_the_whole_file(tmp_path):
+    warc_path = tmp_path / "crawl.warc"
+    session = recording_session(warc_path)
+    target = tmp_path / "M51.jpg"
+    (tmp_path / "M51.jpg.part").write_bytes(BODY[:1000])
+
+    result = download_file(session, URL, target, retry=Retrier())
+    session.recorder.close()
+    assert result.status == 'resumed' and target.read_bytes() == BODY
+    # The 206 holds only the tail - replaying it as the answer would truncate the file
+    assert WarcArchive(warc_path).lookup('GET', URL) is None
+
+
+def test_replay_cuts_ranges_from_the_whole_body(tmp_path):
+    warc_path = tmp_path / "crawl.warc"
+    session = recording_session(warc_path)
+    session.get(URL)
+    session.recorder.close()
+    archive = WarcArchive(warc_path)
+
+    status, _, headers, body = replay_answer(archive, 'GET', URL, 'bytes=1000-')
+    assert status == 206 and body == BODY[1000:]
+    assert dict(headers)['Content-Range'] == f"bytes 1000-{len(BODY) - 1}/{len(BODY)}"
+    status, _, _, body = replay_answer(archive, 'GET', URL, f'bytes={len(BODY)}-')
+    assert status == 416 and body == b''
+
+
+def test_partial_records_in_old_archives_are_ignored(tmp_path):
+    warc_path = tmp_path / "old.warc"
+    writer = WarcWriter(warc_path)
+    block = b"HTTP/1.1 206 Partial Content\r\nContent-Range: bytes 10-19/20\r\n\r\n" + b"x" * 10
+    rid = writer.write_record('response', URL, block, 'application/http;msgtype=response')
+    writer.write_record('request', URL, b"GET / HTTP/1.1\r\n\r\n", 'application/http;msgtype=request',
+                        {'WARC-Concurrent-To': rid})
+    writer.close()
+    assert WarcArchive(warc_path).lookup('GET', URL) is None
+
+
+class RedirectAdapter(RangeAdapter):
+    """RangeAdapter behind a permanent redirect from OLD_URL, with an ETag"""
+
+    def send(self, request, **kwargs):
+        if request.url == OLD_URL:
+            response = Response()
+            response.status_code = 301
+            response.headers = CaseInsensitiveDict({'Location': URL, 'Content-Length': '0'})
+            response.raw = io.BytesIO(b"")
+            response.url = request.url
+            response.request = request
+            return response
+        response = super().send(request, **kwargs)
+        response.headers['ETag'] = '"m51"'
+        return response
+
+
+def test_redirected_url_replays(tmp_path):
+    warc_path = tmp_path / "crawl.warc"
+    session = PooledSession()
+    session.cache = HttpCache(tmp_path / "cache")
+    session.mount('https://', RedirectAdapter())
+    session.record_to(warc_path)
+    session.get(OLD_URL)
+    session.recorder.close()
+
+    replay = PooledSession()
+    replay.replay_from(warc_path)
+    response = replay.get(OLD_URL)
+    assert (response.status_code, response.url, response.content) == (200, URL, BODY)
+    assert [r.status_code for r in response.history] == [301]
+
+
+def test_replay_leaves_the_http_cache_alone(tmp_path):
+    warc_path = tmp_path / "crawl.warc"
+    session = PooledSession()
+    session.cache = HttpCache(tmp_path / "recording-cache")
+    session.mount('https://', RedirectAdapter())
+    session.record_to(warc_path)
+    session.get(URL)
+    session.recorder.close()
+
+    cache_dir = tmp_path / "cache"
+    replay = PooledSession()
+    replay.cache = HttpCache(cache_dir)
+    replay.replay_from(warc_path)
+    assert replay.get(URL).content == BODY
+    assert not any(cache_dir.rglob("*.body"))
+
+
+def test_torn_last_record_is_skipped_and_cut_before_appending(tmp_path):
+    warc_path = tmp_path / "crawl.warc"
+    session = recording_session(warc_path)
+    session.get(URL)
+    session.recorder.close()
+    whole = warc_path.read_bytes()
+    session = recording_session(warc_path)
+    session.get(OLD_URL)
+    session.recorder.close()
+    with open(warc_path, 'r+b') as f:
+        f.truncate(len(whole) + 600)  # crash half-way through the second response body
+
+    assert WarcArchive(warc_path).lookup('GET', OLD_URL) is None
+    assert WarcArchive(warc_path).lookup('GET', URL) is not None
+
+    session = recording_session(warc_path)
+    session.get(OLD_URL)
+    session.recorder.close()
+    archive = WarcArchive(warc_path)
+    assert archive.body(archive.lookup('GET', URL)) == BODY
+    assert archive.body(archive.lookup('GET', OLD_URL)) == BODY
@@ -0,0 +1,213 @@
+"""
+Concurrent URL probing for page discovery
+
+Guessed page names (galaxyclusters.htm, GalaxyClusters.htm,
+galaxy_clusters.htm, ...) used to be checked one requests.head() at a time
+and then fetched again with full GETs. UrlProber instead:
+1. Collapses guesses that are the same URL (url_key) - on a case-insensitive
+   host one probe answers every case variant of a name
+2. Answers known 404/410s from a persistent negative cache (.probe_cache.json);
+   only a real 404/410 gets in - a timeout, 5xx or open circuit says
+   nothing about whether the page exists
+3. Sends the remaining HEAD requests concurrently (GET if HEAD isn't allowed)
+4. Learns whether each host ignores path case: one extra HEAD with the
+   case flipped on a page that exists. The answer updates
+   url_utils.CASE_INSENSITIVE_HOSTS and is remembered in the cache file
+
+Usage:
+    prober = UrlProber(get_session())
+    for url, result in prober.probe(urls).items():
+        if result.exists: ...
+        elif not result.missing: ...   # unknown - worth trying again later
+"""
+
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import url_utils
+from rate_control import SlotOutcome
+from url_utils import canonical_url, url_key
+from http_cache import write_atomic
+from retry import get_retrier, response_retryable
+
+PROBE_CACHE_PATH = Path(__file__).parent / ".probe_cache.json"
+NEGATIVE_TTL = 7 * 24 * 3600   # seconds a 404 is trusted before probing again
+DEFAULT_WORKERS = 8
+MISSING_STATUS = {404, 410}
+
+
+@dataclass
+class ProbeResult:
+    url: str
+    status: Optional[int]            # None = request failed
+    final_url: Optional[str] = None  # after redirects
+    cached: bool = False             # answered from the negative cache
+
+    @property
+    def exists(self) -> bool:
+        return self.status is not None and self.status < 400
+
+    @property
+    def missing(self) -> bool:
+        """The server said the page isn't there (any other failure is unknown)"""
+        return self.status in MISSING_STATUS
+
+
+class ProbeCache:
+    """Known-missing URLs plus what each host taught us about path case"""
+
+    def __init__(self, path: Optional[Path] = PROBE_CACHE_PATH, ttl: float = NEGATIVE_TTL):
+        self.path = Path(path) if path else None  # None = this run only
+        self.ttl = ttl
+        self.negative: Dict[str, float] = {}       # url_key -> time it was seen missing
+        self.case_insensitive: Dict[str, bool] = {}  # host -> learned behaviour
+        self.lock = threading.Lock()
+        if self.path and self.path.exists():
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+                self.negative = data.get('negative', {})
+                self.case_insensitive = data.get('case_insensitive', {})
+            except (OSError, ValueError):
+                pass  # a broken cache only costs a few extra probes
+        for host, insensitive in self.case_insensitive.items():
+            apply_case_rule(host, insensitive)
+
+    def is_missing(self, key: str) -> bool:
+        seen = self.negative.get(key)
+        return seen is not None and time.time() - seen < self.ttl
+
+    def add_missing(self, key: str):
+        with self.lock:
+            self.negative[key] = time.time()
+
+    def learn(self, host: str, insensitive: bool):
+        with self.lock:
+            self.case_insensitive[host] = insensitive
+            if not insensitive:
+                # Keys for this host were case-folded - they no longer mean anything
+                self.negative = {k: t for k, t in self.negative.items() if urlsplit(k).hostname != host}
+        apply_case_rule(host, insensitive)
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            data = {'negative': self.negative, 'case_insensitive': self.case_insensitive}
+        write_atomic(self.path, json.dumps(data, indent=2, sort_keys=True).encode('utf-8'))
+
+
+def apply_case_rule(host: str, insensitive: bool):
+    if insensitive:
+        url_utils.CASE_INSENSITIVE_HOSTS.add(host)
+    else:
+        url_utils.CASE_INSENSITIVE_HOSTS.discard(host)
+
+
+def flip_case(url: str) -> Optional[str]:
+    """Same URL with the case of its last path segment swapped (None if it has no letters)"""
+    parts = urlsplit(url)
+    head, _, last = parts.path.rpartition('/')
+    flipped = last.swapcase()
+    if flipped == last:
+        return None
+    return urlunsplit((parts.scheme, parts.netloc, f"{head}/{flipped}", parts.query, ''))
+
+
+class UrlProber:
+    def __init__(self, session, workers: int = DEFAULT_WORKERS, cache: ProbeCache = None,
+                 rate=None, timeout: int = 10):
+        self.session = session
+        self.workers = max(1, workers)
+        self.cache = cache or ProbeCache()
+        self.rate = rate
+        self.timeout = timeout
+        self.retry = get_retrier()
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def request(self, url: str):
+        """HEAD, falling back to a streamed GET when the server refuses HEAD"""
+        with self.lock:
+            self.requests += 1
+        with self.rate.slot(url) if self.rate else nullcontext(SlotOutcome()) as slot:
+            response = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+            if response.status_code in (405, 501):
+                with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                    pass
+            slot.status = response.status_code
+            slot.latency = response.elapsed.total_seconds()
+        return response
+
+    def head(self, url: str) -> ProbeResult:
+        """Probe one URL (with retries)"""
+        try:
+            response = self.retry.call(url, lambda: self.request(url), retryable=response_retryable)
+        except Exception:
+            return ProbeResult(url, None)
+
+        result = ProbeResult(url, response.status_code, canonical_url(response.url))
+        if result.missing:
+            self.cache.add_missing(url_key(url))
+        return result
+
+    def head_all(self, urls: List[str]) -> List[ProbeResult]:
+        if not urls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(urls))) as executor:
+            return list(executor.map(self.head, urls))
+
+    def learn_case(self, results: List[ProbeResult]) -> List[str]:
+        """Check hosts we haven't learned about yet; returns hosts found to be case-sensitive"""
+        sensitive = []
+        for result in results:
+            host = urlsplit(result.url).hostname
+            if not result.exists or host in self.cache.case_insensitive:
+                continue
+            flipped = flip_case(result.url)
+            if flipped is None:
+                continue
+            status = self.head(flipped).status
+            if status is None:
+                continue  # the check itself failed - that says nothing about case
+            insensitive = status == result.status
+            self.cache.learn(host, insensitive)
+            print(f"  {host}: paths are case-{'in' if insensitive else ''}sensitive")
+            if not insensitive:
+                sensitive.append(host)
+        return sensitive
+
+    def probe(self, urls: Iterable[str]) -> Dict[str, ProbeResult]:
+        """Probe every URL; returns {canonical url: ProbeResult} for each URL passed in"""
+        urls = [canonical_url(u) for u in urls]
+        keys = {url: url_key(url) for url in urls}
+        results: Dict[str, ProbeResult] = {}
+        todo = {}  # url_key -> first url with that key
+        for url in urls:
+            if self.cache.is_missing(keys[url]):
+                results[url] = ProbeResult(url, 404, cached=True)
+            else:
+                todo.setdefault(keys[url], url)
+
+        probed = dict(zip(todo.values(), self.head_all(list(todo.values()))))
+
+        # If a host turned out to be case-sensitive, the variants we collapsed
+        # under one key are different URLs after all - probe them too
+        sensitive = self.learn_case(list(probed.values()))
+        extra = [u for u in urls if u not in results and u not in probed
+                 and urlsplit(u).hostname in sensitive]
+        probed.update(zip(extra, self.head_all(extra)))
+
+        for url in urls:
+            if url not in results:
+                result = probed.get(url) or probed[todo[keys[url]]]
+                results[url] = replace(result, url=url)
+        self.cache.save()
+        return {url: results[url] for url in urls}
@@ -0,0 +1,82 @@
+"""
+URL canonicalization for the silverspringastro.com crawlers
+
+The old site is reachable under several spellings of the same URL:
+- http:// and https://
+- silverspringastro.com and www.silverspringastro.com
+- galaxies.htm and Galaxies.htm (the server ignores case)
+- nebulae/ and nebulae/index.htm
+
+canonical_url() rewrites a URL to the one spelling we fetch and store.
+url_key() goes one step further and case-folds the path, so it can be used
+as the dedupe key for the crawl frontier, visited pages and images.
+"""
+
+from urllib.parse import urlsplit, urlunsplit, urljoin
+
+SITE_HOST = "silverspringastro.com"
+SITE_SCHEME = "https"
+
+# Hostnames that serve the same content as SITE_HOST
+HOST_ALIASES = {
+    "www.silverspringastro.com": SITE_HOST,
+}
+
+# Hosts whose paths are case-insensitive (galaxies.htm == Galaxies.htm)
+CASE_INSENSITIVE_HOSTS = {SITE_HOST}
+
+# Directory index pages - "nebulae/index.htm" is the same page as "nebulae/"
+INDEX_PAGES = {"index.htm", "index.html", "default.htm", "default.html"}
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonical_host(host: str) -> str:
+    """Lowercase a hostname and resolve known aliases"""
+    host = host.lower().rstrip('.')
+    return HOST_ALIASES.get(host, host)
+
+
+def is_site_url(url: str) -> bool:
+    """Check if a URL points at the old site (any scheme, any alias)"""
+    parts = urlsplit(url)
+    return parts.scheme in DEFAULT_PORTS and canonical_host(parts.hostname or '') == SITE_HOST
+
+
+def canonical_url(url: str, base: str = None) -> str:
+    """Rewrite a URL to its canonical spelling (path case is preserved)"""
+    if base:
+        url = urljoin(base, url)
+
+    parts = urlsplit(url.strip())
+    scheme = given_scheme = parts.scheme.lower()
+    host = canonical_host(parts.hostname or '')
+
+    if host == SITE_HOST:
+        scheme = SITE_SCHEME
+
+    # Keep the port only when it isn't the default of the scheme it was given with
+    netloc = host
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(given_scheme):
+        netloc = f"{host}:{port}"
+
+    path = parts.path or '/'
+    head, _, last = path.rpartition('/')
+    if last.lower() in INDEX_PAGES:
+        path = head + '/'
+
+    # Fragments never reach the server
+    return urlunsplit((scheme, netloc, path, parts.query, ''))
+
+
+def url_key(url: str, base: str = None) -> str:
+    """Dedupe key for a URL: canonical form, case-folded where the host allows it"""
+    url = canonical_url(url, base)
+    parts = urlsplit(url)
+    if parts.hostname in CASE_INSENSITIVE_HOSTS:
+        url = urlunsplit((parts.scheme, parts.netloc, parts.path.lower(), parts.query, ''))
+    return url
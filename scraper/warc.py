@@ -0,0 +1,392 @@
+"""
+WARC record and replay for offline re-extraction
+
+Record a crawl once, then re-run extraction (detect_category, detect_filters,
+extract_designation, ...) against the archive as often as needed - no
+network, deterministic, and done in seconds:
+1. WarcWriter appends every HTTP exchange as a WARC/1.1 request + response
+   record pair (bodies are stored decoded, like the HTTP cache). The
+   redirects that led to a response are archived before it, so replaying
+   the URL that was asked for follows them to the same answer. A
+   streamed download is archived as it is read (spooled to disk, so the
+   download keeps its flat memory), once it has been read to the end.
+   Partial answers (206/416 to a resumed download) are not archived - the
+   archive holds whole bodies and replay cuts ranges out of them
+2. WarcArchive indexes an archive by (method, url_key) and reads bodies
+   lazily from disk. A record torn by a crash mid-write is skipped, and
+   WarcWriter cuts it off before appending to the archive again
+3. ReplayAdapter is a requests transport that answers from the archive;
+   anything that wasn't recorded is a 404, never a network request
+4. serve() exposes an archive over a local http.server, for tools that
+   can't take a requests adapter (plain paths map onto the old site)
+
+Usage:
+    python scrape_site.py --record crawl.warc       # live crawl, archived
+    python scrape_site.py --replay crawl.warc       # offline re-extraction
+    SCRAPER_REPLAY=crawl.warc python download_clusters.py
+    python warc.py serve crawl.warc [--port 8000]
+    python warc.py list crawl.warc
+"""
+
+import io
+import os
+import sys
+import uuid
+import shutil
+import tempfile
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.client import responses as HTTP_REASONS
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+from url_utils import url_key, SITE_HOST
+
+WARC_VERSION = b"WARC/1.1"
+# Stored bodies are decoded, so these would describe the wrong bytes
+DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+# Answers to Range requests hold part of a body; replay only serves whole ones
+PARTIAL_STATUS = {206, 416}
+SPOOL_MEMORY = 1024 * 1024  # streamed bodies over this are spooled to a temp file
+RECORD_END = b"\r\n\r\n"
+
+
+def warc_date() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def record_id() -> str:
+    return f"<urn:uuid:{uuid.uuid4()}>"
+
+
+def read_body(response):
+    """A (non-streamed) response body as (file, length)"""
+    content = b'' if response.request.method == 'HEAD' else response.content
+    return io.BytesIO(content), len(content)
+
+
+class WarcWriter:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        repair_tail(self.path)
+        self.file = open(self.path, 'ab')
+        self.lock = threading.Lock()
+        self.count = 0
+        if self.file.tell() == 0:
+            self.write_record('warcinfo', None, b"software: silverspringastro scraper\r\nformat: WARC File Format 1.1\r\n",
+                              'application/warc-fields')
+
+    def write_record(self, warc_type: str, url: Optional[str], block: bytes, content_type: str,
+                     extra: Dict[str, str] = None, body=None, body_length: int = 0) -> str:
+        """Append one record; `body` (a file, body_length bytes) is copied after `block`"""
+        rid = record_id()
+        headers = {
+            'WARC-Type': warc_type,
+            'WARC-Record-ID': rid,
+            'WARC-Date': warc_date(),
+        }
+        if url:
+            headers['WARC-Target-URI'] = url
+        headers.update(extra or {})
+        headers['Content-Type'] = content_type
+        headers['Content-Length'] = str(len(block) + body_length)
+
+        head = WARC_VERSION + b"\r\n" + b"".join(
+            f"{name}: {value}\r\n".encode('utf-8') for name, value in headers.items())
+        self.file.write(head + b"\r\n" + block)
+        if body is not None:
+            shutil.copyfileobj(body, self.file)
+        self.file.write(RECORD_END)
+        return rid
+
+    def record(self, response, body=None, body_length: int = 0):
+        """Archive one exchange and its redirects; a streamed body comes in as a file (see record_streamed)"""
+        if response.status_code in PARTIAL_STATUS:
+            return
+        if body is None:
+            body, body_length = read_body(response)
+
+        with self.lock:
+            # The redirects first: replay answers the URL that was asked for
+            # with the same redirect, and requests follows it to this answer
+            for hop in response.history:
+                self.write_exchange(hop, *read_body(hop))
+            self.write_exchange(response, body, body_length)
+            self.file.flush()
+            self.count += 1
+
+    def write_exchange(self, response, body, body_length: int):
+        """Append the response + request record pair for one HTTP exchange"""
+        request = response.request
+        url = response.url
+
+        parts = urlsplit(request.url)
+        target = parts.path + (f"?{parts.query}" if parts.query else '')
+        request_block = (f"{request.method} {target or '/'} HTTP/1.1\r\nHost: {parts.netloc}\r\n" + "".join(
+            f"{k}: {v}\r\n" for k, v in request.headers.items()) + "\r\n").encode('utf-8')
+
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS]
+        headers.append(('Content-Length', str(body_length)))
+        reason = response.reason or HTTP_REASONS.get(response.status_code, '')
+        status_line = f"HTTP/1.1 {response.status_code} {reason}\r\n"
+        response_block = (status_line + "".join(f"{k}: {v}\r\n" for k, v in headers) + "\r\n").encode('utf-8')
+
+        rid = self.write_record('response', url, response_block, 'application/http;msgtype=response',
+                                body=body, body_length=body_length)
+        self.write_record('request', request.url, request_block, 'application/http;msgtype=request',
+                          {'WARC-Concurrent-To': rid})
+
+    def record_streamed(self, response):
+        """Archive a stream=True response as its body is read, once it is read to the end.
+
+        The chunks are copied to a spool file as the caller's iter_content()
+        hands them out, so the body is never held in memory; a download that
+        is abandoned part-way (too large, cut off) is not archived.
+        """
+        if response.status_code in PARTIAL_STATUS:
+            return
+        iter_content = response.iter_content
+
+        def teeing(chunk_size=1, decode_unicode=False):
+            with tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY) as spool:
+                for chunk in iter_content(chunk_size, decode_unicode):
+                    spool.write(chunk.encode(response.encoding or 'utf-8') if isinstance(chunk, str) else chunk)
+                    yield chunk
+                length = spool.tell()
+                spool.seek(0)
+                self.record(response, spool, length)
+
+        response.iter_content = teeing
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class ArchivedResponse:
+    """Status, headers and where the body lives in the archive file"""
+
+    def __init__(self, url: str, status: int, reason: str, headers: List[Tuple[str, str]],
+                 offset: int, length: int):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.offset = offset
+        self.length = length
+
+
+def read_headers(f) -> Dict[str, str]:
+    headers = {}
+    for line in iter(f.readline, b''):
+        line = line.rstrip(b'\r\n')
+        if not line:
+            break
+        name, _, value = line.decode('utf-8', 'replace').partition(':')
+        headers[name.strip()] = value.strip()
+    return headers
+
+
+def scan_records(f):
+    """(WARC headers, block offset, block length) for every complete record in f.
+
+    Stops at a record torn by a crash mid-write: its headers are cut short
+    or its block runs past the end of the file.
+    """
+    size = f.seek(0, os.SEEK_END)
+    f.seek(0)
+    while True:
+        line = f.readline()
+        if not line:
+            return
+        if not line.startswith(b"WARC/"):
+            continue  # blank separator lines
+        headers = read_headers(f)
+        start = f.tell()
+        try:
+            length = int(headers['Content-Length'])  # written last, so a torn header block lacks it
+        except (KeyError, ValueError):
+            return
+        if start + length > size:
+            return
+        yield headers, start, length
+        f.seek(start + length)
+
+
+def repair_tail(path: Path):
+    """Cut a torn last record off an archive before it is appended to.
+
+    Otherwise the torn record's Content-Length would swallow the records
+    written after it.
+    """
+    path = Path(path)
+    if not path.exists():
+        return
+
+    with open(path, 'rb+') as f:
+        end = 0
+        for _, start, length in scan_records(f):
+            end = start + length
+        f.seek(end)
+        if f.read(len(RECORD_END) + 1) != (RECORD_END if end else b''):
+            f.seek(end)
+            f.truncate()
+            if end:
+                f.write(RECORD_END)
+
+
+class WarcArchive:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.index: Dict[Tuple[str, str], ArchivedResponse] = {}
+        self.lock = threading.Lock()
+        self.file = open(self.path, 'rb')
+        self.load()
+
+    def load(self):
+        """Scan the archive once, remembering the latest response per (method, url_key)"""
+        f = self.file
+        responses = {}   # record id -> ArchivedResponse
+        for headers, start, length in scan_records(f):
+            kind = headers.get('WARC-Type')
+
+            if kind == 'response':
+                status_line = f.readline().decode('utf-8', 'replace').split(' ', 2)
+                http_headers = list(read_headers(f).items())
+                body_offset = f.tell()
+                responses[headers['WARC-Record-ID']] = ArchivedResponse(
+                    headers['WARC-Target-URI'], int(status_line[1]),
+                    status_line[2].strip() if len(status_line) > 2 else '',
+                    http_headers, body_offset, start + length - body_offset)
+            elif kind == 'request':
+                method = f.readline().split(b' ', 1)[0].decode('ascii')
+                archived = responses.get(headers.get('WARC-Concurrent-To'))
+                # Partial answers in archives recorded before they were skipped
+                if archived and archived.status not in PARTIAL_STATUS:
+                    self.index[(method, url_key(headers['WARC-Target-URI']))] = archived
+
+    def lookup(self, method: str, url: str) -> Optional[ArchivedResponse]:
+        key = url_key(url)
+        # A HEAD can be answered from a recorded GET
+        return self.index.get((method, key)) or (self.index.get(('GET', key)) if method == 'HEAD' else None)
+
+    def body(self, archived: ArchivedResponse) -> bytes:
+        with self.lock:
+            self.file.seek(archived.offset)
+            return self.file.read(archived.length)
+
+    def close(self):
+        self.file.close()
+
+
+def byte_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) for a simple 'bytes=N-' or 'bytes=N-M' Range header"""
+    if not range_header or not range_header.startswith('bytes='):
+        return None
+    start, _, end = range_header[6:].partition('-')
+    if not start.isdigit():
+        return None
+    return int(start), min(int(end), size - 1) if end.isdigit() else size - 1
+
+
+def replay_answer(archive: WarcArchive, method: str, url: str, range_header: Optional[str] = None):
+    """(status, reason, headers, body) for a request, straight from the archive"""
+    archived = archive.lookup(method, url)
+    if archived is None:
+        return 404, 'Not In Archive', [('Content-Length', '0')], b''
+
+    headers = [(k, v) for k, v in archived.headers if k.lower() != 'content-length']
+    body = b'' if method == 'HEAD' else archive.body(archived)
+    status, reason = archived.status, archived.reason
+
+    span = byte_range(range_header, archived.length) if status == 200 else None
+    if span and span[0] >= archived.length:
+        return 416, 'Range Not Satisfiable', headers + [('Content-Range', f"bytes */{archived.length}"),
+                                                        ('Content-Length', '0')], b''
+    if span:
+        status, reason = 206, 'Partial Content'
+        body = body[span[0]:span[1] + 1]
+        headers.append(('Content-Range', f"bytes {span[0]}-{span[1]}/{archived.length}"))
+    headers.append(('Content-Length', str(len(body) if method != 'HEAD' else archived.length)))
+    return status, reason, headers, body
+
+
+class ReplayAdapter(BaseAdapter):
+    """requests transport that serves every request from a WarcArchive"""
+
+    def __init__(self, archive: WarcArchive):
+        super().__init__()
+        self.archive = archive
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        status, reason, headers, body = replay_answer(
+            self.archive, request.method, request.url, request.headers.get('Range'))
+        response = Response()
+        response.status_code = status
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers)
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.encoding = None
+        return response
+
+    def close(self):
+        pass
+
+
+def serve(archive: WarcArchive, port: int = 8000, host: str = SITE_HOST):
+    """Serve an archive over HTTP; plain paths are looked up under https://<host>"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def answer(self, method: str):
+            # Proxy-style requests carry the full URL; plain ones are paths on the old site
+            url = self.path if '://' in self.path else f"https://{host}{self.path}"
+            status, reason, headers, body = replay_answer(archive, method, url, self.headers.get('Range'))
+            self.send_response(status, reason)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            if method != 'HEAD':
+                self.wfile.write(body)
+
+        def do_GET(self):
+            self.answer('GET')
+
+        def do_HEAD(self):
+            self.answer('HEAD')
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    print(f"Serving {archive.path} ({len(archive.index)} responses) on http://127.0.0.1:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or serve a crawl archive")
+    parser.add_argument("command", choices=["serve", "list"])
+    parser.add_argument("archive", type=Path)
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    archive = WarcArchive(args.archive)
+    if args.command == "list":
+        for (method, key), archived in sorted(archive.index.items(), key=lambda item: item[0][1]):
+            print(f"{archived.status} {method:4} {archived.length:>10}  {archived.url}")
+        print(f"\n{len(archive.index)} responses", file=sys.stderr)
+    else:
+        serve(archive, args.port)